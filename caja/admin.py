@@ -11,6 +11,7 @@ from .models import (
     DenominacionMoneda, ConteoEfectivo, DetalleConteo,
     Cuenta, TransaccionGeneral
 )
+from .movimientos import registrar_movimiento
 
 
 @admin.register(CajaRegistradora)
@@ -93,11 +94,35 @@ class CajaRegistradoraAdmin(admin.ModelAdmin):
 class MovimientoCajaAdmin(admin.ModelAdmin):
     """Administrador simplificado para MovimientoCaja."""
     
-    list_display = ('id', 'caja', 'tipo', 'monto', 'fecha_movimiento', 'usuario')
-    list_filter = ('tipo', 'fecha_movimiento', 'usuario')
+    list_display = ('id', 'caja', 'tipo', 'canal', 'monto', 'fecha_movimiento', 'usuario')
+    list_filter = ('tipo', 'canal', 'fecha_movimiento', 'usuario')
     search_fields = ('descripcion', 'referencia')
     ordering = ('-fecha_movimiento',)
-    readonly_fields = ('fecha_movimiento',)
+    readonly_fields = ('fecha_movimiento', 'transaccion_asociada')
+    
+    def save_model(self, request, obj, form, change):
+        """
+        Los movimientos nuevos pasan por registrar_movimiento() para crear su
+        transacción de tesorería y ajustar el saldo del banco.
+        """
+        if change:
+            return super().save_model(request, obj, form, change)
+        
+        movimiento = registrar_movimiento(
+            caja=obj.caja,
+            tipo_movimiento=obj.tipo_movimiento,
+            tipo=obj.tipo,
+            monto=obj.monto,
+            usuario=obj.usuario,
+            descripcion=obj.descripcion,
+            referencia=obj.referencia,
+            canal=obj.canal,
+        )
+        # El admin sigue usando obj (mensaje, historial y redirección)
+        obj.pk = movimiento.pk
+        obj.fecha_movimiento = movimiento.fecha_movimiento
+        obj.transaccion_asociada = movimiento.transaccion_asociada
+        obj._state.adding = False
     
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser
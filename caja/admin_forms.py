@@ -40,7 +40,7 @@ class MovimientoAdminForm(forms.Form):
         required=False,
         widget=forms.Textarea(attrs={'rows': 2}),
         label='Descripción',
-        help_text='Detalles del movimiento (opcional). Agrega [BANCO] si es entrada al banco'
+        help_text='Detalles del movimiento (opcional)'
     )
     
     referencia = forms.CharField(
@@ -326,7 +326,8 @@ class CajaAdminCompleteForm(forms.Form):
                     'tipo': tipo_tipo,
                     'monto': monto,
                     'descripcion': desc_final,
-                    'referencia': referencia
+                    'referencia': referencia,
+                    'es_banco': es_banco
                 })
         
         # INGRESOS
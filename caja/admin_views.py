@@ -16,6 +16,7 @@ from .models import (
     Cuenta, TransaccionGeneral
 )
 from .admin_forms import CajaAdminCompleteForm
+from .movimientos import registrar_movimiento
 
 
 def superuser_required(view_func):
@@ -70,21 +71,22 @@ def crear_caja_completa_admin(request):
                                 }
                             )
                             
-                            # Crear movimiento (la señal creará automáticamente la transacción)
-                            movimiento = MovimientoCaja.objects.create(
+                            # Crear movimiento y su transacción con la fecha de apertura
+                            registrar_movimiento(
                                 caja=caja,
                                 tipo_movimiento=tipo_movimiento,
                                 tipo=mov_data['tipo'],
                                 monto=mov_data['monto'],
+                                usuario=request.user,
                                 descripcion=mov_data['descripcion'],
                                 referencia=mov_data['referencia'],
-                                usuario=request.user
+                                canal=(
+                                    MovimientoCaja.CanalChoices.BANCO
+                                    if mov_data.get('es_banco')
+                                    else MovimientoCaja.CanalChoices.EFECTIVO
+                                ),
+                                fecha=caja_data['fecha_apertura']
                             )
-                            
-                            # Actualizar fecha del movimiento manualmente
-                            # (usando la misma fecha de apertura + algunos minutos)
-                            movimiento.fecha_movimiento = caja_data['fecha_apertura']
-                            movimiento.save(update_fields=['fecha_movimiento'])
                     
                     # 3. CERRAR LA CAJA SI SE SOLICITA
                     if caja_data['cerrar_caja']:
@@ -163,7 +165,7 @@ def resumen_caja_admin(request, caja_id):
     total_egresos = sum(m.monto for m in movimientos if m.tipo == 'EGRESO')
     total_entradas_banco = sum(
         m.monto for m in movimientos 
-        if m.tipo == 'INGRESO' and '[BANCO]' in m.descripcion
+        if m.tipo == 'INGRESO' and m.es_banco
     )
     
     # Separar movimientos por tipo
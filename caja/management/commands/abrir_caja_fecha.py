@@ -5,10 +5,10 @@ from django.utils import timezone
 from decimal import Decimal
 from datetime import datetime, date
 from caja.models import (
-    CajaRegistradora, MovimientoCaja, TipoMovimiento, 
-    DenominacionMoneda, ConteoEfectivo, DetalleConteo, 
-    Cuenta, TransaccionGeneral
+    CajaRegistradora, DenominacionMoneda, ConteoEfectivo, DetalleConteo, Cuenta
 )
+from caja.movimientos import registrar_movimiento
+from caja.referencia import ReferenciaCaja
 import re
 
 
@@ -127,97 +127,51 @@ class Command(BaseCommand):
         # Crear la caja con transacción atómica
         try:
             with transaction.atomic():
-                # Importar el signal para deshabilitarlo temporalmente
-                from django.db.models.signals import post_save
-                from caja.models import crear_transaccion_apertura_caja
+                # Crear la caja registradora; el movimiento de apertura se
+                # registra abajo con la fecha indicada, no desde la señal
+                caja = CajaRegistradora(
+                    cajero=usuario,
+                    monto_inicial=total_inicial,
+                    estado='ABIERTA'
+                )
+                caja._sin_movimiento_apertura = True
+                caja.save()
                 
-                # Deshabilitar el signal temporalmente
-                post_save.disconnect(crear_transaccion_apertura_caja, sender='caja.CajaRegistradora')
+                # Actualizar la fecha de apertura manualmente después de crear
+                # (necesario porque auto_now_add no permite override)
+                import pytz
                 
-                try:
-                    # Crear la caja registradora SIN el signal automático
-                    caja = CajaRegistradora.objects.create(
-                        cajero=usuario,
-                        monto_inicial=total_inicial,
-                        estado='ABIERTA'
+                # Crear datetime con timezone de Colombia
+                colombia_tz = pytz.timezone('America/Bogota')
+                fecha_datetime = colombia_tz.localize(
+                    datetime.combine(fecha_apertura, datetime.min.time())
+                )
+                
+                CajaRegistradora.objects.filter(id=caja.id).update(fecha_apertura=fecha_datetime)
+                caja.fecha_apertura = fecha_datetime
+
+                # Movimiento de apertura y su transacción en tesorería, con la fecha correcta
+                if total_inicial > 0:
+                    tipo_apertura = ReferenciaCaja.tipo_movimiento_sistema(
+                        'APERTURA',
+                        {
+                            'nombre': 'Apertura de Caja',
+                            'descripcion': 'Dinero inicial al abrir la caja',
+                            'tipo_base': 'INTERNO',
+                            'activo': True
+                        }
                     )
-                    
-                    # Actualizar la fecha de apertura manualmente después de crear
-                    # (necesario porque auto_now_add no permite override)
-                    from django.utils import timezone as django_timezone
-                    import pytz
-                    
-                    # Crear datetime con timezone de Colombia
-                    colombia_tz = pytz.timezone('America/Bogota')
-                    fecha_datetime = colombia_tz.localize(
-                        datetime.combine(fecha_apertura, datetime.min.time())
+                    registrar_movimiento(
+                        caja=caja,
+                        tipo_movimiento=tipo_apertura,
+                        tipo='INGRESO',
+                        monto=total_inicial,
+                        usuario=usuario,
+                        descripcion=f'Apertura de caja - Monto inicial: ${total_inicial:,.2f}',
+                        fecha=fecha_datetime,
+                        descripcion_tesoreria=f'Apertura caja - Cajero: {usuario.username}',
+                        referencia_tesoreria=f'APERTURA-CAJA-{caja.id}',
                     )
-                    
-                    CajaRegistradora.objects.filter(id=caja.id).update(fecha_apertura=fecha_datetime)
-
-                    # Crear manualmente el movimiento de apertura con la fecha correcta
-                    if total_inicial > 0:
-                        # Obtener tipo de movimiento APERTURA
-                        tipo_apertura, _ = TipoMovimiento.objects.get_or_create(
-                            codigo='APERTURA',
-                            defaults={
-                                'nombre': 'Apertura de Caja',
-                                'descripcion': 'Dinero inicial al abrir la caja',
-                                'tipo_base': 'INTERNO',
-                                'activo': True
-                            }
-                        )
-                        
-                        # Crear el movimiento con fecha personalizada
-                        movimiento = MovimientoCaja.objects.create(
-                            caja=caja,
-                            tipo_movimiento=tipo_apertura,
-                            tipo='INGRESO',
-                            monto=total_inicial,
-                            descripcion=f'Apertura de caja - Monto inicial: ${total_inicial:,.2f}',
-                            usuario=usuario
-                        )
-                        
-                        # Actualizar la fecha del movimiento - usar update directo en lugar de bulk update
-                        movimiento.fecha_movimiento = fecha_datetime
-                        movimiento.save(update_fields=['fecha_movimiento'])
-
-                        # Crear la transacción en tesorería manualmente (ya que deshabilitamos el signal)
-                        # Obtener o crear cuenta "Caja Virtual" para tracking
-                        cuenta_caja_virtual, _ = Cuenta.objects.get_or_create(
-                            nombre='Caja Virtual',
-                            defaults={
-                                'tipo': 'RESERVA',
-                                'saldo_actual': Decimal('0.00'),
-                                'activo': False
-                            }
-                        )
-                        
-                        # Crear transacción en tesorería (opcional, no crítica)
-                        try:
-                            transaccion = TransaccionGeneral.objects.create(
-                                tipo='INGRESO',
-                                monto=total_inicial,
-                                descripcion=f'Apertura caja - Cajero: {usuario.username}',
-                                referencia=f'APERTURA-CAJA-{caja.id}',
-                                tipo_movimiento=tipo_apertura,
-                                cuenta=cuenta_caja_virtual,
-                                usuario=usuario
-                            )
-                            
-                            # Actualizar la fecha de la transacción
-                            transaccion.fecha = fecha_datetime
-                            transaccion.save(update_fields=['fecha'])
-                            
-                            # Vincular movimiento y transacción
-                            movimiento.transaccion_asociada = transaccion
-                            movimiento.save()
-                        except Exception as e:
-                            self.stdout.write(f'⚠️ Advertencia: No se pudo crear transacción de tesorería: {str(e)}')
-                
-                finally:
-                    # Reactivar el signal
-                    post_save.connect(crear_transaccion_apertura_caja, sender='caja.CajaRegistradora')
 
                 # Crear conteo de apertura si hay denominaciones
                 if conteos_data:
@@ -244,8 +198,7 @@ class Command(BaseCommand):
                         nombre__in=['Cuenta Principal', 'Banco Principal', 'Principal']
                     ).first()
                     if cuenta_principal and total_inicial > 0:
-                        cuenta_principal.saldo_actual += total_inicial
-                        cuenta_principal.save()
+                        Cuenta.sumar_saldo(cuenta_principal.id, total_inicial)
                 except Exception as e:
                     self.stdout.write(f'⚠️ Advertencia: No se pudo actualizar cuenta principal: {str(e)}')
 
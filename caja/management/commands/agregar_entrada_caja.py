@@ -1,14 +1,14 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models.signals import post_save
 from decimal import Decimal
 import pytz
 from datetime import datetime
 from caja.models import (
     CajaRegistradora, MovimientoCaja, TipoMovimiento, 
-    TransaccionGeneral, Cuenta
+    Cuenta
 )
+from caja.movimientos import registrar_movimiento
 
 
 class Command(BaseCommand):
@@ -57,7 +57,7 @@ class Command(BaseCommand):
             raise CommandError(f'Usuario "{username}" no existe')
 
         # Verificar que haya una caja abierta
-        caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+        caja_abierta = CajaRegistradora.caja_abierta()
         if not caja_abierta:
             raise CommandError('No hay ninguna caja abierta. Abra una caja primero.')
 
@@ -94,6 +94,16 @@ class Command(BaseCommand):
         except TipoMovimiento.DoesNotExist:
             raise CommandError(f'Tipo de movimiento "{categoria_codigo}" no existe o no está activo')
 
+        # Con [BANCO] en la descripción el movimiento va a la cuenta banco:
+        # sin cuenta banco activa no se podría registrar su transacción
+        canal = (
+            MovimientoCaja.CanalChoices.BANCO
+            if '[BANCO]' in descripcion.upper()
+            else MovimientoCaja.CanalChoices.EFECTIVO
+        )
+        if canal == MovimientoCaja.CanalChoices.BANCO and not Cuenta.objects.filter(tipo='BANCO', activo=True).exists():
+            raise CommandError('No hay cuenta de banco activa configurada para un movimiento [BANCO].')
+
         # Mostrar resumen
         self.stdout.write('\n' + '=' * 60)
         self.stdout.write(f'📊 RESUMEN DE LA ENTRADA:')
@@ -120,54 +130,20 @@ class Command(BaseCommand):
             fecha_movimiento_tz = colombia_tz.localize(fecha_movimiento)
 
             with transaction.atomic():
-                # Desconectar señales para evitar duplicación
-                from caja.models import crear_transaccion_tesoreria_desde_movimiento
-                post_save.disconnect(crear_transaccion_tesoreria_desde_movimiento, sender=MovimientoCaja)
-                
-                try:
-                    # Crear movimiento en la caja con fecha correcta
-                    movimiento = MovimientoCaja.objects.create(
-                        caja=caja_abierta,
-                        tipo_movimiento=tipo_movimiento,
-                        tipo='INGRESO',
-                        monto=monto,
-                        descripcion=descripcion,
-                        referencia=referencia or '',
-                        usuario=usuario
-                    )
-                    
-                    # Actualizar fecha manualmente
-                    movimiento.fecha_movimiento = fecha_movimiento_tz
-                    movimiento.save()
-
-                    # Crear transacción en tesorería
-                    cuenta_destino = self._determinar_cuenta_destino(descripcion, tipo_movimiento)
-
-                    transaccion = TransaccionGeneral.objects.create(
-                        tipo='INGRESO',
-                        monto=monto,
-                        descripcion=f'Origen caja - Entrada:{tipo_movimiento.nombre} - {descripcion}',
-                        referencia=referencia or f'MOV-{movimiento.id}',
-                        tipo_movimiento=tipo_movimiento,
-                        cuenta=cuenta_destino,
-                        usuario=usuario
-                    )
-                    
-                    # Actualizar fecha de la transacción también
-                    transaccion.fecha = fecha_movimiento_tz
-                    transaccion.save()
-
-                    # Vincular movimiento y transacción
-                    movimiento.transaccion_asociada = transaccion
-                    movimiento.save()
-
-                    # Actualizar saldo de la cuenta destino
-                    cuenta_destino.saldo_actual += monto
-                    cuenta_destino.save()
-                    
-                finally:
-                    # Reconectar señales
-                    post_save.connect(crear_transaccion_tesoreria_desde_movimiento, sender=MovimientoCaja)
+                # Movimiento y transacción en tesorería con la fecha de la caja
+                movimiento = registrar_movimiento(
+                    caja=caja_abierta,
+                    tipo_movimiento=tipo_movimiento,
+                    tipo='INGRESO',
+                    monto=monto,
+                    usuario=usuario,
+                    descripcion=descripcion,
+                    referencia=referencia or '',
+                    canal=canal,
+                    fecha=fecha_movimiento_tz
+                )
+                transaccion = movimiento.transaccion_asociada
+                cuenta_destino = transaccion.cuenta
 
                 self.stdout.write('\n✅ ENTRADA REGISTRADA EXITOSAMENTE')
                 self.stdout.write(f'📋 Movimiento ID: {movimiento.id}')
@@ -259,23 +235,3 @@ class Command(BaseCommand):
 
         return categoria_codigo, monto, descripcion.strip(), referencia or ''
 
-    def _determinar_cuenta_destino(self, descripcion, tipo_movimiento):
-        """Determina la cuenta destino según el tipo de movimiento y descripción"""
-        
-        # Si es entrada al banco (contiene [BANCO])
-        if '[BANCO]' in descripcion.upper():
-            cuenta = Cuenta.objects.filter(tipo='BANCO', activo=True).first()
-            if cuenta:
-                return cuenta
-
-        # Usar cuenta "Caja Virtual" por defecto para movimientos de caja
-        cuenta_caja, created = Cuenta.objects.get_or_create(
-            nombre='Caja Virtual',
-            defaults={
-                'tipo': 'RESERVA',
-                'saldo_actual': Decimal('0.00'),
-                'activo': False
-            }
-        )
-        
-        return cuenta_caja
\ No newline at end of file
@@ -1,15 +1,15 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models.signals import post_save
 from django.db import models
 from decimal import Decimal
 import pytz
 from datetime import datetime
 from caja.models import (
     CajaRegistradora, MovimientoCaja, TipoMovimiento, 
-    TransaccionGeneral, Cuenta
+    Cuenta
 )
+from caja.movimientos import registrar_movimiento
 
 
 class Command(BaseCommand):
@@ -54,7 +54,7 @@ class Command(BaseCommand):
             raise CommandError(f'Usuario "{options["usuario"]}" no encontrado')
 
         # Verificar que hay una caja abierta
-        caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+        caja_abierta = CajaRegistradora.caja_abierta()
         if not caja_abierta:
             raise CommandError('❌ No hay ninguna caja abierta. Abra una caja primero.')
 
@@ -97,6 +97,16 @@ class Command(BaseCommand):
         if monto > saldo_actual:
             raise CommandError(f'❌ Saldo insuficiente en caja. Disponible: ${saldo_actual:,.0f}')
 
+        # Con [BANCO] en la descripción el movimiento va a la cuenta banco:
+        # sin cuenta banco activa no se podría registrar su transacción
+        canal = (
+            MovimientoCaja.CanalChoices.BANCO
+            if '[BANCO]' in descripcion.upper()
+            else MovimientoCaja.CanalChoices.EFECTIVO
+        )
+        if canal == MovimientoCaja.CanalChoices.BANCO and not Cuenta.objects.filter(tipo='BANCO', activo=True).exists():
+            raise CommandError('❌ No hay cuenta de banco activa configurada para un movimiento [BANCO].')
+
         # Mostrar resumen
         self.stdout.write('\n' + '=' * 60)
         self.stdout.write('📊 RESUMEN DE LA SALIDA:')
@@ -123,54 +133,20 @@ class Command(BaseCommand):
             fecha_movimiento_tz = colombia_tz.localize(fecha_movimiento)
 
             with transaction.atomic():
-                # Desconectar señales para evitar duplicación
-                from caja.models import crear_transaccion_tesoreria_desde_movimiento
-                post_save.disconnect(crear_transaccion_tesoreria_desde_movimiento, sender=MovimientoCaja)
-                
-                try:
-                    # Crear movimiento en la caja con fecha correcta
-                    movimiento = MovimientoCaja.objects.create(
-                        caja=caja_abierta,
-                        tipo_movimiento=tipo_movimiento,
-                        tipo='EGRESO',
-                        monto=monto,
-                        descripcion=descripcion,
-                        referencia=referencia or '',
-                        usuario=usuario
-                    )
-                    
-                    # Actualizar fecha manualmente
-                    movimiento.fecha_movimiento = fecha_movimiento_tz
-                    movimiento.save()
-
-                    # Crear transacción en tesorería
-                    cuenta_destino = self._determinar_cuenta_destino(descripcion, tipo_movimiento)
-
-                    transaccion = TransaccionGeneral.objects.create(
-                        tipo='EGRESO',
-                        monto=monto,
-                        descripcion=f'Origen caja - Salida:{tipo_movimiento.nombre} - {descripcion}',
-                        referencia=referencia or f'MOV-{movimiento.id}',
-                        tipo_movimiento=tipo_movimiento,
-                        cuenta=cuenta_destino,
-                        usuario=usuario
-                    )
-                    
-                    # Actualizar fecha de la transacción también
-                    transaccion.fecha = fecha_movimiento_tz
-                    transaccion.save()
-
-                    # Vincular movimiento y transacción
-                    movimiento.transaccion_asociada = transaccion
-                    movimiento.save()
-
-                    # Actualizar saldo de la cuenta destino (restar porque es egreso)
-                    cuenta_destino.saldo_actual -= monto
-                    cuenta_destino.save()
-                    
-                finally:
-                    # Reconectar señales
-                    post_save.connect(crear_transaccion_tesoreria_desde_movimiento, sender=MovimientoCaja)
+                # Movimiento y transacción en tesorería con la fecha de la caja
+                movimiento = registrar_movimiento(
+                    caja=caja_abierta,
+                    tipo_movimiento=tipo_movimiento,
+                    tipo='EGRESO',
+                    monto=monto,
+                    usuario=usuario,
+                    descripcion=descripcion,
+                    referencia=referencia or '',
+                    canal=canal,
+                    fecha=fecha_movimiento_tz
+                )
+                transaccion = movimiento.transaccion_asociada
+                cuenta_destino = transaccion.cuenta
 
                 self.stdout.write('\n✅ SALIDA REGISTRADA EXITOSAMENTE')
                 self.stdout.write(f'📋 Movimiento ID: {movimiento.id}')
@@ -240,27 +216,6 @@ class Command(BaseCommand):
         
         return tipo_seleccionado.codigo, monto, descripcion, referencia
 
-    def _determinar_cuenta_destino(self, descripcion, tipo_movimiento):
-        """Determina la cuenta destino según el tipo de movimiento"""
-        # Si la descripción contiene [BANCO], va al banco
-        if '[BANCO]' in descripcion.upper():
-            cuenta = Cuenta.objects.filter(tipo='BANCO', activo=True).first()
-            if not cuenta:
-                raise CommandError('❌ No hay cuenta de banco activa configurada')
-            return cuenta
-        
-        # Para otros casos, usar cuenta de caja virtual
-        cuenta_caja_virtual, created = Cuenta.objects.get_or_create(
-            nombre='Caja Virtual',
-            defaults={
-                'tipo': 'RESERVA',
-                'saldo_actual': Decimal('0.00'),
-                'activo': False,
-                'descripcion': 'Cuenta virtual para tracking de movimientos de caja'
-            }
-        )
-        return cuenta_caja_virtual
-
     def _calcular_saldo_actual(self, caja):
         """Calcula el saldo actual de la caja"""
         ingresos = MovimientoCaja.objects.filter(
@@ -85,12 +85,9 @@ class Command(BaseCommand):
             )
 
         # Verificar que haya una caja abierta
-        try:
-            caja_abierta = CajaRegistradora.objects.get(estado='ABIERTA')
-        except CajaRegistradora.DoesNotExist:
+        caja_abierta = CajaRegistradora.caja_abierta()
+        if caja_abierta is None:
             raise CommandError('No hay ninguna caja abierta. No se puede cerrar.')
-        except CajaRegistradora.MultipleObjectsReturned:
-            raise CommandError('Error: Hay múltiples cajas abiertas. Contacte al administrador.')
 
         self.stdout.write(f'\n🔒 CIERRE DE CAJA REGISTRADORA')
         self.stdout.write(f'📋 Caja: #{caja_abierta.id}')
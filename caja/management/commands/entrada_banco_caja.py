@@ -1,15 +1,15 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models.signals import post_save
 from django.db import models
 from decimal import Decimal
 import pytz
 from datetime import datetime
 from caja.models import (
     CajaRegistradora, MovimientoCaja, TipoMovimiento, 
-    TransaccionGeneral, Cuenta
+    Cuenta
 )
+from caja.movimientos import registrar_movimiento
 
 
 class Command(BaseCommand):
@@ -54,7 +54,7 @@ class Command(BaseCommand):
             raise CommandError(f'Usuario "{options["usuario"]}" no encontrado')
 
         # Verificar que hay una caja abierta
-        caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+        caja_abierta = CajaRegistradora.caja_abierta()
         if not caja_abierta:
             raise CommandError('❌ No hay ninguna caja abierta. Abra una caja primero.')
 
@@ -143,52 +143,20 @@ class Command(BaseCommand):
             fecha_movimiento_tz = colombia_tz.localize(fecha_movimiento)
 
             with transaction.atomic():
-                # Desconectar señales para evitar duplicación
-                from caja.models import crear_transaccion_tesoreria_desde_movimiento
-                post_save.disconnect(crear_transaccion_tesoreria_desde_movimiento, sender=MovimientoCaja)
-                
-                try:
-                    # Crear movimiento en la caja con fecha correcta
-                    movimiento = MovimientoCaja.objects.create(
-                        caja=caja_abierta,
-                        tipo_movimiento=tipo_movimiento,
-                        tipo='INGRESO',
-                        monto=monto,
-                        descripcion=descripcion_final,
-                        referencia=referencia_final,
-                        usuario=usuario
-                    )
-                    
-                    # Actualizar fecha manualmente
-                    movimiento.fecha_movimiento = fecha_movimiento_tz
-                    movimiento.save()
-
-                    # Crear transacción en tesorería (va al banco)
-                    transaccion = TransaccionGeneral.objects.create(
-                        tipo='INGRESO',
-                        monto=monto,
-                        descripcion=f'Origen banco - Entrada:{tipo_movimiento.nombre} - {descripcion_final}',
-                        referencia=referencia_final or f'MOV-{movimiento.id}',
-                        tipo_movimiento=tipo_movimiento,
-                        cuenta=cuenta_banco,
-                        usuario=usuario
-                    )
-                    
-                    # Actualizar fecha de la transacción también
-                    transaccion.fecha = fecha_movimiento_tz
-                    transaccion.save()
-
-                    # Vincular movimiento y transacción
-                    movimiento.transaccion_asociada = transaccion
-                    movimiento.save()
-
-                    # Actualizar saldo de la cuenta banco (sumar porque es ingreso)
-                    cuenta_banco.saldo_actual += monto
-                    cuenta_banco.save()
-                    
-                finally:
-                    # Reconectar señales
-                    post_save.connect(crear_transaccion_tesoreria_desde_movimiento, sender=MovimientoCaja)
+                # Movimiento y transacción en la cuenta banco con la fecha de la caja
+                movimiento = registrar_movimiento(
+                    caja=caja_abierta,
+                    tipo_movimiento=tipo_movimiento,
+                    tipo='INGRESO',
+                    monto=monto,
+                    usuario=usuario,
+                    descripcion=descripcion_final,
+                    referencia=referencia_final,
+                    canal=MovimientoCaja.CanalChoices.BANCO,
+                    fecha=fecha_movimiento_tz
+                )
+                transaccion = movimiento.transaccion_asociada
+                cuenta_banco.refresh_from_db(fields=['saldo_actual'])
 
                 # Calcular saldo actual de caja y entradas banco
                 saldo_caja = self._calcular_saldo_actual(caja_abierta)
@@ -280,7 +248,7 @@ class Command(BaseCommand):
         entradas_banco = MovimientoCaja.objects.filter(
             caja=caja,
             tipo='INGRESO',
-            descripcion__icontains='[BANCO]'
+            canal=MovimientoCaja.CanalChoices.BANCO
         ).aggregate(total=models.Sum('monto'))['total'] or Decimal('0')
         
         return entradas_banco
\ No newline at end of file
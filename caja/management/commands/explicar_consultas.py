@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from caja.models import CajaRegistradora, MovimientoCaja, TransaccionGeneral, Cuenta
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas principales de caja y tesorería y marca los recorridos completos de tabla'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vista',
+            type=str,
+            help='Analizar solo las consultas de una vista (ej: tesoreria_dashboard)',
+        )
+        parser.add_argument(
+            '--detalle',
+            action='store_true',
+            help='Mostrar el plan completo de cada consulta'
+        )
+        parser.add_argument(
+            '--fallar',
+            action='store_true',
+            help='Terminar con error si alguna consulta recorre una tabla completa (útil en CI)'
+        )
+
+    def handle(self, *args, **options):
+        consultas = self._consultas()
+
+        if options.get('vista'):
+            consultas = [c for c in consultas if c[0] == options['vista']]
+            if not consultas:
+                raise CommandError(f'❌ No hay consultas registradas para la vista "{options["vista"]}"')
+
+        self.stdout.write(f'🔎 ANÁLISIS DE CONSULTAS ({connection.vendor})')
+        self.stdout.write('=' * 60)
+
+        recorridos = 0
+        vista_actual = None
+
+        for vista, nombre, queryset in consultas:
+            if vista != vista_actual:
+                vista_actual = vista
+                self.stdout.write(f'\n📄 {vista}')
+
+            sql, params = queryset.query.sql_with_params()
+            plan = self._explicar(sql, params)
+            tablas = self._tablas_recorridas(plan)
+
+            if tablas:
+                recorridos += 1
+                self.stdout.write(self.style.WARNING(
+                    f'   ⚠️  {nombre}: recorrido completo de {", ".join(tablas)}'
+                ))
+            else:
+                self.stdout.write(f'   ✅ {nombre}')
+
+            if options['detalle']:
+                for fila in plan:
+                    self.stdout.write(f'      {self._formatear_fila(fila)}')
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(f'📋 Consultas analizadas: {len(consultas)}')
+
+        if not recorridos:
+            self.stdout.write(self.style.SUCCESS('✅ Ninguna consulta recorre tablas completas'))
+            return
+
+        mensaje = f'⚠️  {recorridos} consulta(s) con recorrido completo de tabla'
+        if options['fallar']:
+            raise CommandError(mensaje)
+        self.stdout.write(self.style.WARNING(mensaje))
+        self.stdout.write('   (en tablas con pocas filas el motor puede preferir el recorrido completo)')
+
+    def _consultas(self):
+        """
+        Consultas representativas de cada vista: (vista, nombre, queryset).
+        Se usan los mismos filtros que las vistas; los valores son de ejemplo.
+        """
+        ahora = timezone.now()
+        hace_semana = ahora - timedelta(days=7)
+        caja_id = CajaRegistradora.objects.values_list('id', flat=True).first() or 0
+        cuenta_id = Cuenta.objects.values_list('id', flat=True).first() or 0
+
+        return [
+            ('caja_dashboard', 'caja abierta',
+             CajaRegistradora.objects.filter(turno_abierto=True)),
+            ('caja_dashboard', 'últimos movimientos de la caja',
+             MovimientoCaja.objects.filter(caja_id=caja_id).order_by('-fecha_movimiento')[:10]),
+            ('caja_dashboard', 'totales de la caja (recalculo)',
+             MovimientoCaja.objects.filter(caja_id=caja_id, tipo='INGRESO', canal='EFECTIVO')),
+            ('tesoreria_dashboard', 'última caja cerrada',
+             CajaRegistradora.objects.filter(estado='CERRADA').order_by('-fecha_cierre')[:1]),
+            ('tesoreria_dashboard', 'entradas al banco',
+             MovimientoCaja.objects.filter(tipo='INGRESO', canal='BANCO')),
+            ('tesoreria_dashboard', 'egresos de una cuenta',
+             TransaccionGeneral.objects.filter(cuenta_id=cuenta_id, tipo='EGRESO')),
+            ('tesoreria_dashboard', 'ingresos de una cuenta por fecha',
+             TransaccionGeneral.objects.filter(
+                 cuenta_id=cuenta_id, tipo='INGRESO', fecha__gte=hace_semana
+             )),
+            ('transacciones_tesoreria_ajax', 'página de transacciones por cursor',
+             TransaccionGeneral.objects.filter(
+                 Q(fecha__lt=ahora) | Q(fecha=ahora, id__lt=0)
+             ).order_by('-fecha', '-id')[:26]),
+            ('balance_general_ajax', 'cajas cerradas en el rango',
+             CajaRegistradora.objects.filter(
+                 estado='CERRADA', fecha_cierre__gte=hace_semana, fecha_cierre__lte=ahora
+             )),
+            ('flujo_efectivo_ajax', 'movimientos en el rango',
+             MovimientoCaja.objects.filter(
+                 fecha_movimiento__gte=hace_semana, fecha_movimiento__lte=ahora, tipo='EGRESO'
+             )),
+            ('historial_arqueos_ajax', 'cajas cerradas por fecha de cierre',
+             CajaRegistradora.objects.filter(estado='CERRADA').order_by('-fecha_cierre')[:20]),
+            ('CajaListView', 'historial de cajas',
+             CajaRegistradora.objects.order_by('-fecha_apertura')[:20]),
+            ('admin_transacciongeneral', 'últimas transacciones',
+             TransaccionGeneral.objects.order_by('-fecha')[:20]),
+        ]
+
+    def _explicar(self, sql, params):
+        """Ejecuta el EXPLAIN propio del motor y devuelve las filas como diccionarios."""
+        if connection.vendor == 'sqlite':
+            prefijo = 'EXPLAIN QUERY PLAN '
+        else:
+            prefijo = 'EXPLAIN '
+
+        with connection.cursor() as cursor:
+            cursor.execute(prefijo + sql, params)
+            columnas = [col[0].lower() for col in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def _tablas_recorridas(self, plan):
+        """Tablas que el plan lee completas (sin usar índice)."""
+        tablas = []
+        for fila in plan:
+            if connection.vendor == 'mysql':
+                # type=ALL es un recorrido completo de la tabla
+                if fila.get('type') == 'ALL':
+                    tablas.append(fila.get('table'))
+            elif connection.vendor == 'sqlite':
+                detalle = fila.get('detail', '')
+                if detalle.startswith('SCAN ') and 'INDEX' not in detalle:
+                    tablas.append(detalle.split()[1])
+            elif connection.vendor == 'postgresql':
+                linea = fila.get('query plan', '')
+                if 'Seq Scan on' in linea:
+                    tablas.append(linea.split('Seq Scan on')[1].split()[0])
+        return tablas
+
+    def _formatear_fila(self, fila):
+        return ' | '.join(f'{clave}={valor}' for clave, valor in fila.items() if valor is not None)
@@ -0,0 +1,101 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from caja.models import CajaRegistradora
+from caja.totales import TotalesCaja, agregar_totales_por_caja
+
+
+class Command(BaseCommand):
+    help = 'Verifica los totales acumulados de las cajas contra sus movimientos y repara las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--caja',
+            type=int,
+            help='ID de una caja específica (por defecto todas)',
+        )
+        parser.add_argument(
+            '--solo-abiertas',
+            action='store_true',
+            help='Verificar solo la(s) caja(s) abierta(s)'
+        )
+        parser.add_argument(
+            '--solo-verificar',
+            action='store_true',
+            help='Solo reportar diferencias, sin corregirlas'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Cantidad de cajas procesadas por consulta (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        cajas = CajaRegistradora.objects.order_by('id')
+
+        if options.get('caja'):
+            cajas = cajas.filter(id=options['caja'])
+            if not cajas.exists():
+                raise CommandError(f'❌ La caja #{options["caja"]} no existe')
+
+        if options['solo_abiertas']:
+            cajas = cajas.filter(estado='ABIERTA')
+
+        solo_verificar = options['solo_verificar']
+        lote = max(options['lote'], 1)
+        campos = CajaRegistradora.CAMPOS_TOTALES
+
+        self.stdout.write('🔎 VERIFICACIÓN DE TOTALES ACUMULADOS DE CAJA')
+        self.stdout.write('=' * 60)
+
+        revisadas = 0
+        con_diferencias = 0
+        ultimo_id = 0
+
+        while True:
+            # Procesar por lotes para mantener la memoria acotada
+            bloque = list(cajas.filter(id__gt=ultimo_id).only('id', *campos)[:lote])
+            if not bloque:
+                break
+            ultimo_id = bloque[-1].id
+
+            # Una sola consulta agrupada por lote
+            reales = agregar_totales_por_caja([caja.id for caja in bloque])
+            por_corregir = []
+
+            for caja in bloque:
+                revisadas += 1
+                esperado = reales.get(caja.id, TotalesCaja()).como_campos_caja()
+                actual = {campo: getattr(caja, campo) for campo in campos}
+
+                if actual == esperado:
+                    continue
+
+                con_diferencias += 1
+                self.stdout.write(f'⚠️  Caja #{caja.id}:')
+                for campo in campos:
+                    if actual[campo] != esperado[campo]:
+                        self.stdout.write(
+                            f'   {campo}: guardado {actual[campo]} → real {esperado[campo]}'
+                        )
+
+                for campo, valor in esperado.items():
+                    setattr(caja, campo, valor)
+                por_corregir.append(caja)
+
+            if por_corregir and not solo_verificar:
+                with transaction.atomic():
+                    CajaRegistradora.objects.bulk_update(por_corregir, campos)
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'📋 Cajas revisadas: {revisadas}')
+
+        if not con_diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ Todos los totales coinciden con los movimientos'))
+        elif solo_verificar:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {con_diferencias} caja(s) con diferencias (no se corrigieron, modo --solo-verificar)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'🔧 {con_diferencias} caja(s) corregidas'))
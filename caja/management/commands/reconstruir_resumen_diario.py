@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from caja.models import CajaRegistradora, ResumenDiarioCaja
+from caja.resumen import reconstruir_resumen_diario
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen diario de caja (ResumenDiarioCaja) desde los movimientos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--caja',
+            type=int,
+            help='ID de una caja específica (por defecto todas)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Cantidad de movimientos leídos por consulta (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        cajas = None
+
+        if options.get('caja'):
+            cajas = CajaRegistradora.objects.filter(id=options['caja'])
+            if not cajas.exists():
+                raise CommandError(f'❌ La caja #{options["caja"]} no existe')
+
+        self.stdout.write('📊 RECONSTRUCCIÓN DEL RESUMEN DIARIO DE CAJA')
+        self.stdout.write('=' * 60)
+
+        filas = reconstruir_resumen_diario(cajas, lote=max(options['lote'], 1))
+
+        self.stdout.write(f'📋 Filas de resumen creadas: {filas}')
+        self.stdout.write(f'📋 Total de filas en el resumen: {ResumenDiarioCaja.objects.count()}')
+        self.stdout.write(self.style.SUCCESS('✅ Resumen diario reconstruido'))
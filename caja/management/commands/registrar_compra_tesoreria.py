@@ -58,7 +58,7 @@ class Command(BaseCommand):
             raise CommandError(f'Usuario "{options["usuario"]}" no encontrado')
 
         # Obtener fecha de referencia (de la caja abierta si existe)
-        caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+        caja_abierta = CajaRegistradora.caja_abierta()
         if caja_abierta:
             fecha_referencia = caja_abierta.fecha_apertura.date()
             self.stdout.write(f'📅 Usando fecha de caja abierta: {fecha_referencia}')
@@ -161,9 +161,10 @@ class Command(BaseCommand):
                 transaccion.fecha = fecha_compra_tz
                 transaccion.save()
 
-                # Actualizar saldo de la cuenta origen (restar porque es egreso)
-                cuenta_origen.saldo_actual -= monto
-                cuenta_origen.save()
+                # Descontar del saldo de la cuenta origen solo si alcanza (UPDATE atómico)
+                if not Cuenta.descontar_saldo(cuenta_origen.id, monto):
+                    raise ValueError(f'Saldo insuficiente en {cuenta_origen.nombre}')
+                cuenta_origen.refresh_from_db(fields=['saldo_actual'])
 
                 self.stdout.write('\n✅ COMPRA REGISTRADA EXITOSAMENTE')
                 self.stdout.write(f'🏦 Transacción ID: {transaccion.id}')
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:25
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum, Count, Q
+
+
+def calcular_totales_existentes(apps, schema_editor):
+    """
+    Llena los totales acumulados de las cajas existentes
+    a partir de sus movimientos (una consulta agrupada).
+    """
+    CajaRegistradora = apps.get_model('caja', 'CajaRegistradora')
+    MovimientoCaja = apps.get_model('caja', 'MovimientoCaja')
+    
+    ingreso = Q(tipo='INGRESO')
+    banco = Q(descripcion__icontains='[BANCO]')
+    filas = MovimientoCaja.objects.order_by().values('caja_id').annotate(
+        ingresos_efectivo=Sum('monto', filter=ingreso & ~banco),
+        ingresos_banco=Sum('monto', filter=ingreso & banco),
+        apertura=Sum('monto', filter=ingreso & ~banco & Q(tipo_movimiento__codigo='APERTURA')),
+        egresos=Sum('monto', filter=Q(tipo='EGRESO')),
+        cantidad=Count('id'),
+    )
+    
+    for fila in filas:
+        CajaRegistradora.objects.filter(pk=fila['caja_id']).update(
+            total_ingresos_efectivo=fila['ingresos_efectivo'] or Decimal('0.00'),
+            total_ingresos_banco=fila['ingresos_banco'] or Decimal('0.00'),
+            total_apertura=fila['apertura'] or Decimal('0.00'),
+            total_egresos=fila['egresos'] or Decimal('0.00'),
+            num_movimientos=fila['cantidad'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0010_add_transaccion_asociada_to_movimientocaja'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cajaregistradora',
+            name='num_movimientos',
+            field=models.IntegerField(default=0, verbose_name='Número de movimientos'),
+        ),
+        migrations.AddField(
+            model_name='cajaregistradora',
+            name='total_apertura',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total apertura'),
+        ),
+        migrations.AddField(
+            model_name='cajaregistradora',
+            name='total_egresos',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total egresos'),
+        ),
+        migrations.AddField(
+            model_name='cajaregistradora',
+            name='total_ingresos_banco',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total entradas al banco'),
+        ),
+        migrations.AddField(
+            model_name='cajaregistradora',
+            name='total_ingresos_efectivo',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Incluye la apertura, excluye entradas al banco', max_digits=14, verbose_name='Total ingresos en efectivo'),
+        ),
+        migrations.RunPython(calcular_totales_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def llenar_canal_desde_descripcion(apps, schema_editor):
+    """
+    Marca como canal BANCO los movimientos que tenían la etiqueta
+    [BANCO] en la descripción (un solo UPDATE).
+    """
+    MovimientoCaja = apps.get_model('caja', 'MovimientoCaja')
+    MovimientoCaja.objects.filter(
+        descripcion__icontains='[BANCO]'
+    ).update(canal='BANCO')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0011_cajaregistradora_totales_acumulados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimientocaja',
+            name='canal',
+            field=models.CharField(choices=[('EFECTIVO', 'Efectivo'), ('BANCO', 'Banco')], default='EFECTIVO', help_text='Efectivo (dinero físico en caja) o Banco (entrada directa al banco)', max_length=10, verbose_name='Canal'),
+        ),
+        migrations.RunPython(llenar_canal_desde_descripcion, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['caja', 'tipo', 'canal'], name='caja_mov_caja_tipo_canal_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0012_movimientocaja_canal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cajaregistradora',
+            index=models.Index(fields=['estado', 'fecha_cierre'], name='caja_caja_estado_cierre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cajaregistradora',
+            index=models.Index(fields=['fecha_apertura'], name='caja_caja_fecha_apert_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['caja', 'fecha_movimiento'], name='caja_mov_caja_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['fecha_movimiento', 'tipo'], name='caja_mov_fecha_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['canal', 'tipo'], name='caja_mov_canal_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacciongeneral',
+            index=models.Index(fields=['cuenta', 'tipo', 'fecha'], name='caja_trx_cuenta_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacciongeneral',
+            index=models.Index(fields=['fecha'], name='caja_trx_fecha_idx'),
+        ),
+    ]
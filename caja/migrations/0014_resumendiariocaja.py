@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:30
+
+import django.db.models.deletion
+from decimal import Decimal
+from collections import defaultdict
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def construir_resumen_historico(apps, schema_editor):
+    """
+    Llena el resumen diario con los movimientos existentes
+    (mismo cálculo que el comando reconstruir_resumen_diario).
+    """
+    MovimientoCaja = apps.get_model('caja', 'MovimientoCaja')
+    ResumenDiarioCaja = apps.get_model('caja', 'ResumenDiarioCaja')
+    
+    agrupado = defaultdict(lambda: [Decimal('0.00'), 0])
+    filas = MovimientoCaja.objects.order_by().values_list(
+        'caja_id', 'tipo_movimiento_id', 'tipo', 'canal', 'fecha_movimiento', 'monto'
+    )
+    for caja_id, tipo_movimiento_id, tipo, canal, fecha_movimiento, monto in filas.iterator(chunk_size=2000):
+        clave = (timezone.localdate(fecha_movimiento), caja_id, tipo_movimiento_id, tipo, canal)
+        agrupado[clave][0] += monto
+        agrupado[clave][1] += 1
+    
+    ResumenDiarioCaja.objects.bulk_create([
+        ResumenDiarioCaja(
+            fecha=fecha,
+            caja_id=caja_id,
+            tipo_movimiento_id=tipo_movimiento_id,
+            tipo=tipo,
+            canal=canal,
+            total=total,
+            cantidad=cantidad,
+        )
+        for (fecha, caja_id, tipo_movimiento_id, tipo, canal), (total, cantidad) in agrupado.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0013_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioCaja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(help_text='Día local (America/Bogota) de los movimientos', verbose_name='Fecha')),
+                ('tipo', models.CharField(choices=[('INGRESO', 'Ingreso'), ('EGRESO', 'Egreso')], max_length=10, verbose_name='Tipo')),
+                ('canal', models.CharField(choices=[('EFECTIVO', 'Efectivo'), ('BANCO', 'Banco')], default='EFECTIVO', max_length=10, verbose_name='Canal')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad de movimientos')),
+                ('caja', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='caja.cajaregistradora', verbose_name='Caja')),
+                ('tipo_movimiento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='caja.tipomovimiento', verbose_name='Tipo de movimiento')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Caja',
+                'verbose_name_plural': 'Resúmenes Diarios de Caja',
+                'ordering': ['fecha'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'caja', 'tipo_movimiento', 'tipo', 'canal'), name='caja_resumen_diario_unico')],
+            },
+        ),
+        migrations.RunPython(construir_resumen_historico, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+def marcar_caja_abierta(apps, schema_editor):
+    """
+    Marca la caja abierta más reciente. Si por la condición de carrera ya
+    existían varias abiertas, las demás quedan sin turno hasta cerrarlas
+    (cerrar_cajas_abiertas.py).
+    """
+    CajaRegistradora = apps.get_model('caja', 'CajaRegistradora')
+    caja_id = CajaRegistradora.objects.filter(
+        estado='ABIERTA'
+    ).order_by('-fecha_apertura').values_list('id', flat=True).first()
+    if caja_id:
+        CajaRegistradora.objects.filter(id=caja_id).update(turno_abierto=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0014_resumendiariocaja'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cajaregistradora',
+            name='turno_abierto',
+            field=models.BooleanField(editable=False, null=True, unique=True, verbose_name='Turno abierto'),
+        ),
+        migrations.RunPython(marcar_caja_abierta, migrations.RunPython.noop),
+    ]
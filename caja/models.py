@@ -2,8 +2,9 @@
 Modelos para el sistema de caja registradora.
 Renzzo Eléctricos - Villavicencio, Meta
 """
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.db.models.signals import post_save, post_delete
@@ -49,6 +50,16 @@ class CajaRegistradora(models.Model):
         verbose_name=_('Estado')
     )
     
+    # True solo en la caja abierta, NULL en las cerradas. El índice único
+    # impide que existan dos cajas abiertas (NULL no cuenta como repetido)
+    # y permite encontrar la caja abierta sin recorrer la tabla.
+    turno_abierto = models.BooleanField(
+        null=True,
+        unique=True,
+        editable=False,
+        verbose_name=_('Turno abierto')
+    )
+    
     # Montos de apertura
     monto_inicial = models.DecimalField(
         max_digits=12,
@@ -120,15 +131,88 @@ class CajaRegistradora(models.Model):
         verbose_name=_('Observaciones de cierre')
     )
     
+    # Totales acumulados de movimientos (se actualizan con F() desde las señales
+    # de MovimientoCaja; NO editar a mano, usar el comando recalcular_totales)
+    total_ingresos_efectivo = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Total ingresos en efectivo'),
+        help_text=_('Incluye la apertura, excluye entradas al banco')
+    )
+    
+    total_ingresos_banco = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Total entradas al banco')
+    )
+    
+    total_apertura = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Total apertura')
+    )
+    
+    total_egresos = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Total egresos')
+    )
+    
+    num_movimientos = models.IntegerField(
+        default=0,
+        verbose_name=_('Número de movimientos')
+    )
+    
+    # Campos mantenidos por las señales (un save() normal no los sobrescribe)
+    CAMPOS_TOTALES = (
+        'total_ingresos_efectivo', 'total_ingresos_banco',
+        'total_apertura', 'total_egresos', 'num_movimientos',
+    )
+    
     class Meta:
         verbose_name = _('Caja Registradora')
         verbose_name_plural = _('Cajas Registradoras')
         ordering = ['-fecha_apertura']
+        indexes = [
+            # Caja abierta / última caja cerrada / historial de arqueos por fecha de cierre
+            models.Index(fields=['estado', 'fecha_cierre'], name='caja_caja_estado_cierre_idx'),
+            # Orden por defecto del listado y filtros por fecha de apertura
+            models.Index(fields=['fecha_apertura'], name='caja_caja_fecha_apert_idx'),
+        ]
     
     def __str__(self):
         fecha_str = self.fecha_apertura.strftime('%d/%m/%Y %H:%M')
         return f"Caja {self.cajero.username} - {fecha_str} ({self.get_estado_display()})"
     
+    def save(self, *args, **kwargs):
+        """
+        Los totales acumulados se actualizan con F() desde las señales, así que
+        una instancia en memoria puede tenerlos desactualizados: al actualizar
+        la caja NO se escriben, salvo que se pidan en update_fields.
+        turno_abierto se deriva siempre de estado.
+        """
+        self.turno_abierto = True if self.estado == self.EstadoChoices.ABIERTA else None
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.CAMPOS_TOTALES
+            ]
+        elif kwargs.get('update_fields') is not None and 'estado' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'turno_abierto'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def caja_abierta(cls):
+        """La caja abierta del sistema o None (búsqueda por el índice único de turno_abierto)."""
+        try:
+            return cls.objects.get(turno_abierto=True)
+        except cls.DoesNotExist:
+            return None
+    
     @property
     def duracion_abierta(self):
         """Calcula cuánto tiempo ha estado abierta la caja."""
@@ -138,6 +222,11 @@ class CajaRegistradora(models.Model):
             from django.utils import timezone
             return timezone.now() - self.fecha_apertura
     
+    def calcular_totales(self):
+        """Devuelve los totales de movimientos de la caja (ver caja.totales)."""
+        from .totales import calcular_totales_caja
+        return calcular_totales_caja(self)
+    
     def calcular_monto_sistema(self):
         """
         Calcula el monto que debería haber EN EFECTIVO según los movimientos.
@@ -145,27 +234,24 @@ class CajaRegistradora(models.Model):
         - Movimiento de apertura (dinero inicial en caja)
         - Ingresos en efectivo (excluir banco)
         EXCLUYE:
-        - Entradas al banco (tienen [BANCO] en descripción)
+        - Entradas al banco (canal BANCO)
         """
-        # Ingresos en efectivo (incluir apertura, excluir banco)
-        total_ingresos = self.movimientos.filter(
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='[BANCO]'
-        ).aggregate(
-            total=models.Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Todos los egresos (siempre salen de caja)
-        total_egresos = self.movimientos.filter(
-            tipo='EGRESO'
-        ).aggregate(
-            total=models.Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Ahora el cálculo es: total_ingresos - total_egresos
-        # (porque total_ingresos ya incluye la apertura)
-        return total_ingresos - total_egresos
+        # Releer los totales acumulados por si la instancia quedó desactualizada
+        self.refresh_from_db(fields=self.CAMPOS_TOTALES)
+        # total_ingresos efectivo ya incluye la apertura
+        return self.calcular_totales().dinero_en_caja
+    
+    def recalcular_totales(self):
+        """
+        Recalcula los totales acumulados desde los movimientos y los guarda.
+        Se usa para reparar desajustes (comando recalcular_totales).
+        """
+        from .totales import agregar_totales_caja
+        campos = agregar_totales_caja(self).como_campos_caja()
+        CajaRegistradora.objects.filter(pk=self.pk).update(**campos)
+        for campo, valor in campos.items():
+            setattr(self, campo, valor)
+        return campos
     
     def cerrar_caja(self, monto_final_declarado, observaciones_cierre=''):
         """Cierra la caja calculando diferencias."""
@@ -256,6 +342,10 @@ class MovimientoCaja(models.Model):
         INGRESO = 'INGRESO', _('Ingreso')
         EGRESO = 'EGRESO', _('Egreso')
     
+    class CanalChoices(models.TextChoices):
+        EFECTIVO = 'EFECTIVO', _('Efectivo')
+        BANCO = 'BANCO', _('Banco')
+    
     # Relaciones
     caja = models.ForeignKey(
         CajaRegistradora,
@@ -283,6 +373,14 @@ class MovimientoCaja(models.Model):
         verbose_name=_('Tipo')
     )
     
+    canal = models.CharField(
+        max_length=10,
+        choices=CanalChoices.choices,
+        default=CanalChoices.EFECTIVO,
+        verbose_name=_('Canal'),
+        help_text=_('Efectivo (dinero físico en caja) o Banco (entrada directa al banco)')
+    )
+    
     monto = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -323,10 +421,51 @@ class MovimientoCaja(models.Model):
         verbose_name = _('Movimiento de Caja')
         verbose_name_plural = _('Movimientos de Caja')
         ordering = ['-fecha_movimiento']
+        indexes = [
+            # Totales por caja (ingresos/egresos, efectivo/banco)
+            models.Index(fields=['caja', 'tipo', 'canal'], name='caja_mov_caja_tipo_canal_idx'),
+            # Últimos movimientos de una caja
+            models.Index(fields=['caja', 'fecha_movimiento'], name='caja_mov_caja_fecha_idx'),
+            # Informes y estadísticas por rango de fechas
+            models.Index(fields=['fecha_movimiento', 'tipo'], name='caja_mov_fecha_tipo_idx'),
+            # Total de entradas al banco de todas las cajas
+            models.Index(fields=['canal', 'tipo'], name='caja_mov_canal_tipo_idx'),
+        ]
     
     def __str__(self):
         signo = '+' if self.tipo == 'INGRESO' else '-'
         return f"{signo}${self.monto:,.2f} - {self.tipo_movimiento.nombre}"
+    
+    @property
+    def es_banco(self):
+        """True si el movimiento es una entrada directa al banco."""
+        return self.canal == self.CanalChoices.BANCO
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordar lo que aporta a los totales de su caja para poder
+        # ajustarlos si el movimiento se modifica o se elimina
+        instance._aporte_original = instance.aporte_totales()
+        return instance
+    
+    def aporte_totales(self):
+        """
+        Lo que este movimiento suma a los totales acumulados de su caja y
+        al resumen diario: (caja_id, tipo, canal, tipo_movimiento_id, monto, fecha).
+        Devuelve None si algún campo no está cargado (only()/defer()).
+        """
+        campos = {'caja_id', 'tipo', 'canal', 'tipo_movimiento_id', 'monto', 'fecha_movimiento'}
+        if self.get_deferred_fields() & campos:
+            return None
+        return (
+            self.caja_id,
+            self.tipo,
+            self.canal,
+            self.tipo_movimiento_id,
+            Decimal(str(self.monto)),
+            timezone.localdate(self.fecha_movimiento) if self.fecha_movimiento else None,
+        )
 
 
 class DenominacionMoneda(models.Model):
@@ -562,18 +701,46 @@ class Cuenta(models.Model):
         """Verifica si la cuenta tiene fondos suficientes."""
         return self.saldo_actual >= monto
     
+    # Cambios de saldo: un solo UPDATE atómico, sin save() ni full_clean()
+    # (la validación de save() consulta las demás cuentas activas)
+    
+    @classmethod
+    def sumar_saldo(cls, cuenta_id, monto):
+        """
+        saldo_actual += monto (monto negativo resta sin validar fondos).
+        Devuelve True si la cuenta existe.
+        """
+        return cls.objects.filter(pk=cuenta_id).update(
+            saldo_actual=models.F('saldo_actual') + Decimal(str(monto))
+        ) == 1
+    
+    @classmethod
+    def descontar_saldo(cls, cuenta_id, monto):
+        """
+        saldo_actual -= monto solo si alcanza:
+        UPDATE ... SET saldo_actual = saldo_actual - monto WHERE saldo_actual >= monto.
+        Devuelve False si no hay fondos suficientes (o la cuenta no existe).
+        """
+        monto = Decimal(str(monto))
+        return cls.objects.filter(pk=cuenta_id, saldo_actual__gte=monto).update(
+            saldo_actual=models.F('saldo_actual') - monto
+        ) == 1
+    
+    @classmethod
+    def fijar_saldo(cls, cuenta_id, saldo):
+        """Reemplaza saldo_actual (ajustes de balance). Devuelve True si la cuenta existe."""
+        return cls.objects.filter(pk=cuenta_id).update(saldo_actual=Decimal(str(saldo))) == 1
+    
     def agregar_fondos(self, monto):
         """Agrega fondos a la cuenta."""
-        self.saldo_actual += Decimal(str(monto))
-        self.save()
+        Cuenta.sumar_saldo(self.pk, monto)
+        self.refresh_from_db(fields=['saldo_actual'])
     
     def retirar_fondos(self, monto):
-        """Retira fondos de la cuenta (con validación)."""
-        monto_decimal = Decimal(str(monto))
-        if not self.tiene_fondos_suficientes(monto_decimal):
+        """Retira fondos de la cuenta (con validación atómica)."""
+        if not Cuenta.descontar_saldo(self.pk, monto):
             raise ValueError(f'Fondos insuficientes en {self.nombre}')
-        self.saldo_actual -= monto_decimal
-        self.save()
+        self.refresh_from_db(fields=['saldo_actual'])
     
     @classmethod
     def get_cuenta_caja_virtual(cls):
@@ -673,27 +840,218 @@ class TransaccionGeneral(models.Model):
         verbose_name = _('Transacción General')
         verbose_name_plural = _('Transacciones Generales')
         ordering = ['-fecha']
+        indexes = [
+            # Saldos por cuenta (ingresos/egresos) y movimientos de una cuenta por fecha
+            models.Index(fields=['cuenta', 'tipo', 'fecha'], name='caja_trx_cuenta_tipo_fecha_idx'),
+            # Listados ordenados por fecha y filtros por rango
+            models.Index(fields=['fecha'], name='caja_trx_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.tipo_movimiento.nombre} - ${self.monto:,.2f}"
 
 
+class ResumenDiarioCaja(models.Model):
+    """
+    Totales diarios de los movimientos de caja por tipo de movimiento,
+    dirección (ingreso/egreso) y canal. Se actualiza con cada movimiento
+    y lo usan los informes por rango de fechas en lugar de recorrer
+    MovimientoCaja (comando reconstruir_resumen_diario para el histórico).
+    """
+    fecha = models.DateField(
+        verbose_name=_('Fecha'),
+        help_text=_('Día local (America/Bogota) de los movimientos')
+    )
+    
+    caja = models.ForeignKey(
+        CajaRegistradora,
+        on_delete=models.CASCADE,
+        related_name='resumenes_diarios',
+        verbose_name=_('Caja')
+    )
+    
+    tipo_movimiento = models.ForeignKey(
+        TipoMovimiento,
+        on_delete=models.CASCADE,
+        verbose_name=_('Tipo de movimiento')
+    )
+    
+    tipo = models.CharField(
+        max_length=10,
+        choices=MovimientoCaja.TipoChoices.choices,
+        verbose_name=_('Tipo')
+    )
+    
+    canal = models.CharField(
+        max_length=10,
+        choices=MovimientoCaja.CanalChoices.choices,
+        default=MovimientoCaja.CanalChoices.EFECTIVO,
+        verbose_name=_('Canal')
+    )
+    
+    total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Total')
+    )
+    
+    cantidad = models.IntegerField(
+        default=0,
+        verbose_name=_('Cantidad de movimientos')
+    )
+    
+    class Meta:
+        verbose_name = _('Resumen Diario de Caja')
+        verbose_name_plural = _('Resúmenes Diarios de Caja')
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'caja', 'tipo_movimiento', 'tipo', 'canal'],
+                name='caja_resumen_diario_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.fecha} - {self.get_tipo_display()} ({self.get_canal_display()}) - ${self.total:,.2f}"
+
+
 # ============================================================================
 # SEÑALES PARA SINCRONIZACIÓN AUTOMÁTICA
 # ============================================================================
 
+def _aplicar_aporte_totales(aporte, signo, tipo_movimiento=None):
+    """
+    Suma (signo=1) o resta (signo=-1) el aporte de un movimiento a los
+    totales acumulados de su caja con un único UPDATE atómico (F()).
+    """
+    caja_id, tipo, canal, tipo_movimiento_id, monto, _fecha = aporte
+    monto = monto * signo
+    cambios = {'num_movimientos': models.F('num_movimientos') + signo}
+    
+    if tipo == 'EGRESO':
+        cambios['total_egresos'] = models.F('total_egresos') + monto
+    elif canal == MovimientoCaja.CanalChoices.BANCO:
+        cambios['total_ingresos_banco'] = models.F('total_ingresos_banco') + monto
+    else:
+        cambios['total_ingresos_efectivo'] = models.F('total_ingresos_efectivo') + monto
+        
+        # Evitar la consulta si el tipo de movimiento ya está en memoria
+        if tipo_movimiento is None or tipo_movimiento.pk != tipo_movimiento_id:
+            from .referencia import ReferenciaCaja
+            tipo_movimiento = ReferenciaCaja.tipo_movimiento(id=tipo_movimiento_id)
+        codigo = tipo_movimiento.codigo if tipo_movimiento else None
+        if codigo == 'APERTURA':
+            cambios['total_apertura'] = models.F('total_apertura') + monto
+    
+    CajaRegistradora.objects.filter(pk=caja_id).update(**cambios)
+
+
+def _aplicar_aporte_resumen(aporte, signo):
+    """
+    Suma (signo=1) o resta (signo=-1) el aporte de un movimiento a la fila
+    de ResumenDiarioCaja de su día. Crea la fila si todavía no existe.
+    """
+    caja_id, tipo, canal, tipo_movimiento_id, monto, fecha = aporte
+    if fecha is None:
+        return
+    
+    clave = {
+        'fecha': fecha,
+        'caja_id': caja_id,
+        'tipo_movimiento_id': tipo_movimiento_id,
+        'tipo': tipo,
+        'canal': canal,
+    }
+    cambios = {
+        'total': models.F('total') + monto * signo,
+        'cantidad': models.F('cantidad') + signo,
+    }
+    
+    if ResumenDiarioCaja.objects.filter(**clave).update(**cambios) or signo < 0:
+        return
+    
+    try:
+        # Savepoint: si otra petición creó la fila al mismo tiempo, sumar sobre ella
+        with transaction.atomic():
+            ResumenDiarioCaja.objects.create(total=monto, cantidad=1, **clave)
+    except IntegrityError:
+        ResumenDiarioCaja.objects.filter(**clave).update(**cambios)
+
+
+def _aplicar_aporte(aporte, signo, tipo_movimiento=None):
+    _aplicar_aporte_totales(aporte, signo, tipo_movimiento)
+    _aplicar_aporte_resumen(aporte, signo)
+
+
+def _recalcular_caja(caja_id):
+    """Recalcula totales y resumen diario de una caja desde sus movimientos."""
+    from .resumen import reconstruir_resumen_diario
+    CajaRegistradora(pk=caja_id).recalcular_totales()
+    reconstruir_resumen_diario(CajaRegistradora.objects.filter(pk=caja_id))
+
+
+def _tipo_movimiento_en_memoria(movimiento):
+    if MovimientoCaja.tipo_movimiento.is_cached(movimiento):
+        return movimiento.tipo_movimiento
+    return None
+
+
+# NOTA: la transacción de tesorería de cada movimiento se crea en
+# caja/movimientos.py (registrar_movimiento), no en una señal.
+@receiver(post_save, sender='caja.MovimientoCaja')
+def actualizar_totales_caja_al_guardar(sender, instance, created, raw=False, **kwargs):
+    """
+    Mantiene los totales acumulados de la caja y el resumen diario
+    al crear o modificar un movimiento.
+    """
+    if raw:
+        return
+    
+    aporte = instance.aporte_totales()
+    original = getattr(instance, '_aporte_original', None)
+    
+    if created:
+        _aplicar_aporte(aporte, 1, _tipo_movimiento_en_memoria(instance))
+    elif aporte != original:
+        if aporte is None or original is None:
+            # No se sabe qué aportaba antes: recalcular la caja desde cero
+            _recalcular_caja(instance.caja_id)
+        else:
+            _aplicar_aporte(original, -1)
+            _aplicar_aporte(aporte, 1, _tipo_movimiento_en_memoria(instance))
+    
+    instance._aporte_original = aporte
+
+
+@receiver(post_delete, sender='caja.MovimientoCaja')
+def actualizar_totales_caja_al_eliminar(sender, instance, **kwargs):
+    """
+    Descuenta el movimiento eliminado de los totales acumulados de su caja
+    y del resumen diario.
+    """
+    aporte = getattr(instance, '_aporte_original', None) or instance.aporte_totales()
+    if aporte is None:
+        _recalcular_caja(instance.caja_id)
+    else:
+        _aplicar_aporte(aporte, -1, _tipo_movimiento_en_memoria(instance))
+
+
 @receiver(post_save, sender='caja.CajaRegistradora')
 def crear_transaccion_apertura_caja(sender, instance, created, **kwargs):
     """
     Cuando se abre una caja, crear:
     1. Movimiento de apertura en la caja 
     2. Transacción en tesorería (Origen: caja, Tipo: apertura caja)
+    
+    Con instance._sin_movimiento_apertura = True no se crea el movimiento:
+    quien crea la caja lo registra (abrir_caja_fecha, con otra fecha).
     """
-    if created and instance.estado == 'ABIERTA':
-        # 1. Crear movimiento de apertura en la caja
-        tipo_apertura, _ = TipoMovimiento.objects.get_or_create(
-            codigo='APERTURA',
-            defaults={
+    if created and instance.estado == 'ABIERTA' and not getattr(instance, '_sin_movimiento_apertura', False):
+        from .referencia import ReferenciaCaja
+        tipo_apertura = ReferenciaCaja.tipo_movimiento_sistema(
+            'APERTURA',
+            {
                 'nombre': 'Apertura de Caja',
                 'descripcion': 'Dinero inicial al abrir la caja',
                 'tipo_base': TipoMovimiento.TipoBaseChoices.INTERNO,
@@ -701,95 +1059,18 @@ def crear_transaccion_apertura_caja(sender, instance, created, **kwargs):
             }
         )
         
-        movimiento_apertura = MovimientoCaja.objects.create(
+        # Movimiento de apertura y su transacción en la cuenta Caja Virtual
+        from .movimientos import registrar_movimiento
+        registrar_movimiento(
             caja=instance,
             tipo_movimiento=tipo_apertura,
             tipo='INGRESO',
             monto=instance.monto_inicial,
+            usuario=instance.cajero,
             descripcion=f'Apertura de caja - Monto inicial: ${instance.monto_inicial:,.2f}',
-            usuario=instance.cajero
-        )
-        
-        # 2. Crear transacción en tesorería
-        # Primero obtener o crear cuenta "Caja" virtual para tracking
-        cuenta_caja_virtual, _ = Cuenta.objects.get_or_create(
-            nombre='Caja Virtual',
-            defaults={
-                'tipo': 'RESERVA',  # Usar RESERVA como tipo base
-                'saldo_actual': Decimal('0.00'),
-                'activo': False  # No mostrar en listados normales
-            }
-        )
-        
-        transaccion = TransaccionGeneral.objects.create(
-            tipo='INGRESO',
-            monto=instance.monto_inicial,
-            descripcion=f'Apertura caja - Cajero: {instance.cajero.username}',
-            referencia=f'APERTURA-CAJA-{instance.id}',
-            tipo_movimiento=tipo_apertura,
-            cuenta=cuenta_caja_virtual,
-            usuario=instance.cajero
+            descripcion_tesoreria=f'Apertura caja - Cajero: {instance.cajero.username}',
+            referencia_tesoreria=f'APERTURA-CAJA-{instance.id}',
         )
-        
-        # Vincular movimiento y transacción
-        movimiento_apertura.transaccion_asociada = transaccion
-        movimiento_apertura.save()
-
-
-@receiver(post_save, sender='caja.MovimientoCaja')
-def crear_transaccion_tesoreria_desde_movimiento(sender, instance, created, **kwargs):
-    """
-    Cuando se crea un movimiento en caja (que no sea apertura), crear la transacción
-    correspondiente en tesorería con origen caja y tipo entrada:categoría o salida:categoría
-    """
-    if created and instance.tipo_movimiento.codigo != 'APERTURA':
-        # Obtener cuenta destino según el tipo de movimiento
-        if '[BANCO]' in instance.descripcion:
-            # Es una entrada al banco
-            cuenta_destino = Cuenta.objects.filter(tipo='BANCO', activo=True).first()
-            tipo_origen = 'banco'
-            descripcion_base = f'Entrada:{instance.tipo_movimiento.nombre}'
-        else:
-            # Es un movimiento de caja normal
-            cuenta_caja_virtual, _ = Cuenta.objects.get_or_create(
-                nombre='Caja Virtual',
-                defaults={
-                    'tipo': 'RESERVA',
-                    'saldo_actual': Decimal('0.00'),
-                    'activo': False
-                }
-            )
-            cuenta_destino = cuenta_caja_virtual
-            tipo_origen = 'caja'
-            
-            if instance.tipo == 'INGRESO':
-                descripcion_base = f'Entrada:{instance.tipo_movimiento.nombre}'
-            else:
-                descripcion_base = f'Salida:{instance.tipo_movimiento.nombre}'
-        
-        if cuenta_destino:
-            # Crear transacción en tesorería
-            transaccion = TransaccionGeneral.objects.create(
-                tipo=instance.tipo,  # INGRESO o EGRESO
-                monto=instance.monto,
-                descripcion=f'Origen {tipo_origen} - {descripcion_base} - {instance.descripcion}',
-                referencia=instance.referencia or f'MOV-{instance.id}',
-                tipo_movimiento=instance.tipo_movimiento,
-                cuenta=cuenta_destino,
-                usuario=instance.usuario
-            )
-            
-            # Vincular movimiento y transacción
-            instance.transaccion_asociada = transaccion
-            instance.save(update_fields=['transaccion_asociada'])
-            
-            # Actualizar saldo de cuenta si es banco
-            if cuenta_destino.tipo == 'BANCO':
-                if instance.tipo == 'INGRESO':
-                    cuenta_destino.saldo_actual += instance.monto
-                else:
-                    cuenta_destino.saldo_actual -= instance.monto
-                cuenta_destino.save(update_fields=['saldo_actual'])
 
 
 @receiver(post_delete, sender='caja.MovimientoCaja')
@@ -799,16 +1080,30 @@ def eliminar_transaccion_tesoreria_asociada(sender, instance, **kwargs):
     y ajustar el saldo de la cuenta si es necesario
     """
     if instance.transaccion_asociada:
-        # Si hay cuenta banco asociada, ajustar saldo
-        if (instance.transaccion_asociada.cuenta and 
-            instance.transaccion_asociada.cuenta.tipo == 'BANCO'):
-            
-            cuenta = instance.transaccion_asociada.cuenta
-            if instance.tipo == 'INGRESO':
-                cuenta.saldo_actual -= instance.monto
-            else:
-                cuenta.saldo_actual += instance.monto
-            cuenta.save(update_fields=['saldo_actual'])
+        # Movimiento al banco: revertir el ajuste que hizo registrar_movimiento (un UPDATE)
+        if instance.canal == MovimientoCaja.CanalChoices.BANCO:
+            ajuste = -instance.monto if instance.tipo == 'INGRESO' else instance.monto
+            Cuenta.sumar_saldo(instance.transaccion_asociada.cuenta_id, ajuste)
         
         # Eliminar transacción asociada
         instance.transaccion_asociada.delete()
+
+
+@receiver(post_save, sender='caja.DenominacionMoneda')
+@receiver(post_delete, sender='caja.DenominacionMoneda')
+@receiver(post_save, sender='caja.TipoMovimiento')
+@receiver(post_delete, sender='caja.TipoMovimiento')
+def invalidar_referencia_caja(sender, **kwargs):
+    """
+    Los cambios en denominaciones o tipos de movimiento invalidan la copia
+    en memoria de cada worker (ver caja/referencia.py).
+    """
+    from .referencia import ReferenciaCaja
+    ReferenciaCaja.invalidar()
+
+
+@receiver(post_delete, sender='caja.Cuenta')
+def olvidar_cuenta_caja_virtual_al_eliminar(sender, **kwargs):
+    """El id de la cuenta Caja Virtual guardado en memoria deja de ser válido."""
+    from .movimientos import olvidar_cuenta_caja_virtual
+    olvidar_cuenta_caja_virtual()
@@ -0,0 +1,123 @@
+"""
+Registro de movimientos de caja con su transacción de tesorería.
+Renzzo Eléctricos - Villavicencio, Meta
+
+registrar_movimiento() es el único camino para crear un MovimientoCaja:
+en una sola transacción crea la TransaccionGeneral (en la cuenta Caja
+Virtual o, si el movimiento es al banco, en la cuenta banco), el movimiento
+ya enlazado a ella y ajusta el saldo del banco (Cuenta.sumar_saldo).
+
+El id de la cuenta Caja Virtual se guarda en memoria del proceso; se
+olvida si la cuenta se elimina (señal en caja/models.py).
+"""
+from django.db import transaction
+
+from .models import Cuenta, MovimientoCaja, TransaccionGeneral
+
+
+_cuenta_caja_virtual_id = None
+
+
+def cuenta_caja_virtual_id():
+    """Id de la cuenta Caja Virtual (la crea la primera vez)."""
+    global _cuenta_caja_virtual_id
+    if _cuenta_caja_virtual_id is None:
+        cuenta_id = Cuenta.get_cuenta_caja_virtual().id
+
+        def recordar():
+            # Solo después del commit: un rollback no deja un id inexistente
+            global _cuenta_caja_virtual_id
+            _cuenta_caja_virtual_id = cuenta_id
+
+        transaction.on_commit(recordar)
+        return cuenta_id
+    return _cuenta_caja_virtual_id
+
+
+def olvidar_cuenta_caja_virtual():
+    global _cuenta_caja_virtual_id
+    _cuenta_caja_virtual_id = None
+
+
+def registrar_movimiento(
+    caja,
+    tipo_movimiento,
+    tipo,
+    monto,
+    usuario,
+    descripcion='',
+    referencia='',
+    canal=MovimientoCaja.CanalChoices.EFECTIVO,
+    fecha=None,
+    descripcion_tesoreria=None,
+    referencia_tesoreria=None,
+):
+    """
+    Crea un MovimientoCaja y su TransaccionGeneral enlazada.
+
+    - canal BANCO: la transacción va a la cuenta banco activa y su
+      saldo_actual se ajusta; sin cuenta banco no se crea transacción.
+    - canal EFECTIVO: la transacción va a la cuenta Caja Virtual.
+    - fecha: para registrar movimientos con otra fecha (comandos).
+    - descripcion_tesoreria / referencia_tesoreria: reemplazan el texto
+      por defecto de la transacción ('Origen caja - Entrada:...', 'MOV-<id>').
+
+    Devuelve el movimiento con transaccion_asociada asignada.
+    """
+    es_banco = canal == MovimientoCaja.CanalChoices.BANCO
+
+    with transaction.atomic():
+        if es_banco:
+            cuenta_id = Cuenta.objects.filter(
+                tipo='BANCO', activo=True
+            ).values_list('id', flat=True).first()
+            origen = 'banco'
+        else:
+            cuenta_id = cuenta_caja_virtual_id()
+            origen = 'caja'
+
+        transaccion = None
+        if cuenta_id:
+            etiqueta = 'Entrada' if tipo == 'INGRESO' else 'Salida'
+            transaccion = TransaccionGeneral.objects.create(
+                tipo=tipo,  # INGRESO o EGRESO
+                monto=monto,
+                descripcion=descripcion_tesoreria or (
+                    f'Origen {origen} - {etiqueta}:{tipo_movimiento.nombre} - {descripcion}'
+                ),
+                referencia=referencia_tesoreria or referencia,
+                tipo_movimiento=tipo_movimiento,
+                cuenta_id=cuenta_id,
+                usuario=usuario,
+            )
+
+        movimiento = MovimientoCaja.objects.create(
+            caja=caja,
+            tipo_movimiento=tipo_movimiento,
+            tipo=tipo,
+            monto=monto,
+            descripcion=descripcion,
+            referencia=referencia,
+            canal=canal,
+            usuario=usuario,
+            transaccion_asociada=transaccion,
+        )
+
+        if transaccion is not None:
+            cambios = {}
+            if not transaccion.referencia:
+                cambios['referencia'] = transaccion.referencia = f'MOV-{movimiento.id}'
+            if fecha is not None:
+                cambios['fecha'] = transaccion.fecha = fecha
+            if cambios:
+                TransaccionGeneral.objects.filter(pk=transaccion.pk).update(**cambios)
+
+            if es_banco:
+                Cuenta.sumar_saldo(cuenta_id, monto if tipo == 'INGRESO' else -monto)
+
+        if fecha is not None:
+            # save() para que los totales y el resumen diario pasen a la nueva fecha
+            movimiento.fecha_movimiento = fecha
+            movimiento.save(update_fields=['fecha_movimiento'])
+
+    return movimiento
@@ -0,0 +1,136 @@
+"""
+Datos de referencia de caja en memoria (denominaciones y tipos de movimiento).
+Renzzo Eléctricos - Villavicencio, Meta
+
+DenominacionMoneda y TipoMovimiento casi nunca cambian, pero se consultan en
+casi todas las peticiones de caja y en las señales de movimientos. Cada
+proceso (worker de gunicorn) guarda una copia completa de ambas tablas y la
+sirve desde memoria por id o por código.
+
+La copia lleva una versión guardada en el cache de Django; las señales
+post_save/post_delete de ambos modelos la cambian. Cada proceso compara su
+versión con la del cache como máximo cada SEGUNDOS_VERIFICACION segundos y
+recarga si cambió. Los cambios hechos en el mismo proceso se ven de inmediato.
+
+Con el cache por proceso (locmem, el de por defecto) la versión no se
+comparte entre workers, así que además cada copia se recarga siempre al
+cumplir EDAD_MAXIMA segundos: un cambio hecho en otro worker tarda como
+mucho ese tiempo en verse. Con un cache compartido (CACHE_URL de Redis)
+se ve en SEGUNDOS_VERIFICACION.
+
+Los objetos devueltos son compartidos entre peticiones: no modificarlos.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import DenominacionMoneda, TipoMovimiento
+
+
+class ReferenciaCaja:
+    """
+    - denominaciones_activas(): denominaciones activas de mayor a menor valor.
+    - denominaciones_por_id(ids): {id: DenominacionMoneda} (activas).
+    - tipo_movimiento(id=... | codigo=...): TipoMovimiento o None.
+    - tipo_movimiento_sistema(codigo, defaults): como get_or_create, pero
+      desde memoria cuando el tipo ya existe.
+    - invalidar(): llamada por las señales de ambos modelos.
+    """
+    CLAVE_VERSION = 'caja:referencia:version'
+    SEGUNDOS_VERIFICACION = 2
+    EDAD_MAXIMA = 60
+
+    _lock = threading.Lock()
+    _version = None
+    _verificado = 0.0
+    _cargado = 0.0
+    # True desde un cambio en este proceso hasta leer datos confirmados
+    _pendiente = False
+    _denominaciones = ()
+    _denominaciones_por_id = {}
+    _tipos_por_id = {}
+    _tipos_por_codigo = {}
+
+    @classmethod
+    def _version_compartida(cls):
+        version = cache.get(cls.CLAVE_VERSION)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(cls.CLAVE_VERSION, version, None):
+                version = cache.get(cls.CLAVE_VERSION, version)
+        return version
+
+    @classmethod
+    def _cargar(cls, version):
+        denominaciones = tuple(DenominacionMoneda.objects.order_by('-valor'))
+        tipos = list(TipoMovimiento.objects.all())
+        cls._denominaciones = tuple(d for d in denominaciones if d.activo)
+        cls._denominaciones_por_id = {d.id: d for d in cls._denominaciones}
+        cls._tipos_por_id = {t.id: t for t in tipos}
+        cls._tipos_por_codigo = {t.codigo: t for t in tipos}
+        cls._version = version
+        cls._cargado = time.monotonic()
+
+    @classmethod
+    def _vigente(cls):
+        """Recarga la copia del proceso si otra petición la invalidó o si ya venció."""
+        ahora = time.monotonic()
+        vencida = ahora - cls._cargado >= cls.EDAD_MAXIMA
+        if (not cls._pendiente and not vencida and cls._version is not None
+                and ahora - cls._verificado < cls.SEGUNDOS_VERIFICACION):
+            return
+
+        with cls._lock:
+            version = cls._version_compartida()
+            if cls._pendiente or vencida or version != cls._version:
+                cls._cargar(version)
+                # Fuera de una transacción los datos leídos ya están confirmados
+                if not connection.in_atomic_block:
+                    cls._pendiente = False
+            cls._verificado = ahora
+
+    @classmethod
+    def invalidar(cls):
+        """
+        Marca la copia del proceso como desactualizada y cambia la versión
+        del cache al confirmar la transacción (con un cache compartido los
+        demás workers recargan en la próxima verificación).
+        """
+        cls._pendiente = True
+
+        def publicar():
+            cache.set(cls.CLAVE_VERSION, uuid.uuid4().hex, None)
+            cls._version = None
+            cls._pendiente = False
+
+        transaction.on_commit(publicar)
+
+    @classmethod
+    def denominaciones_activas(cls):
+        cls._vigente()
+        return cls._denominaciones
+
+    @classmethod
+    def denominaciones_por_id(cls, ids=None):
+        cls._vigente()
+        if ids is None:
+            return dict(cls._denominaciones_por_id)
+        return {i: cls._denominaciones_por_id[i] for i in ids if i in cls._denominaciones_por_id}
+
+    @classmethod
+    def tipo_movimiento(cls, id=None, codigo=None):
+        cls._vigente()
+        if id is not None:
+            return cls._tipos_por_id.get(id)
+        return cls._tipos_por_codigo.get(codigo)
+
+    @classmethod
+    def tipo_movimiento_sistema(cls, codigo, defaults):
+        """Tipo de movimiento interno por código; lo crea si no existe."""
+        tipo = cls.tipo_movimiento(codigo=codigo)
+        if tipo is None:
+            tipo, _ = TipoMovimiento.objects.get_or_create(codigo=codigo, defaults=defaults)
+        return tipo
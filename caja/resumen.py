@@ -0,0 +1,186 @@
+"""
+Resumen diario de movimientos de caja (ResumenDiarioCaja).
+Renzzo Eléctricos - Villavicencio, Meta
+
+Los informes por rango de fechas leen los días completos del resumen
+(una fila por día/caja/tipo de movimiento/dirección/canal) y solo van a
+MovimientoCaja para las partes de día de los extremos del rango
+(ej: "última semana" empieza a la hora actual de hace 7 días).
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import MovimientoCaja, ResumenDiarioCaja
+
+
+CERO = Decimal('0.00')
+
+# Campos de la clave del resumen; existen con el mismo nombre en MovimientoCaja
+CAMPOS_CLAVE = ('caja_id', 'tipo_movimiento_id', 'tipo', 'canal')
+
+
+def inicio_dia(fecha):
+    """Datetime aware del inicio (00:00) de un día local."""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def fin_dia(fecha):
+    """Datetime aware del último instante de un día local."""
+    return timezone.make_aware(datetime.combine(fecha, time.max))
+
+
+def _dias_completos(fecha_inicio, fecha_fin):
+    """
+    Primer y último día local cubiertos completamente por el rango
+    [fecha_inicio, fecha_fin]. Si no hay días completos, primero > último.
+    """
+    inicio = timezone.localtime(fecha_inicio)
+    fin = timezone.localtime(fecha_fin)
+
+    primero = inicio.date()
+    if inicio.time() != time.min:
+        primero += timedelta(days=1)
+
+    ultimo = fin.date()
+    # Los rangos personalizados terminan en 23:59:59 (sin microsegundos)
+    if fin.time() < time(23, 59, 59):
+        ultimo -= timedelta(days=1)
+
+    return primero, ultimo
+
+
+def resumen_movimientos(fecha_inicio, fecha_fin, campos, *condiciones, **filtros):
+    """
+    Totales de movimientos entre fecha_inicio y fecha_fin (datetimes, inclusive)
+    agrupados por `campos`. Devuelve una lista de diccionarios con los campos
+    pedidos más 'total' y 'cantidad'.
+
+    `campos`, `condiciones` y `filtros` usan nombres válidos tanto en
+    ResumenDiarioCaja como en MovimientoCaja (tipo, canal, caja, tipo_movimiento,
+    tipo_movimiento__nombre, ...). El campo especial 'fecha' agrupa por día local.
+    """
+    campos = list(campos)
+    agrupado = defaultdict(lambda: {'total': CERO, 'cantidad': 0})
+
+    def acumular(clave, total, cantidad):
+        fila = agrupado[clave]
+        fila['total'] += total or CERO
+        fila['cantidad'] += cantidad or 0
+
+    primero, ultimo = _dias_completos(fecha_inicio, fecha_fin)
+
+    if primero <= ultimo:
+        # Días completos: leer el resumen (una consulta agrupada)
+        filas = ResumenDiarioCaja.objects.filter(
+            *condiciones,
+            fecha__gte=primero,
+            fecha__lte=ultimo,
+            **filtros
+        ).order_by().values(*campos).annotate(
+            suma_total=Sum('total'),
+            suma_cantidad=Sum('cantidad'),
+        )
+        for fila in filas:
+            acumular(tuple(fila[c] for c in campos), fila['suma_total'], fila['suma_cantidad'])
+
+        # Partes de día de los extremos: movimientos individuales
+        tramos = [
+            (fecha_inicio, inicio_dia(primero), False),
+            (inicio_dia(ultimo + timedelta(days=1)), fecha_fin, True),
+        ]
+    else:
+        tramos = [(fecha_inicio, fecha_fin, True)]
+
+    campos_movimiento = [c for c in campos if c != 'fecha']
+    for desde, hasta, incluir_hasta in tramos:
+        if desde > hasta or (desde == hasta and not incluir_hasta):
+            continue
+        rango = {'fecha_movimiento__gte': desde}
+        rango['fecha_movimiento__lte' if incluir_hasta else 'fecha_movimiento__lt'] = hasta
+        movimientos = MovimientoCaja.objects.filter(
+            *condiciones, **rango, **filtros
+        ).order_by().values(*campos_movimiento, 'fecha_movimiento', 'monto')
+        for mov in movimientos:
+            mov['fecha'] = timezone.localdate(mov['fecha_movimiento'])
+            acumular(tuple(mov[c] for c in campos), mov['monto'], 1)
+
+    return [
+        dict(zip(campos, clave), **valores)
+        for clave, valores in agrupado.items()
+    ]
+
+
+def reconstruir_resumen_diario(cajas=None, lote=2000):
+    """
+    Reconstruye ResumenDiarioCaja desde los movimientos de las cajas dadas
+    (queryset; por defecto todas). Devuelve la cantidad de filas creadas.
+
+    El día local se calcula en Python para no depender de las tablas de
+    zonas horarias de MySQL.
+    """
+    movimientos = MovimientoCaja.objects.order_by()
+    resumenes = ResumenDiarioCaja.objects.all()
+    if cajas is not None:
+        movimientos = movimientos.filter(caja__in=cajas)
+        resumenes = resumenes.filter(caja__in=cajas)
+
+    agrupado = defaultdict(lambda: [CERO, 0])
+    filas = movimientos.values_list(*CAMPOS_CLAVE, 'fecha_movimiento', 'monto')
+    for *clave, fecha_movimiento, monto in filas.iterator(chunk_size=lote):
+        acumulado = agrupado[(timezone.localdate(fecha_movimiento), *clave)]
+        acumulado[0] += monto
+        acumulado[1] += 1
+
+    nuevos = [
+        ResumenDiarioCaja(
+            fecha=fecha,
+            caja_id=caja_id,
+            tipo_movimiento_id=tipo_movimiento_id,
+            tipo=tipo,
+            canal=canal,
+            total=total,
+            cantidad=cantidad,
+        )
+        for (fecha, caja_id, tipo_movimiento_id, tipo, canal), (total, cantidad) in agrupado.items()
+    ]
+
+    with transaction.atomic():
+        resumenes.delete()
+        ResumenDiarioCaja.objects.bulk_create(nuevos, batch_size=lote)
+
+    return len(nuevos)
+
+
+def serie_diaria(fecha_inicio, fecha_fin, dias_por_consulta=92):
+    """
+    Genera (fecha, ingresos, egresos, cantidad) para cada día local entre
+    fecha_inicio y fecha_fin (dates, inclusive), con los días sin
+    movimientos en cero. Hace una consulta agrupada por cada tramo de
+    `dias_por_consulta` días, así que rangos largos se pueden recorrer
+    (ej: exportar CSV) sin cargar todo en memoria.
+    """
+    desde = fecha_inicio
+    while desde <= fecha_fin:
+        hasta = min(desde + timedelta(days=dias_por_consulta - 1), fecha_fin)
+
+        por_dia = defaultdict(lambda: {'INGRESO': CERO, 'EGRESO': CERO, 'cantidad': 0})
+        for fila in resumen_movimientos(inicio_dia(desde), fin_dia(hasta), ['fecha', 'tipo']):
+            dia = por_dia[fila['fecha']]
+            dia[fila['tipo']] += fila['total']
+            dia['cantidad'] += fila['cantidad']
+
+        fecha = desde
+        while fecha <= hasta:
+            dia = por_dia.get(fecha)
+            if dia:
+                yield fecha, dia['INGRESO'], dia['EGRESO'], dia['cantidad']
+            else:
+                yield fecha, CERO, CERO, 0
+            fecha += timedelta(days=1)
+
+        desde = hasta + timedelta(days=1)
@@ -0,0 +1,177 @@
+"""
+Cálculo de saldos de Tesorería (Caja, Banco y Dinero Guardado).
+Renzzo Eléctricos - Villavicencio, Meta
+
+SaldosService concentra las fórmulas de saldo que usan el dashboard de
+tesorería, el endpoint de saldos en tiempo real y las validaciones de fondos
+de egresos y transferencias. La foto de los tres saldos se calcula en
+cada petición con unas pocas consultas agregadas: no se guarda en cache
+porque el cache por defecto es de cada worker y mostraría saldos viejos en
+los demás.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+from django.db.models import Sum, Q
+
+from .models import CajaRegistradora, TransaccionGeneral, Cuenta
+from .totales import calcular_totales_caja
+
+
+CERO = Decimal('0.00')
+
+# Tipo de movimiento de las transacciones automáticas de cierre de caja
+CODIGO_CIERRE_CAJA = 'CIERRE_CAJA'
+
+
+@dataclass(frozen=True)
+class SaldosTesoreria:
+    """
+    Foto de los saldos de tesorería.
+    - caja: dinero físico en la caja abierta (o de la última caja cerrada)
+    - banco: entradas al banco - egresos de la cuenta banco
+    - reserva: dinero guardado de cajas cerradas + ajustes manuales de reserva
+    """
+    caja: Decimal = CERO
+    banco: Decimal = CERO
+    reserva: Decimal = CERO
+    banco_id: Optional[int] = None
+    reserva_id: Optional[int] = None
+
+    @property
+    def total(self):
+        return self.caja + self.banco + self.reserva
+
+
+def dinero_guardado_cajas():
+    """Total de dinero guardado de todas las cajas cerradas (una consulta)."""
+    return CajaRegistradora.objects.filter(
+        estado='CERRADA'
+    ).aggregate(total=Sum('dinero_guardado'))['total'] or CERO
+
+
+def neto_transacciones_cuenta(cuenta, excluir_cierres=False):
+    """
+    Ingresos - egresos de las transacciones de una cuenta en una sola
+    consulta (agregación condicional).
+    """
+    transacciones = TransaccionGeneral.objects.filter(cuenta=cuenta)
+    if excluir_cierres:
+        transacciones = transacciones.exclude(tipo_movimiento__codigo=CODIGO_CIERRE_CAJA)
+
+    totales = transacciones.aggregate(
+        ingresos=Sum('monto', filter=Q(tipo='INGRESO')),
+        egresos=Sum('monto', filter=Q(tipo='EGRESO')),
+    )
+    return (totales['ingresos'] or CERO) - (totales['egresos'] or CERO)
+
+
+def calcular_saldo_reserva(cuenta_reserva):
+    """
+    Saldo del dinero guardado = dinero guardado de las cajas cerradas
+    + movimientos manuales de la cuenta reserva.
+
+    Las transacciones automáticas de cierre NO se suman porque ya están
+    incluidas en dinero_guardado de cada caja (evitar duplicación).
+    """
+    saldo = dinero_guardado_cajas()
+    if cuenta_reserva:
+        saldo += neto_transacciones_cuenta(cuenta_reserva, excluir_cierres=True)
+    return saldo
+
+
+def calcular_saldo_banco(cuenta_banco):
+    """
+    Saldo banco = TODAS las entradas al banco de las cajas
+    (contadores acumulados) - egresos desde la cuenta banco.
+    """
+    entradas_banco = CajaRegistradora.objects.aggregate(
+        total=Sum('total_ingresos_banco')
+    )['total'] or CERO
+
+    egresos_banco = CERO
+    if cuenta_banco:
+        egresos_banco = TransaccionGeneral.objects.filter(
+            cuenta=cuenta_banco,
+            tipo='EGRESO'
+        ).aggregate(total=Sum('monto'))['total'] or CERO
+
+    return entradas_banco - egresos_banco
+
+
+class SaldosService:
+    """
+    Servicio único de saldos de tesorería.
+
+    - calcular(): foto de los tres saldos desde la base de datos (~5 consultas).
+    - saldo_cuenta(cuenta): saldo disponible de una cuenta (para validar
+      fondos dentro de una transacción).
+    """
+
+    @classmethod
+    def calcular(cls):
+        # Cuentas principales (misma elección que .first() con el orden de Cuenta)
+        banco_id = reserva_id = None
+        for cuenta_id, tipo in Cuenta.objects.filter(
+            activo=True, tipo__in=['BANCO', 'RESERVA']
+        ).values_list('id', 'tipo'):
+            if tipo == 'BANCO' and banco_id is None:
+                banco_id = cuenta_id
+            elif tipo == 'RESERVA' and reserva_id is None:
+                reserva_id = cuenta_id
+
+        # Entradas banco y dinero guardado de todas las cajas: una consulta
+        cajas = CajaRegistradora.objects.aggregate(
+            entradas_banco=Sum('total_ingresos_banco'),
+            dinero_guardado=Sum('dinero_guardado', filter=Q(estado='CERRADA')),
+        )
+
+        # Egresos banco y movimientos manuales de reserva: una consulta
+        egresos_banco = ingresos_reserva = egresos_reserva = CERO
+        if banco_id or reserva_id:
+            sin_cierres = ~Q(tipo_movimiento__codigo=CODIGO_CIERRE_CAJA)
+            transacciones = TransaccionGeneral.objects.filter(
+                cuenta_id__in=[c for c in (banco_id, reserva_id) if c]
+            ).aggregate(
+                egresos_banco=Sum('monto', filter=Q(cuenta_id=banco_id, tipo='EGRESO')),
+                ingresos_reserva=Sum('monto', filter=Q(cuenta_id=reserva_id, tipo='INGRESO') & sin_cierres),
+                egresos_reserva=Sum('monto', filter=Q(cuenta_id=reserva_id, tipo='EGRESO') & sin_cierres),
+            )
+            egresos_banco = transacciones['egresos_banco'] or CERO
+            ingresos_reserva = transacciones['ingresos_reserva'] or CERO
+            egresos_reserva = transacciones['egresos_reserva'] or CERO
+
+        return SaldosTesoreria(
+            caja=cls.saldo_caja(),
+            banco=(cajas['entradas_banco'] or CERO) - egresos_banco,
+            reserva=(cajas['dinero_guardado'] or CERO) + ingresos_reserva - egresos_reserva,
+            banco_id=banco_id,
+            reserva_id=reserva_id,
+        )
+
+    @staticmethod
+    def saldo_caja():
+        """
+        Caja ABIERTA: dinero en caja en tiempo real (SIN entradas banco).
+        Sin caja abierta: dinero_en_caja de la última caja cerrada.
+        """
+        caja_abierta = CajaRegistradora.caja_abierta()
+        if caja_abierta:
+            return calcular_totales_caja(caja_abierta).dinero_en_caja
+
+        ultima_caja_cerrada = CajaRegistradora.objects.filter(
+            estado='CERRADA'
+        ).order_by('-fecha_cierre').first()
+        if ultima_caja_cerrada and ultima_caja_cerrada.dinero_en_caja:
+            return ultima_caja_cerrada.dinero_en_caja
+        return CERO
+
+    @staticmethod
+    def saldo_cuenta(cuenta):
+        """Saldo disponible de una cuenta de tesorería."""
+        if cuenta.tipo == 'BANCO':
+            return calcular_saldo_banco(cuenta)
+        if cuenta.tipo == 'RESERVA':
+            return calcular_saldo_reserva(cuenta)
+        return cuenta.saldo_actual
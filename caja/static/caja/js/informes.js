@@ -15,6 +15,10 @@
     let filtroActual = 'ultima_semana';
     let paginaActual = 1;
     const registrosPorPagina = 5;
+    // Paginación por cursor del historial de arqueos
+    let cursorAnterior = null;
+    let cursorSiguiente = null;
+    let fechasArqueos = { desde: '', hasta: '' };
 
     // ============================================================
     // UTILIDADES
@@ -122,14 +126,15 @@
     // ============================================================
     // HISTORIAL DE ARQUEOS
     // ============================================================
-    async function cargarHistorialArqueos(pagina = 1, fechaDesde = '', fechaHasta = '') {
+    async function cargarHistorialArqueos(pagina = 1, cursor = null, direccion = 'siguiente') {
         try {
             mostrarLoading('loadingArqueos', true);
             
             let url = `/caja/informes/historial-arqueos/?pagina=${pagina}&por_pagina=${registrosPorPagina}`;
             
-            if (fechaDesde) url += `&fecha_desde=${fechaDesde}`;
-            if (fechaHasta) url += `&fecha_hasta=${fechaHasta}`;
+            if (cursor) url += `&cursor=${encodeURIComponent(cursor)}&direccion=${direccion}`;
+            if (fechasArqueos.desde) url += `&fecha_desde=${fechasArqueos.desde}`;
+            if (fechasArqueos.hasta) url += `&fecha_hasta=${fechasArqueos.hasta}`;
 
             const response = await fetch(url, {
                 method: 'GET',
@@ -221,8 +226,10 @@
         btnAnterior.disabled = !paginacion.tiene_anterior;
         btnSiguiente.disabled = !paginacion.tiene_siguiente;
 
-        // Actualizar variable global
+        // Actualizar variables globales
         paginaActual = paginacion.pagina_actual;
+        cursorAnterior = paginacion.cursor_anterior;
+        cursorSiguiente = paginacion.cursor_siguiente;
     }
 
     // ============================================================
@@ -379,13 +386,15 @@
 
         // Botones de paginación
         document.getElementById('btnPagAnterior').addEventListener('click', function() {
-            if (paginaActual > 1) {
-                cargarHistorialArqueos(paginaActual - 1);
+            if (paginaActual > 1 && cursorAnterior) {
+                cargarHistorialArqueos(paginaActual - 1, cursorAnterior, 'anterior');
             }
         });
 
         document.getElementById('btnPagSiguiente').addEventListener('click', function() {
-            cargarHistorialArqueos(paginaActual + 1);
+            if (cursorSiguiente) {
+                cargarHistorialArqueos(paginaActual + 1, cursorSiguiente, 'siguiente');
+            }
         });
     }
 
@@ -398,7 +407,8 @@
         
         // Cargar historial de arqueos (primera página)
         paginaActual = 1;
-        cargarHistorialArqueos(1, fechaDesde, fechaHasta);
+        fechasArqueos = { desde: fechaDesde, hasta: fechaHasta };
+        cargarHistorialArqueos(1);
         
         // Cargar flujo de efectivo
         cargarFlujoEfectivo(filtro, fechaDesde, fechaHasta);
@@ -9,6 +9,11 @@ let modalTransferencia;
 let modalBalance;
 let tipoEgresoActual = 'GASTO'; // 'GASTO' o 'INVERSION'
 
+// Estado del listado de transacciones (scroll infinito)
+let cursorTransacciones = null;
+let cargandoTransacciones = false;
+let consultaTransacciones = 0; // Descarta respuestas de filtros anteriores
+
 // Inicializar cuando el DOM esté listo
 document.addEventListener('DOMContentLoaded', function() {
     console.log('🔄 Inicializando Tesorería...');
@@ -85,6 +90,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Listado de transacciones: filtros y carga al hacer scroll
+    setupListadoTransacciones();
+    
     // Actualizar saldos cada 30 segundos
     setInterval(actualizarSaldos, 30000);
     
@@ -486,6 +494,129 @@ async function actualizarSaldos() {
     }
 }
 
+/**
+ * Configura los filtros y el scroll infinito del listado de transacciones
+ */
+function setupListadoTransacciones() {
+    const indicador = document.getElementById('cargando-transacciones');
+    const filtros = document.getElementById('filtros-transacciones');
+    
+    if (!indicador || !window.TESORERIA_URLS.transacciones) return;
+    
+    cursorTransacciones = indicador.dataset.cursor || null;
+    
+    // Cargar la siguiente página cuando el indicador entra en pantalla
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(function(entries) {
+            if (entries.some(entry => entry.isIntersecting)) {
+                cargarTransacciones(false);
+            }
+        }, { rootMargin: '200px' });
+        observer.observe(indicador);
+    } else {
+        window.addEventListener('scroll', function() {
+            if (indicadorTransaccionesVisible()) {
+                cargarTransacciones(false);
+            }
+        });
+    }
+    
+    if (!filtros) return;
+    
+    let busquedaTO = null;
+    filtros.addEventListener('submit', function(e) {
+        e.preventDefault();
+        cargarTransacciones(true);
+    });
+    filtros.addEventListener('change', function(e) {
+        if (e.target.name !== 'q') {
+            cargarTransacciones(true);
+        }
+    });
+    filtros.addEventListener('input', function(e) {
+        if (e.target.name === 'q') {
+            clearTimeout(busquedaTO);
+            busquedaTO = setTimeout(() => cargarTransacciones(true), 350);
+        }
+    });
+    filtros.addEventListener('reset', function() {
+        // Esperar a que el formulario se limpie antes de consultar
+        setTimeout(() => cargarTransacciones(true), 0);
+    });
+}
+
+/**
+ * Indica si el indicador de "cargando más" está dentro de la pantalla
+ */
+function indicadorTransaccionesVisible() {
+    const indicador = document.getElementById('cargando-transacciones');
+    if (!indicador || indicador.style.display === 'none') return false;
+    return indicador.getBoundingClientRect().top < window.innerHeight + 200;
+}
+
+/**
+ * Carga una página de transacciones.
+ * reiniciar=true vuelve a la primera página con los filtros actuales.
+ */
+async function cargarTransacciones(reiniciar) {
+    if (!reiniciar && (cargandoTransacciones || !cursorTransacciones)) return;
+    
+    const tabla = document.getElementById('tabla-transacciones');
+    const cuerpo = document.getElementById('cuerpo-transacciones');
+    const sinTransacciones = document.getElementById('sin-transacciones');
+    const indicador = document.getElementById('cargando-transacciones');
+    const filtros = document.getElementById('filtros-transacciones');
+    
+    const params = new URLSearchParams();
+    if (filtros) {
+        new FormData(filtros).forEach((valor, campo) => {
+            if (String(valor).trim()) params.append(campo, String(valor).trim());
+        });
+    }
+    if (!reiniciar) {
+        params.append('cursor', cursorTransacciones);
+    }
+    
+    const consulta = ++consultaTransacciones;
+    cargandoTransacciones = true;
+    indicador.style.display = '';
+    
+    try {
+        const response = await fetch(`${window.TESORERIA_URLS.transacciones}?${params.toString()}`);
+        const data = await response.json();
+        
+        // Ignorar respuestas de una consulta anterior (el filtro cambió)
+        if (consulta !== consultaTransacciones) return;
+        
+        if (!response.ok || !data.success) {
+            throw new Error(data.error || 'Error al cargar transacciones');
+        }
+        
+        if (reiniciar) {
+            cuerpo.innerHTML = data.html;
+        } else {
+            cuerpo.insertAdjacentHTML('beforeend', data.html);
+        }
+        cursorTransacciones = data.cursor_siguiente;
+        
+        const hayFilas = cuerpo.querySelector('tr') !== null;
+        tabla.style.display = hayFilas ? '' : 'none';
+        sinTransacciones.style.display = hayFilas ? 'none' : '';
+        indicador.style.display = cursorTransacciones ? '' : 'none';
+    } catch (error) {
+        console.error('❌ Error al cargar transacciones:', error);
+        indicador.style.display = 'none';
+    } finally {
+        if (consulta === consultaTransacciones) {
+            cargandoTransacciones = false;
+            // Si la página no llenó la pantalla, seguir cargando
+            if (cursorTransacciones && indicadorTransaccionesVisible()) {
+                cargarTransacciones(false);
+            }
+        }
+    }
+}
+
 /**
  * Formatea un número con separadores de miles
  */
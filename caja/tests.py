@@ -1,3 +1,169 @@
+"""
+Pruebas de la app caja.
+Renzzo Eléctricos - Villavicencio, Meta
+"""
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CajaRegistradora, Cuenta, MovimientoCaja, ResumenDiarioCaja, TipoMovimiento
+from .movimientos import registrar_movimiento
+from .resumen import reconstruir_resumen_diario
+from .totales import TotalesCaja, agregar_totales_caja
+
+
+User = get_user_model()
+
+
+class CajaTestCase(TestCase):
+    """Caja abierta con su apertura, tipos de movimiento y cuenta banco."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser(
+            'cajero', 'cajero@renzzo.test', 'clave', rol='ADMINISTRADOR'
+        )
+        cls.venta, _ = TipoMovimiento.objects.get_or_create(
+            codigo='VENTA', defaults={'nombre': 'Venta', 'tipo_base': 'INGRESO'}
+        )
+        cls.gasto, _ = TipoMovimiento.objects.get_or_create(
+            codigo='GASTO', defaults={'nombre': 'Gasto', 'tipo_base': 'GASTO'}
+        )
+        cls.banco = Cuenta.objects.create(nombre='Banco Principal', tipo='BANCO')
+        # La señal de apertura crea el movimiento APERTURA
+        cls.caja = CajaRegistradora.objects.create(cajero=cls.usuario, monto_inicial=Decimal('100000'))
+
+    def registrar(self, tipo_movimiento, tipo, monto, canal=MovimientoCaja.CanalChoices.EFECTIVO, **kwargs):
+        return registrar_movimiento(
+            caja=self.caja,
+            tipo_movimiento=tipo_movimiento,
+            tipo=tipo,
+            monto=Decimal(monto),
+            usuario=self.usuario,
+            canal=canal,
+            **kwargs
+        )
+
+    def assertContadoresCuadran(self):
+        """Los contadores acumulados (F()) coinciden con los movimientos."""
+        self.caja.refresh_from_db()
+        self.assertEqual(TotalesCaja.desde_caja(self.caja), agregar_totales_caja(self.caja))
+
+
+class ContadoresCajaTests(CajaTestCase):
+    """Contadores acumulados de CajaRegistradora (señales de MovimientoCaja)."""
+
+    def test_apertura(self):
+        self.assertContadoresCuadran()
+        self.assertEqual(self.caja.total_apertura, Decimal('100000'))
+        self.assertEqual(self.caja.num_movimientos, 1)
+
+    def test_crear_movimientos(self):
+        self.registrar(self.venta, 'INGRESO', '30000')
+        self.registrar(self.venta, 'INGRESO', '70000', MovimientoCaja.CanalChoices.BANCO)
+        self.registrar(self.gasto, 'EGRESO', '5000')
+
+        self.assertContadoresCuadran()
+        totales = TotalesCaja.desde_caja(self.caja)
+        self.assertEqual(totales.dinero_en_caja, Decimal('125000'))
+        self.assertEqual(totales.ingresos_banco, Decimal('70000'))
+        self.assertEqual(totales.num_movimientos, 4)
+
+    def test_editar_movimiento(self):
+        movimiento = self.registrar(self.venta, 'INGRESO', '30000')
+
+        # Como lo editaría el admin: instancia leída de la base de datos
+        movimiento = MovimientoCaja.objects.get(pk=movimiento.pk)
+        movimiento.monto = Decimal('45000')
+        movimiento.canal = MovimientoCaja.CanalChoices.BANCO
+        movimiento.save()
+        self.assertContadoresCuadran()
+
+        movimiento.tipo = 'EGRESO'
+        movimiento.tipo_movimiento = self.gasto
+        movimiento.save()
+        self.assertContadoresCuadran()
+
+    def test_eliminar_movimiento(self):
+        self.registrar(self.venta, 'INGRESO', '30000')
+        movimiento = self.registrar(self.venta, 'INGRESO', '70000', MovimientoCaja.CanalChoices.BANCO)
+
+        MovimientoCaja.objects.get(pk=movimiento.pk).delete()
+        self.assertContadoresCuadran()
+        self.assertEqual(self.caja.total_ingresos_banco, Decimal('0'))
+        self.assertEqual(self.caja.num_movimientos, 2)
+
+
+class ResumenDiarioCajaTests(CajaTestCase):
+    """El resumen diario incremental es igual al reconstruido desde los movimientos."""
+
+    def filas_resumen(self):
+        return sorted(
+            ResumenDiarioCaja.objects.exclude(cantidad=0).values_list(
+                'fecha', 'caja_id', 'tipo_movimiento_id', 'tipo', 'canal', 'total', 'cantidad'
+            )
+        )
+
+    def assertResumenCuadra(self):
+        incremental = self.filas_resumen()
+        reconstruir_resumen_diario()
+        self.assertEqual(incremental, self.filas_resumen())
+
+    def test_movimientos_de_varios_dias(self):
+        ayer = timezone.now() - timedelta(days=1)
+        self.registrar(self.venta, 'INGRESO', '30000')
+        self.registrar(self.venta, 'INGRESO', '20000', fecha=ayer)
+        self.registrar(self.venta, 'INGRESO', '70000', MovimientoCaja.CanalChoices.BANCO)
+        self.registrar(self.gasto, 'EGRESO', '5000', fecha=ayer)
+        self.assertResumenCuadra()
+
+    def test_editar_y_eliminar(self):
+        movimiento = self.registrar(self.venta, 'INGRESO', '30000')
+        otro = self.registrar(self.gasto, 'EGRESO', '5000')
+
+        movimiento = MovimientoCaja.objects.get(pk=movimiento.pk)
+        movimiento.monto = Decimal('45000')
+        movimiento.canal = MovimientoCaja.CanalChoices.BANCO
+        movimiento.fecha_movimiento = timezone.now() - timedelta(days=2)
+        movimiento.save()
+        MovimientoCaja.objects.get(pk=otro.pk).delete()
+        self.assertResumenCuadra()
+
+
+class CajaAbiertaUnicaTests(CajaTestCase):
+    """Solo puede haber una caja abierta (índice único de turno_abierto)."""
+
+    def abrir_caja(self):
+        self.client.force_login(self.usuario)
+        return self.client.post(
+            reverse('caja:abrir'),
+            json.dumps({'monto_inicial': '50000'}),
+            content_type='application/json',
+        )
+
+    def test_segunda_apertura_rechazada(self):
+        respuesta = self.abrir_caja()
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(CajaRegistradora.objects.filter(estado='ABIERTA').count(), 1)
+
+    def test_restriccion_en_base_de_datos(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CajaRegistradora.objects.create(cajero=self.usuario, monto_inicial=Decimal('0'))
+
+    def test_cerrar_libera_el_turno(self):
+        self.assertEqual(CajaRegistradora.caja_abierta(), self.caja)
+
+        self.caja.estado = CajaRegistradora.EstadoChoices.CERRADA
+        self.caja.save(update_fields=['estado'])
+        self.caja.refresh_from_db()
+        self.assertIsNone(self.caja.turno_abierto)
+        self.assertIsNone(CajaRegistradora.caja_abierta())
 
-# Create your tests here.
+        self.assertEqual(self.abrir_caja().status_code, 200)
+        self.assertNotEqual(CajaRegistradora.caja_abierta(), self.caja)
@@ -0,0 +1,130 @@
+"""
+Cálculo de totales de la caja registradora.
+Renzzo Eléctricos - Villavicencio, Meta
+
+Los totales se leen de los contadores acumulados en CajaRegistradora
+(se actualizan con F() desde las señales de MovimientoCaja), así que
+consultarlos cuesta lo mismo sin importar cuántos movimientos tenga la caja.
+Las funciones agregar_* recalculan desde los movimientos y se usan para
+verificar/reparar los contadores (comando recalcular_totales).
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import Sum, Count, Q
+
+from .models import MovimientoCaja
+
+
+CERO = Decimal('0.00')
+
+
+@dataclass(frozen=True)
+class TotalesCaja:
+    """
+    Totales de los movimientos de una caja.
+    - ingresos_efectivo: ingresos en efectivo (INCLUYE apertura, EXCLUYE banco)
+    - ingresos_banco: entradas al banco (canal BANCO)
+    - ingresos_apertura: movimiento de apertura (dinero inicial)
+    - egresos: todos los egresos (siempre salen de caja)
+    - num_movimientos: cantidad de movimientos de la caja
+    """
+    ingresos_efectivo: Decimal = CERO
+    ingresos_banco: Decimal = CERO
+    ingresos_apertura: Decimal = CERO
+    egresos: Decimal = CERO
+    num_movimientos: int = 0
+
+    @classmethod
+    def desde_caja(cls, caja):
+        """Construye los totales a partir de los contadores de la caja."""
+        return cls(
+            ingresos_efectivo=caja.total_ingresos_efectivo,
+            ingresos_banco=caja.total_ingresos_banco,
+            ingresos_apertura=caja.total_apertura,
+            egresos=caja.total_egresos,
+            num_movimientos=caja.num_movimientos,
+        )
+
+    def como_campos_caja(self):
+        """Devuelve los totales con los nombres de campo de CajaRegistradora."""
+        return {
+            'total_ingresos_efectivo': self.ingresos_efectivo,
+            'total_ingresos_banco': self.ingresos_banco,
+            'total_apertura': self.ingresos_apertura,
+            'total_egresos': self.egresos,
+            'num_movimientos': self.num_movimientos,
+        }
+
+    @property
+    def ingresos_sin_apertura(self):
+        """Ingresos en efectivo sin contar la apertura (para estadísticas)."""
+        return self.ingresos_efectivo - self.ingresos_apertura
+
+    @property
+    def dinero_en_caja(self):
+        """Dinero físico en caja = ingresos efectivo - egresos."""
+        return self.ingresos_efectivo - self.egresos
+
+    @property
+    def saldo_disponible(self):
+        """Dinero en caja + entradas banco (fondos para egresos desde caja)."""
+        return self.dinero_en_caja + self.ingresos_banco
+
+
+def calcular_totales_caja(caja):
+    """
+    Devuelve los totales de la caja leyendo sus contadores acumulados (O(1)).
+    Si no hay caja devuelve todos los totales en cero.
+    """
+    if caja is None:
+        return TotalesCaja()
+    return TotalesCaja.desde_caja(caja)
+
+
+def _agregados_totales():
+    """Expresiones de agregación condicional para todos los totales."""
+    ingreso = Q(tipo='INGRESO')
+    banco = Q(canal=MovimientoCaja.CanalChoices.BANCO)
+    return {
+        'ingresos_efectivo': Sum('monto', filter=ingreso & ~banco),
+        'ingresos_banco': Sum('monto', filter=ingreso & banco),
+        'ingresos_apertura': Sum(
+            'monto',
+            filter=ingreso & ~banco & Q(tipo_movimiento__codigo='APERTURA')
+        ),
+        'egresos': Sum('monto', filter=Q(tipo='EGRESO')),
+        'num_movimientos': Count('id'),
+    }
+
+
+def _totales_desde_fila(fila):
+    return TotalesCaja(
+        ingresos_efectivo=fila['ingresos_efectivo'] or CERO,
+        ingresos_banco=fila['ingresos_banco'] or CERO,
+        ingresos_apertura=fila['ingresos_apertura'] or CERO,
+        egresos=fila['egresos'] or CERO,
+        num_movimientos=fila['num_movimientos'] or 0,
+    )
+
+
+def agregar_totales_caja(caja):
+    """
+    Recalcula los totales de la caja desde sus movimientos en UNA sola
+    consulta usando agregación condicional (Sum con filter).
+    """
+    if caja is None:
+        return TotalesCaja()
+    fila = MovimientoCaja.objects.filter(caja=caja).aggregate(**_agregados_totales())
+    return _totales_desde_fila(fila)
+
+
+def agregar_totales_por_caja(cajas):
+    """
+    Recalcula los totales de varias cajas en una sola consulta agrupada.
+    Devuelve {caja_id: TotalesCaja}; las cajas sin movimientos no aparecen.
+    """
+    filas = MovimientoCaja.objects.filter(
+        caja__in=cajas
+    ).order_by().values('caja_id').annotate(**_agregados_totales())
+    return {fila['caja_id']: _totales_desde_fila(fila) for fila in filas}
@@ -42,6 +42,7 @@ urlpatterns = [
     # ============================================================================
     path('tesoreria/', views_tesoreria.tesoreria_dashboard, name='tesoreria_dashboard'),
     path('tesoreria/saldos/', views_tesoreria.get_saldos_tesoreria, name='tesoreria_saldos'),
+    path('tesoreria/transacciones/', views_tesoreria.transacciones_tesoreria_ajax, name='tesoreria_transacciones'),
     path('tesoreria/tipos-movimiento/', views_tesoreria.get_tipos_movimiento_tesoreria, name='tesoreria_tipos'),
     path('tesoreria/registrar-egreso/', views_tesoreria.registrar_egreso_tesoreria, name='tesoreria_registrar_egreso'),
     path('tesoreria/transferir-fondos/', views_tesoreria.transferir_fondos, name='tesoreria_transferir'),
@@ -11,9 +11,9 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from django.urls import reverse_lazy, reverse
 from django.http import JsonResponse
 from django.db.models import Sum, Q, Count, Avg
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 import json
 
@@ -23,6 +23,10 @@ from .models import (
     Cuenta, TransaccionGeneral
 )
 from .decorators import staff_or_permission_required
+from .totales import calcular_totales_caja
+from .resumen import resumen_movimientos
+from .referencia import ReferenciaCaja
+from .movimientos import registrar_movimiento
 
 
 @staff_or_permission_required('users.can_view_caja')
@@ -32,78 +36,28 @@ def caja_dashboard(request):
     Muestra la caja global única (si existe y está abierta).
     """
     # Obtener la caja abierta del sistema (única y global)
-    caja_actual = CajaRegistradora.objects.filter(
-        estado='ABIERTA'
-    ).first()
+    caja_actual = CajaRegistradora.caja_abierta()
     
     # SIEMPRE mostrar las estadísticas (si no hay caja abierta, todo en ceros)
-    total_ingresos = Decimal('0.00')
-    total_egresos = Decimal('0.00')
-    total_disponible = Decimal('0.00')
-    total_entradas_banco = Decimal('0.00')
+    # Todos los totales de la caja se calculan en una sola consulta
+    totales = calcular_totales_caja(caja_actual)
     ultimos_movimientos = []
     
     if caja_actual:
-        # Si hay caja abierta, calcular movimientos de ESA caja específica
-        movimientos_caja = MovimientoCaja.objects.filter(caja=caja_actual)
-        
-        # Calcular total de entradas al banco (movimientos con [BANCO] en la descripción)
-        total_entradas_banco = movimientos_caja.filter(
-            tipo='INGRESO',
-            descripcion__icontains='[BANCO]'
-        ).aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Total de ingresos EN EFECTIVO (excluir banco, incluir apertura)
-        total_ingresos = movimientos_caja.filter(
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='[BANCO]'
-        ).aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        total_egresos = movimientos_caja.filter(tipo='EGRESO').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Dinero en Caja = Total Ingresos Efectivo - Total Egresos
-        dinero_en_caja = total_ingresos - total_egresos
-        
-        # Total disponible en CAJA = solo el dinero físico en caja (sin banco)
-        total_disponible = dinero_en_caja
-        
         # Mostrar TODOS los movimientos de la caja abierta (incluyendo apertura)
-        ultimos_movimientos = movimientos_caja.select_related(
+        ultimos_movimientos = MovimientoCaja.objects.filter(
+            caja=caja_actual
+        ).select_related(
             'tipo_movimiento', 'caja', 'usuario'
         ).order_by('-fecha_movimiento')[:50]
     
-    # Separar total_ingresos para mostrar solo ingresos sin apertura
-    total_ingresos_sin_apertura = Decimal('0.00')
-    dinero_en_caja_calculado = Decimal('0.00')
-    
-    if caja_actual:
-        # Total de ingresos SIN apertura (para mostrar en estadísticas)
-        total_ingresos_sin_apertura = movimientos_caja.filter(
-            tipo='INGRESO'
-        ).exclude(
-            tipo_movimiento__codigo='APERTURA'
-        ).exclude(
-            descripcion__icontains='[BANCO]'
-        ).aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        dinero_en_caja_calculado = dinero_en_caja
-    
     estadisticas = {
-        'total_ingresos': total_ingresos_sin_apertura,  # Solo ingresos sin apertura
-        'total_egresos': total_egresos,
-        'total_entradas_banco': total_entradas_banco,
-        'dinero_en_caja': dinero_en_caja_calculado,    # Dinero físico en caja
-        'numero_movimientos': len(ultimos_movimientos),
-        'total_disponible': total_disponible,           # Total: caja + banco
+        'total_ingresos': totales.ingresos_sin_apertura,  # Solo ingresos sin apertura
+        'total_egresos': totales.egresos,
+        'total_entradas_banco': totales.ingresos_banco,
+        'dinero_en_caja': totales.dinero_en_caja,         # Dinero físico en caja
+        'numero_movimientos': totales.num_movimientos,
+        'total_disponible': totales.dinero_en_caja,       # Solo dinero físico (sin banco)
     }
     
     context = {
@@ -115,6 +69,27 @@ def caja_dashboard(request):
     return render(request, 'caja/dashboard.html', context)
 
 
+def _leer_conteos(conteos):
+    """
+    Convierte {denominacion_id: cantidad} en DetalleConteo sin guardar (sin
+    conteo asignado) y su total. Las denominaciones activas salen de la
+    copia en memoria; las inexistentes y las cantidades <= 0 se ignoran.
+    """
+    cantidades = {int(denom_id): int(cantidad) for denom_id, cantidad in conteos.items()}
+    denominaciones = ReferenciaCaja.denominaciones_por_id(cantidades)
+
+    detalles = []
+    total = Decimal('0.00')
+    for denom_id, cantidad in cantidades.items():
+        denom = denominaciones.get(denom_id)
+        if denom is None or cantidad <= 0:
+            continue
+        subtotal = denom.valor * Decimal(cantidad)
+        detalles.append(DetalleConteo(denominacion=denom, cantidad=cantidad, subtotal=subtotal))
+        total += subtotal
+    return detalles, total
+
+
 @staff_or_permission_required('users.can_manage_caja')
 def abrir_caja(request):
     """
@@ -122,10 +97,9 @@ def abrir_caja(request):
     Solo puede existir UNA caja abierta a la vez.
     SOLO funciona vía AJAX - desde el modal en dashboard.
     """
-    # Verificar si ya hay una caja abierta en el sistema (GLOBAL)
-    caja_abierta = CajaRegistradora.objects.filter(
-        estado='ABIERTA'
-    ).exists()
+    # Verificar si ya hay una caja abierta en el sistema (GLOBAL); la
+    # restricción única de turno_abierto cubre las aperturas simultáneas
+    caja_abierta = CajaRegistradora.objects.filter(turno_abierto=True).exists()
     
     if caja_abierta:
         is_ajax = request.content_type == 'application/json' or request.headers.get('x-requested-with') == 'XMLHttpRequest'
@@ -157,18 +131,7 @@ def abrir_caja(request):
     try:
         total_calculado = None
         if conteos:
-            total = Decimal('0.00')
-            for denom_id, cantidad in conteos.items():
-                try:
-                    denom = DenominacionMoneda.objects.get(id=int(denom_id))
-                    cantidad = int(cantidad)
-                    if cantidad <= 0:
-                        continue
-                    subtotal = denom.valor * Decimal(cantidad)
-                    total += subtotal
-                except DenominacionMoneda.DoesNotExist:
-                    continue
-            total_calculado = total
+            detalles, total_calculado = _leer_conteos(conteos)
 
         if monto_inicial is None or monto_inicial == '':
             if total_calculado is None:
@@ -199,21 +162,9 @@ def abrir_caja(request):
                     usuario=request.user,
                     total=monto_inicial
                 )
-                for denom_id, cantidad in conteos.items():
-                    try:
-                        denom = DenominacionMoneda.objects.get(id=int(denom_id))
-                        cantidad = int(cantidad)
-                        if cantidad <= 0:
-                            continue
-                        subtotal = denom.valor * Decimal(cantidad)
-                        DetalleConteo.objects.create(
-                            conteo=conteo,
-                            denominacion=denom,
-                            cantidad=cantidad,
-                            subtotal=subtotal
-                        )
-                    except DenominacionMoneda.DoesNotExist:
-                        continue
+                for detalle in detalles:
+                    detalle.conteo = conteo
+                DetalleConteo.objects.bulk_create(detalles)
 
         # Preparar mensaje de éxito
         monto_formateado = f'${monto_inicial:,.0f}'
@@ -238,6 +189,12 @@ def abrir_caja(request):
                 'cajero': cajero_nombre,
             }
         })
+    except IntegrityError:
+        # Otra petición abrió una caja al mismo tiempo (índice único de turno_abierto)
+        return JsonResponse({
+            'success': False,
+            'error': 'Ya existe una caja abierta en el sistema. Ciérrala antes de abrir una nueva.'
+        }, status=400)
     except (ValueError, TypeError) as e:
         return JsonResponse({'success': False, 'error': f'Monto inicial inválido: {str(e)}'}, status=400)
     except Exception as e:
@@ -251,9 +208,8 @@ def cerrar_caja(request):
     SOLO funciona vía AJAX - desde el modal en dashboard.
     """
     # Obtener la caja abierta del sistema (GLOBAL)
-    try:
-        caja = CajaRegistradora.objects.get(estado='ABIERTA')
-    except CajaRegistradora.DoesNotExist:
+    caja = CajaRegistradora.caja_abierta()
+    if caja is None:
         is_ajax = request.content_type == 'application/json' or request.headers.get('x-requested-with') == 'XMLHttpRequest'
         if is_ajax:
             return JsonResponse({'success': False, 'error': 'No hay ninguna caja abierta en el sistema'}, status=400)
@@ -310,16 +266,7 @@ def cerrar_caja(request):
             }, status=400)
 
         # Validar que el conteo de denominaciones coincida con el dinero_en_caja
-        total_contado = Decimal('0.00')
-        for denom_id, cantidad in conteos.items():
-            try:
-                denom = DenominacionMoneda.objects.get(id=int(denom_id))
-                cantidad = int(cantidad)
-                if cantidad > 0:
-                    subtotal = denom.valor * Decimal(cantidad)
-                    total_contado += subtotal
-            except DenominacionMoneda.DoesNotExist:
-                continue
+        detalles, total_contado = _leer_conteos(conteos)
         
         # Solo validar si hay dinero en caja
         if dinero_en_caja > 0 and abs(total_contado - dinero_en_caja) > Decimal('0.01'):
@@ -336,22 +283,10 @@ def cerrar_caja(request):
             total=dinero_en_caja  # Ahora el conteo es solo del dinero en caja
         )
 
-        # Crear detalles del conteo
-        for denom_id, cantidad in conteos.items():
-            try:
-                denom = DenominacionMoneda.objects.get(id=int(denom_id))
-                cantidad = int(cantidad)
-                if cantidad <= 0:
-                    continue
-                subtotal = denom.valor * Decimal(cantidad)
-                DetalleConteo.objects.create(
-                    conteo=conteo,
-                    denominacion=denom,
-                    cantidad=cantidad,
-                    subtotal=subtotal
-                )
-            except DenominacionMoneda.DoesNotExist:
-                continue
+        # Crear detalles del conteo (un solo INSERT)
+        for detalle in detalles:
+            detalle.conteo = conteo
+        DetalleConteo.objects.bulk_create(detalles)
 
         # Usar transacción atómica para asegurar consistencia
         with transaction.atomic():
@@ -369,9 +304,9 @@ def cerrar_caja(request):
                 cuenta_reserva = Cuenta.objects.filter(tipo='RESERVA', activo=True).first()
                 if cuenta_reserva:
                     # Obtener tipo de movimiento para transferencia interna
-                    tipo_interno, _ = TipoMovimiento.objects.get_or_create(
-                        codigo='CIERRE_CAJA',
-                        defaults={
+                    tipo_interno = ReferenciaCaja.tipo_movimiento_sistema(
+                        'CIERRE_CAJA',
+                        {
                             'nombre': 'Cierre de Caja - Dinero Guardado',
                             'descripcion': 'Dinero retirado de caja y guardado al cierre',
                             'tipo_base': TipoMovimiento.TipoBaseChoices.INTERNO,
@@ -411,9 +346,7 @@ def nuevo_movimiento(request):
     SOLO funciona vía AJAX - desde el modal en dashboard.
     """
     # Verificar que hay una caja abierta en el sistema (GLOBAL)
-    caja = CajaRegistradora.objects.filter(
-        estado='ABIERTA'
-    ).first()
+    caja = CajaRegistradora.caja_abierta()
     
     if not caja:
         is_ajax = request.content_type == 'application/json' or request.headers.get('x-requested-with') == 'XMLHttpRequest'
@@ -447,33 +380,32 @@ def nuevo_movimiento(request):
         if monto <= 0:
             raise ValueError('El monto debe ser mayor a cero')
 
-        # Resolver tipo_movimiento: primero intentar por id numérico, si falla buscar por codigo
-        tipo_movimiento = None
-        try:
-            # Si viene como número (string de dígitos) intentar por id
-            if isinstance(tipo_movimiento_id, int) or (isinstance(tipo_movimiento_id, str) and tipo_movimiento_id.isdigit()):
-                tipo_movimiento = TipoMovimiento.objects.get(id=int(tipo_movimiento_id))
-            else:
-                # Buscar por codigo (ej: 'VENTA', 'GASTO', etc.)
-                tipo_movimiento = TipoMovimiento.objects.get(codigo=str(tipo_movimiento_id))
-        except TipoMovimiento.DoesNotExist:
+        # Resolver tipo_movimiento (desde memoria): por id numérico o por codigo
+        if isinstance(tipo_movimiento_id, int) or (isinstance(tipo_movimiento_id, str) and tipo_movimiento_id.isdigit()):
+            tipo_movimiento = ReferenciaCaja.tipo_movimiento(id=int(tipo_movimiento_id))
+        else:
+            # Buscar por codigo (ej: 'VENTA', 'GASTO', etc.)
+            tipo_movimiento = ReferenciaCaja.tipo_movimiento(codigo=str(tipo_movimiento_id))
+        if tipo_movimiento is None:
             return JsonResponse({'success': False, 'error': 'Tipo de movimiento no encontrado en el sistema. Pide al administrador que ejecute el script de inicialización para crear las categorías por defecto.'}, status=400)
 
-        # Si es entrada banco, agregar identificador en la descripción
+        # Si es entrada banco, agregar identificador visible en la descripción
+        # (el cálculo de totales usa el campo canal, no este texto)
         if es_banco:
             if descripcion:
                 descripcion = f"[BANCO] {descripcion}"
             else:
                 descripcion = "[BANCO] Entrada al banco"
         
-        movimiento = MovimientoCaja.objects.create(
+        movimiento = registrar_movimiento(
             caja=caja,
-            tipo=tipo,
             tipo_movimiento=tipo_movimiento,
-            usuario=request.user,
+            tipo=tipo,
             monto=monto,
+            usuario=request.user,
             descripcion=descripcion,
-            referencia=referencia
+            referencia=referencia,
+            canal=MovimientoCaja.CanalChoices.BANCO if es_banco else MovimientoCaja.CanalChoices.EFECTIVO
         )
 
         return JsonResponse({
@@ -570,7 +502,7 @@ def obtener_denominaciones(request):
     if request.method != 'GET':
         return JsonResponse({'error': 'Método no permitido'}, status=405)
 
-    denoms = DenominacionMoneda.objects.filter(activo=True).order_by('-valor')
+    denoms = ReferenciaCaja.denominaciones_activas()
     data = [
         {
             'id': d.id,
@@ -596,38 +528,18 @@ def obtener_estado_caja(request):
         return JsonResponse({'error': 'Método no permitido'}, status=405)
     
     try:
-        caja = CajaRegistradora.objects.get(estado='ABIERTA')
-    except CajaRegistradora.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'No hay una caja abierta'}, status=400)
+        caja = CajaRegistradora.caja_abierta()
     except Exception as e:
         return JsonResponse({'success': False, 'error': f'Error al consultar caja: {str(e)}'}, status=500)
+    if caja is None:
+        return JsonResponse({'success': False, 'error': 'No hay una caja abierta'}, status=400)
     
     try:
-        # Calcular totales
-        movimientos = MovimientoCaja.objects.filter(caja=caja)
-        
-        # Calcular total de entradas al banco
-        total_entradas_banco = movimientos.filter(
-            tipo='INGRESO',
-            descripcion__icontains='[BANCO]'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        # Total de ingresos EN EFECTIVO (incluir apertura, excluir banco)
-        total_ingresos = movimientos.filter(
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='[BANCO]'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        total_egresos = movimientos.filter(
-            tipo='EGRESO'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        # Dinero en caja = total ingresos efectivo - total egresos
-        dinero_en_caja = total_ingresos - total_egresos
+        # Calcular todos los totales en una sola consulta
+        totales = calcular_totales_caja(caja)
         
         # Total disponible en CAJA = solo dinero físico (sin entradas banco)
-        total_disponible = dinero_en_caja
+        total_disponible = totales.dinero_en_caja
         
         # Calcular denominaciones esperadas (distribución óptima)
         # Este es un cálculo aproximado - en la realidad el efectivo puede variar
@@ -637,11 +549,11 @@ def obtener_estado_caja(request):
             'success': True,
             'caja_id': caja.id,
             'monto_inicial': float(caja.monto_inicial),
-            'total_ingresos': float(total_ingresos),
-            'total_egresos': float(total_egresos),
-            'dinero_en_caja': float(dinero_en_caja),
+            'total_ingresos': float(totales.ingresos_efectivo),
+            'total_egresos': float(totales.egresos),
+            'dinero_en_caja': float(totales.dinero_en_caja),
             'total_disponible': float(total_disponible),
-            'total_entradas_banco': float(total_entradas_banco),
+            'total_entradas_banco': float(totales.ingresos_banco),
             'denominaciones_esperadas': denominaciones_esperadas
         })
         
@@ -666,10 +578,10 @@ def calcular_denominaciones_esperadas(total):
     
     try:
         # Obtener denominaciones ordenadas de mayor a menor
-        denoms = DenominacionMoneda.objects.filter(activo=True).order_by('-valor')
+        denoms = ReferenciaCaja.denominaciones_activas()
         
         # Verificar que hay denominaciones disponibles
-        if not denoms.exists():
+        if not denoms:
             # Log del error para debugging
             import logging
             logger = logging.getLogger(__name__)
@@ -882,22 +794,17 @@ def balance_general_ajax(request):
             total=Sum('dinero_guardado')
         )['total'] or Decimal('0.00')
         
-        # Total de ingresos y egresos del periodo
-        movimientos = MovimientoCaja.objects.filter(
-            caja__in=cajas,
-            fecha_movimiento__gte=fecha_inicio,
-            fecha_movimiento__lte=fecha_fin
-        )
-        
-        total_ingresos = movimientos.filter(
-            tipo='INGRESO'
-        ).exclude(
-            tipo_movimiento__codigo='APERTURA'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        total_egresos = movimientos.filter(
-            tipo='EGRESO'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+        # Total de ingresos y egresos del periodo (desde el resumen diario)
+        totales_por_tipo = {
+            fila['tipo']: fila['total']
+            for fila in resumen_movimientos(
+                fecha_inicio, fecha_fin, ['tipo'],
+                ~Q(tipo_movimiento__codigo='APERTURA'),
+                caja__in=cajas
+            )
+        }
+        total_ingresos = totales_por_tipo.get('INGRESO', Decimal('0.00'))
+        total_egresos = totales_por_tipo.get('EGRESO', Decimal('0.00'))
         
         flujo_neto = total_ingresos - total_egresos
         
@@ -931,26 +838,61 @@ def balance_general_ajax(request):
         return JsonResponse({'error': f'Error al calcular balance: {str(e)}'}, status=500)
 
 
+# Límite de registros por página del historial de arqueos
+MAX_POR_PAGINA_ARQUEOS = 50
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _cursor_arqueo(caja):
+    """Cursor de paginación (fecha_cierre en microsegundos + id) de una caja."""
+    microsegundos = (caja.fecha_cierre - _EPOCA) // timedelta(microseconds=1)
+    return f'{microsegundos}-{caja.id}'
+
+
+def _leer_cursor_arqueo(cursor):
+    """Devuelve (fecha_cierre, id) del cursor, o None si no es válido."""
+    try:
+        microsegundos, caja_id = cursor.split('-')
+        return _EPOCA + timedelta(microseconds=int(microsegundos)), int(caja_id)
+    except (ValueError, AttributeError):
+        return None
+
+
 @staff_or_permission_required('users.can_view_caja')
 def historial_arqueos_ajax(request):
     """
     Devuelve el historial de arqueos (cajas cerradas) con paginación.
     Muestra las últimas 5 cajas por defecto.
+    
+    La paginación es por cursor (fecha_cierre, id): el cliente envía el
+    cursor_siguiente/cursor_anterior de la respuesta anterior con
+    direccion=siguiente|anterior, así las páginas profundas cuestan lo mismo
+    que la primera. `pagina` solo se usa para mostrar el número de página.
     """
     if request.method != 'GET':
         return JsonResponse({'error': 'Método no permitido'}, status=405)
     
     try:
         # Parámetros de paginación
-        pagina = int(request.GET.get('pagina', 1))
-        por_pagina = int(request.GET.get('por_pagina', 5))
+        try:
+            pagina = max(int(request.GET.get('pagina', 1)), 1)
+            por_pagina = int(request.GET.get('por_pagina', 5))
+        except ValueError:
+            pagina, por_pagina = 1, 5
+        por_pagina = min(max(por_pagina, 1), MAX_POR_PAGINA_ARQUEOS)
+        
+        cursor = _leer_cursor_arqueo(request.GET.get('cursor'))
+        hacia_atras = cursor is not None and request.GET.get('direccion') == 'anterior'
+        if cursor is None:
+            pagina = 1
         
         # Filtros de fecha (si se envían)
         fecha_desde = request.GET.get('fecha_desde', '')
         fecha_hasta = request.GET.get('fecha_hasta', '')
         
         # Query base: cajas cerradas
-        cajas = CajaRegistradora.objects.filter(estado='CERRADA')
+        cajas = CajaRegistradora.objects.filter(estado='CERRADA', fecha_cierre__isnull=False)
         
         # Aplicar filtros de fecha si existen
         if fecha_desde:
@@ -961,43 +903,47 @@ def historial_arqueos_ajax(request):
             fecha_fin = timezone.make_aware(datetime.strptime(fecha_hasta + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
             cajas = cajas.filter(fecha_cierre__lte=fecha_fin)
         
-        # Ordenar por fecha de cierre descendente
-        cajas = cajas.select_related('cajero').order_by('-fecha_cierre')
-        
         # Total de registros
         total = cajas.count()
         
-        # Calcular paginación
-        inicio = (pagina - 1) * por_pagina
-        fin = inicio + por_pagina
-        cajas_paginadas = cajas[inicio:fin]
+        # Página por cursor, ordenada por fecha de cierre descendente
+        if cursor is None:
+            pagina_qs = cajas.order_by('-fecha_cierre', '-id')
+        elif hacia_atras:
+            fecha_cursor, id_cursor = cursor
+            pagina_qs = cajas.filter(
+                Q(fecha_cierre__gt=fecha_cursor) | Q(fecha_cierre=fecha_cursor, id__gt=id_cursor)
+            ).order_by('fecha_cierre', 'id')
+        else:
+            fecha_cursor, id_cursor = cursor
+            pagina_qs = cajas.filter(
+                Q(fecha_cierre__lt=fecha_cursor) | Q(fecha_cierre=fecha_cursor, id__lt=id_cursor)
+            ).order_by('-fecha_cierre', '-id')
+        
+        # Un registro extra para saber si hay más páginas en esa dirección
+        cajas_paginadas = list(pagina_qs.select_related('cajero')[:por_pagina + 1])
+        hay_mas = len(cajas_paginadas) > por_pagina
+        cajas_paginadas = cajas_paginadas[:por_pagina]
+        
+        if hacia_atras:
+            cajas_paginadas.reverse()
+            tiene_anterior, tiene_siguiente = hay_mas, True
+        else:
+            tiene_anterior, tiene_siguiente = cursor is not None, hay_mas
         
         # Construir lista de cajas con sus datos
         lista_cajas = []
         for caja in cajas_paginadas:
-            # Calcular movimientos de la caja
-            movimientos = MovimientoCaja.objects.filter(caja=caja)
-            total_entradas = movimientos.filter(
-                tipo='INGRESO'
-            ).exclude(
-                tipo_movimiento__codigo='APERTURA'
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-            
-            total_salidas = movimientos.filter(
-                tipo='EGRESO'
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+            # Totales desde los contadores acumulados de la caja (sin consultas)
+            totales = calcular_totales_caja(caja)
+            total_entradas = totales.ingresos_sin_apertura + totales.ingresos_banco
+            total_salidas = totales.egresos
             
             # Saldo teórico
             saldo_teorico = caja.monto_inicial + total_entradas - total_salidas
             
             # Obtener nombre del cajero
-            cajero_nombre = str(caja.cajero.username)
-            try:
-                full_name = caja.cajero.get_full_name()
-                if full_name and full_name.strip():
-                    cajero_nombre = full_name
-            except:
-                pass
+            cajero_nombre = caja.cajero.get_full_name().strip() or caja.cajero.username
             
             lista_cajas.append({
                 'id': caja.id,
@@ -1025,8 +971,10 @@ def historial_arqueos_ajax(request):
                 'por_pagina': por_pagina,
                 'total_registros': total,
                 'total_paginas': total_paginas,
-                'tiene_anterior': pagina > 1,
-                'tiene_siguiente': pagina < total_paginas,
+                'tiene_anterior': tiene_anterior and bool(cajas_paginadas),
+                'tiene_siguiente': tiene_siguiente and bool(cajas_paginadas),
+                'cursor_anterior': _cursor_arqueo(cajas_paginadas[0]) if cajas_paginadas else None,
+                'cursor_siguiente': _cursor_arqueo(cajas_paginadas[-1]) if cajas_paginadas else None,
             }
         })
         
@@ -1080,32 +1028,17 @@ def flujo_efectivo_ajax(request):
             fecha_inicio = now - timedelta(days=7)
             fecha_fin = now
         
-        # Obtener todos los movimientos del periodo
-        movimientos = MovimientoCaja.objects.filter(
-            fecha_movimiento__gte=fecha_inicio,
-            fecha_movimiento__lte=fecha_fin
-        ).select_related('tipo_movimiento')
-        
-        # Calcular totales por tipo de movimiento
-        ingresos_por_tipo = movimientos.filter(
-            tipo='INGRESO'
-        ).exclude(
-            tipo_movimiento__codigo='APERTURA'
-        ).values(
-            'tipo_movimiento__nombre'
-        ).annotate(
-            total=Sum('monto'),
-            cantidad=Count('id')
-        ).order_by('-total')
-        
-        egresos_por_tipo = movimientos.filter(
-            tipo='EGRESO'
-        ).values(
-            'tipo_movimiento__nombre'
-        ).annotate(
-            total=Sum('monto'),
-            cantidad=Count('id')
-        ).order_by('-total')
+        # Totales del periodo por tipo de movimiento (desde el resumen diario)
+        por_tipo = sorted(
+            resumen_movimientos(
+                fecha_inicio, fecha_fin, ['tipo', 'tipo_movimiento__nombre'],
+                ~Q(tipo_movimiento__codigo='APERTURA')
+            ),
+            key=lambda item: item['total'],
+            reverse=True
+        )
+        ingresos_por_tipo = [item for item in por_tipo if item['tipo'] == 'INGRESO']
+        egresos_por_tipo = [item for item in por_tipo if item['tipo'] == 'EGRESO']
         
         # Totales generales
         total_ingresos = sum(item['total'] for item in ingresos_por_tipo)
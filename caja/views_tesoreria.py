@@ -6,9 +6,11 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
-from django.db.models import Sum, Q
 from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
 from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 import json
 
@@ -17,6 +19,10 @@ from .models import (
     Cuenta, TransaccionGeneral
 )
 from .decorators import staff_or_permission_required
+from .totales import calcular_totales_caja
+from .saldos import SaldosService
+from .referencia import ReferenciaCaja
+from .movimientos import registrar_movimiento
 
 
 @staff_or_permission_required('users.can_view_caja')
@@ -25,226 +31,173 @@ def tesoreria_dashboard(request):
     Dashboard principal de Tesorería.
     Muestra saldos de Caja, Banco y Dinero Guardado.
     """
-    # Obtener cuenta banco y reserva
-    cuenta_banco = Cuenta.objects.filter(tipo='BANCO', activo=True).first()
-    cuenta_reserva = Cuenta.objects.filter(tipo='RESERVA', activo=True).first()
+    # Saldos de Caja, Banco y Dinero Guardado (ver SaldosService)
+    saldos = SaldosService.calcular()
     
-    # Obtener caja abierta
-    caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
-    
-    # ========== CALCULAR DINERO EN CAJA ==========
-    saldo_caja = Decimal('0.00')
-    
-    if caja_abierta:
-        # Caja ABIERTA: calcular en tiempo real (SIN entradas banco)
-        movimientos = MovimientoCaja.objects.filter(caja=caja_abierta)
-        
-        # Total de ingresos EN EFECTIVO (incluir apertura, excluir banco)
-        total_ingresos = movimientos.filter(
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='[BANCO]'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        total_egresos = movimientos.filter(tipo='EGRESO').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Dinero en caja = total ingresos efectivo - total egresos
-        # (total_ingresos ya incluye la apertura)
-        saldo_caja = total_ingresos - total_egresos
-    else:
-        # Caja CERRADA: mostrar dinero_en_caja de la última caja cerrada
-        ultima_caja_cerrada = CajaRegistradora.objects.filter(
-            estado='CERRADA'
-        ).order_by('-fecha_cierre').first()
-        
-        if ultima_caja_cerrada and ultima_caja_cerrada.dinero_en_caja:
-            saldo_caja = ultima_caja_cerrada.dinero_en_caja
-    
-    # ========== CALCULAR BANCO PRINCIPAL ==========
-    # Calcular saldo dinámicamente: entradas banco - gastos/compras desde banco
-    
-    # 1. Suma de TODAS las entradas [BANCO] de MovimientoCaja
-    total_entradas_banco = MovimientoCaja.objects.filter(
-        tipo='INGRESO',
-        descripcion__icontains='[BANCO]'
-    ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-    
-    # 2. Restar gastos/compras realizados desde banco (TransaccionGeneral de tipo EGRESO en cuenta banco)
-    total_egresos_banco = Decimal('0.00')
-    if cuenta_banco:
-        total_egresos_banco = TransaccionGeneral.objects.filter(
-            cuenta=cuenta_banco,
-            tipo='EGRESO'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-    
-    # 3. Saldo banco = entradas - egresos
-    saldo_banco = total_entradas_banco - total_egresos_banco
-    
-    # ========== CALCULAR DINERO GUARDADO ==========
-    # El dinero guardado se calcula SOLO de las cajas cerradas
-    # Las transacciones automáticas de cierre se crean pero NO se suman (evitar duplicación)
-    cuenta_reserva = Cuenta.objects.filter(tipo='RESERVA', activo=True).first()
-    
-    # Total de dinero guardado de cierres de caja
-    cajas_cerradas = CajaRegistradora.objects.filter(estado='CERRADA')
-    total_dinero_guardado_cajas = sum(
-        caja.dinero_guardado or Decimal('0.00') 
-        for caja in cajas_cerradas
+    # Solo la primera página de transacciones; el resto se carga al hacer scroll
+    transacciones, cursor_siguiente = _pagina_transacciones(
+        TransaccionGeneral.objects.all(), None, POR_PAGINA_TRANSACCIONES
     )
     
-    # Solo transacciones manuales en cuenta reserva (NO incluir cierres automáticos)
-    transacciones_reserva_manuales = Decimal('0.00')
-    if cuenta_reserva:
-        # Excluir transacciones automáticas de cierre para evitar duplicación
-        ingresos_reserva = TransaccionGeneral.objects.filter(
-            cuenta=cuenta_reserva,
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='Cierre caja'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        egresos_reserva = TransaccionGeneral.objects.filter(
-            cuenta=cuenta_reserva,
-            tipo='EGRESO'
-        ).exclude(
-            descripcion__icontains='Cierre caja'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        transacciones_reserva_manuales = ingresos_reserva - egresos_reserva
-    
-    # SOLO el dinero de cajas + ajustes manuales (NO duplicar cierres automáticos)
-    saldo_reserva = total_dinero_guardado_cajas + transacciones_reserva_manuales
-    
-    # ========== TOTAL DISPONIBLE ==========
-    saldo_total = saldo_caja + saldo_banco + saldo_reserva
-    
-    # Obtener TODAS las transacciones de Tesorería
-    transacciones = TransaccionGeneral.objects.select_related(
-        'tipo_movimiento', 'cuenta', 'usuario'
-    ).order_by('-fecha')
-    
     context = {
-        'saldo_caja': saldo_caja,
-        'saldo_banco': saldo_banco,
-        'saldo_reserva': saldo_reserva,
-        'saldo_total': saldo_total,
+        'saldo_caja': saldos.caja,
+        'saldo_banco': saldos.banco,
+        'saldo_reserva': saldos.reserva,
+        'saldo_total': saldos.total,
         'transacciones': transacciones,
-        'cuenta_banco': cuenta_banco,
-        'cuenta_reserva': cuenta_reserva,
+        'cursor_siguiente': cursor_siguiente,
+        'cuentas': Cuenta.objects.filter(activo=True).only('id', 'nombre'),
+        'cuenta_banco_id': saldos.banco_id,
+        'cuenta_reserva_id': saldos.reserva_id,
     }
     
     return render(request, 'caja/tesoreria/dashboard.html', context)
 
 
-@staff_or_permission_required('users.can_manage_caja')
-def get_saldos_tesoreria(request):
+# Transacciones por página en el dashboard de tesorería
+POR_PAGINA_TRANSACCIONES = 25
+MAX_POR_PAGINA_TRANSACCIONES = 100
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _cursor_transaccion(trans):
+    """Cursor de paginación (fecha en microsegundos + id) de una transacción."""
+    microsegundos = (trans.fecha - _EPOCA) // timedelta(microseconds=1)
+    return f'{microsegundos}-{trans.id}'
+
+
+def _leer_cursor_transaccion(cursor):
+    """Devuelve (fecha, id) del cursor, o None si no es válido."""
+    try:
+        microsegundos, trans_id = cursor.split('-')
+        return _EPOCA + timedelta(microseconds=int(microsegundos)), int(trans_id)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _pagina_transacciones(transacciones, cursor, por_pagina):
     """
-    Devuelve los saldos actuales de todas las cuentas (Caja, Banco, Reserva).
-    Endpoint JSON para actualización en tiempo real.
+    Página de transacciones ordenada por (fecha, id) descendente, empezando
+    después del cursor (o desde la más reciente si no hay cursor).
+    Devuelve (transacciones, cursor_siguiente); cursor_siguiente es None en
+    la última página.
+    """
+    if cursor is not None:
+        fecha_cursor, id_cursor = cursor
+        transacciones = transacciones.filter(
+            Q(fecha__lt=fecha_cursor) | Q(fecha=fecha_cursor, id__lt=id_cursor)
+        )
+    
+    # Un registro extra para saber si hay más páginas
+    pagina = list(
+        transacciones.select_related(
+            'tipo_movimiento', 'cuenta', 'usuario'
+        ).order_by('-fecha', '-id')[:por_pagina + 1]
+    )
+    if len(pagina) > por_pagina:
+        pagina = pagina[:por_pagina]
+        return pagina, _cursor_transaccion(pagina[-1])
+    return pagina, None
+
+
+@staff_or_permission_required('users.can_view_caja')
+def transacciones_tesoreria_ajax(request):
+    """
+    Página de transacciones de tesorería para el scroll infinito del dashboard.
+    
+    Filtros (GET): cuenta (id), tipo (INGRESO/EGRESO), fecha_desde y
+    fecha_hasta (YYYY-MM-DD) y q (texto en descripción, referencia o tipo de
+    movimiento). La paginación es por cursor: el cliente envía el
+    cursor_siguiente de la respuesta anterior.
     """
     if request.method != 'GET':
         return JsonResponse({'error': 'Método no permitido'}, status=405)
     
-    # ========== DINERO EN CAJA ==========
-    caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
-    saldo_caja = Decimal('0.00')
+    try:
+        por_pagina = int(request.GET.get('por_pagina', POR_PAGINA_TRANSACCIONES))
+    except ValueError:
+        por_pagina = POR_PAGINA_TRANSACCIONES
+    por_pagina = min(max(por_pagina, 1), MAX_POR_PAGINA_TRANSACCIONES)
     
-    if caja_abierta:
-        # Caja ABIERTA: calcular en tiempo real (SIN entradas banco)
-        movimientos = MovimientoCaja.objects.filter(caja=caja_abierta)
-        
-        total_ingresos = movimientos.filter(
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='[BANCO]'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        total_egresos = movimientos.filter(tipo='EGRESO').aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        saldo_caja = total_ingresos - total_egresos
-    else:
-        # Caja CERRADA: mostrar dinero_en_caja de la última caja cerrada
-        ultima_caja_cerrada = CajaRegistradora.objects.filter(
-            estado='CERRADA'
-        ).order_by('-fecha_cierre').first()
-        
-        if ultima_caja_cerrada and ultima_caja_cerrada.dinero_en_caja:
-            saldo_caja = ultima_caja_cerrada.dinero_en_caja
+    transacciones = TransaccionGeneral.objects.all()
     
-    # ========== BANCO PRINCIPAL ==========
-    # Calcular saldo dinámicamente: entradas banco - gastos/compras desde banco
-    cuenta_banco = Cuenta.objects.filter(tipo='BANCO', activo=True).first()
-    banco_id = cuenta_banco.id if cuenta_banco else None
+    cuenta_id = request.GET.get('cuenta', '')
+    if cuenta_id:
+        if not cuenta_id.isdigit():
+            return JsonResponse({'error': 'Cuenta no válida'}, status=400)
+        transacciones = transacciones.filter(cuenta_id=int(cuenta_id))
     
-    # 1. Suma de TODAS las entradas [BANCO] de MovimientoCaja
-    total_entradas_banco = MovimientoCaja.objects.filter(
-        tipo='INGRESO',
-        descripcion__icontains='[BANCO]'
-    ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+    tipo = request.GET.get('tipo', '')
+    if tipo:
+        if tipo not in TransaccionGeneral.TipoTransaccionChoices.values:
+            return JsonResponse({'error': 'Tipo de transacción no válido'}, status=400)
+        transacciones = transacciones.filter(tipo=tipo)
     
-    # 2. Restar gastos/compras realizados desde banco
-    total_egresos_banco = Decimal('0.00')
-    if cuenta_banco:
-        total_egresos_banco = TransaccionGeneral.objects.filter(
-            cuenta=cuenta_banco,
-            tipo='EGRESO'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+    fecha_desde = request.GET.get('fecha_desde', '')
+    fecha_hasta = request.GET.get('fecha_hasta', '')
+    try:
+        if fecha_desde:
+            transacciones = transacciones.filter(
+                fecha__gte=timezone.make_aware(datetime.strptime(fecha_desde, '%Y-%m-%d'))
+            )
+        if fecha_hasta:
+            transacciones = transacciones.filter(
+                fecha__lte=timezone.make_aware(datetime.strptime(fecha_hasta + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
+            )
+    except ValueError:
+        return JsonResponse({'error': 'Formato de fecha no válido (use AAAA-MM-DD)'}, status=400)
     
-    # 3. Saldo banco = entradas - egresos
-    saldo_banco = total_entradas_banco - total_egresos_banco
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        transacciones = transacciones.filter(
+            Q(descripcion__icontains=busqueda) |
+            Q(referencia__icontains=busqueda) |
+            Q(tipo_movimiento__nombre__icontains=busqueda)
+        )
     
-    # ========== DINERO GUARDADO (RESERVA) ==========
-    # El dinero guardado se calcula SOLO de las cajas cerradas
-    # Las transacciones automáticas de cierre se crean pero NO se suman (evitar duplicación)
-    cuenta_reserva = Cuenta.objects.filter(tipo='RESERVA', activo=True).first()
-    reserva_id = cuenta_reserva.id if cuenta_reserva else None
+    cursor = _leer_cursor_transaccion(request.GET.get('cursor'))
+    pagina, cursor_siguiente = _pagina_transacciones(transacciones, cursor, por_pagina)
     
-    # Total de dinero guardado de cierres de caja
-    cajas_cerradas = CajaRegistradora.objects.filter(estado='CERRADA')
-    total_dinero_guardado_cajas = sum(
-        caja.dinero_guardado or Decimal('0.00') 
-        for caja in cajas_cerradas
+    # Las filas se renderizan con la misma plantilla del dashboard
+    html = render_to_string(
+        'caja/tesoreria/_filas_transacciones.html',
+        {'transacciones': pagina},
+        request=request,
     )
     
-    # Solo transacciones manuales en cuenta reserva (NO incluir cierres automáticos)
-    transacciones_reserva_manuales = Decimal('0.00')
-    if cuenta_reserva:
-        # Excluir transacciones automáticas de cierre para evitar duplicación
-        ingresos_reserva = TransaccionGeneral.objects.filter(
-            cuenta=cuenta_reserva,
-            tipo='INGRESO'
-        ).exclude(
-            descripcion__icontains='Cierre caja'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        egresos_reserva = TransaccionGeneral.objects.filter(
-            cuenta=cuenta_reserva,
-            tipo='EGRESO'
-        ).exclude(
-            descripcion__icontains='Cierre caja'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        transacciones_reserva_manuales = ingresos_reserva - egresos_reserva
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'cantidad': len(pagina),
+        'cursor_siguiente': cursor_siguiente,
+        'tiene_siguiente': cursor_siguiente is not None,
+    })
+
+
+@staff_or_permission_required('users.can_manage_caja')
+def get_saldos_tesoreria(request):
+    """
+    Devuelve los saldos actuales de todas las cuentas (Caja, Banco, Reserva).
+    Endpoint JSON para actualización en tiempo real.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
     
-    # SOLO el dinero de cajas + ajustes manuales (NO duplicar cierres automáticos)
-    saldo_reserva = total_dinero_guardado_cajas + transacciones_reserva_manuales
+    saldos = SaldosService.calcular()
     
     return JsonResponse({
         'success': True,
         'caja': {
-            'saldo': float(saldo_caja)
+            'saldo': float(saldos.caja)
         },
         'banco': {
-            'id': banco_id,
-            'saldo': float(saldo_banco)
+            'id': saldos.banco_id,
+            'saldo': float(saldos.banco)
         },
         'reserva': {
-            'id': reserva_id,
-            'saldo': float(saldo_reserva)
+            'id': saldos.reserva_id,
+            'saldo': float(saldos.reserva)
         }
     })
 
@@ -301,50 +254,32 @@ def registrar_egreso_tesoreria(request):
         with transaction.atomic():
             if origen == 'CAJA':
                 # Registrar egreso en Caja
-                caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+                caja_abierta = CajaRegistradora.caja_abierta()
                 
                 if not caja_abierta:
                     return JsonResponse({
                         'error': 'No hay una caja abierta. Debe abrir una caja primero.'
                     }, status=400)
                 
-                # Calcular saldo disponible
-                movimientos = MovimientoCaja.objects.filter(caja=caja_abierta)
-                
-                total_entradas_banco = movimientos.filter(
-                    tipo='INGRESO',
-                    descripcion__icontains='[BANCO]'
-                ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-                
-                total_ingresos = movimientos.filter(
-                    tipo='INGRESO'
-                ).exclude(
-                    descripcion__icontains='[BANCO]'
-                ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-                
-                total_egresos = movimientos.filter(tipo='EGRESO').aggregate(
-                    total=Sum('monto')
-                )['total'] or Decimal('0.00')
-                
+                # Calcular saldo disponible (una sola consulta)
                 # Saldo disponible = dinero en caja + entradas banco
                 # dinero_en_caja = total_ingresos - total_egresos (ya incluye apertura)
-                dinero_en_caja = total_ingresos - total_egresos
-                saldo_disponible = dinero_en_caja + total_entradas_banco
+                saldo_disponible = calcular_totales_caja(caja_abierta).saldo_disponible
                 
                 if monto > saldo_disponible:
                     return JsonResponse({
                         'error': f'Fondos insuficientes en caja. Disponible: ${saldo_disponible:,.2f}'
                     }, status=400)
                 
-                # Crear MovimientoCaja
-                MovimientoCaja.objects.create(
+                # Crear MovimientoCaja (y su transacción en tesorería)
+                registrar_movimiento(
                     caja=caja_abierta,
                     tipo_movimiento=tipo_movimiento,
                     tipo='EGRESO',
                     monto=monto,
+                    usuario=request.user,
                     descripcion=descripcion,
-                    referencia=referencia,
-                    usuario=request.user
+                    referencia=referencia
                 )
                 
                 origen_nombre = "Caja"
@@ -356,44 +291,9 @@ def registrar_egreso_tesoreria(request):
                 except Cuenta.DoesNotExist:
                     return JsonResponse({'error': 'La cuenta seleccionada no existe'}, status=400)
                 
-                # Validar fondos disponibles calculando dinámicamente
-                if cuenta.tipo == 'BANCO':
-                    # Calcular saldo banco dinámicamente: entradas - egresos
-                    entradas_banco = MovimientoCaja.objects.filter(
-                        tipo='INGRESO',
-                        descripcion__icontains='[BANCO]'
-                    ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-                    
-                    egresos_banco = TransaccionGeneral.objects.filter(
-                        cuenta=cuenta,
-                        tipo='EGRESO'
-                    ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-                    
-                    saldo_disponible = entradas_banco - egresos_banco
-                    
-                    if monto > saldo_disponible:
-                        return JsonResponse({
-                            'error': f'Fondos insuficientes en {cuenta.nombre}. Disponible: ${saldo_disponible:,.2f}'
-                        }, status=400)
-                
-                elif cuenta.tipo == 'RESERVA':
-                    # Para RESERVA, usar dinero_guardado de las cajas cerradas
-                    cajas_cerradas = CajaRegistradora.objects.filter(estado='CERRADA')
-                    total_cajas_cerradas = sum(
-                        caja.dinero_guardado or Decimal('0.00') 
-                        for caja in cajas_cerradas
-                    )
-                    
-                    # Sumar/restar transacciones directas en la cuenta RESERVA
-                    transacciones = TransaccionGeneral.objects.filter(cuenta=cuenta)
-                    ingresos = transacciones.filter(tipo='INGRESO').aggregate(
-                        total=Sum('monto')
-                    )['total'] or Decimal('0.00')
-                    egresos = transacciones.filter(tipo='EGRESO').aggregate(
-                        total=Sum('monto')
-                    )['total'] or Decimal('0.00')
-                    
-                    saldo_disponible = total_cajas_cerradas + ingresos - egresos
+                # Validar fondos disponibles (Banco y Reserva se calculan sin cache)
+                if cuenta.tipo in ('BANCO', 'RESERVA'):
+                    saldo_disponible = SaldosService.saldo_cuenta(cuenta)
                     
                     if monto > saldo_disponible:
                         return JsonResponse({
@@ -462,7 +362,7 @@ def transferir_fondos(request):
             
             if origen == 'CAJA':
                 # Transferir desde Caja
-                caja_abierta = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+                caja_abierta = CajaRegistradora.caja_abierta()
                 
                 if not caja_abierta:
                     return JsonResponse({'error': 'No hay una caja abierta'}, status=400)
@@ -472,9 +372,9 @@ def transferir_fondos(request):
                 # así que no validamos aquí (se asume que el frontend envía el monto correcto)
                 
                 # Crear TransaccionGeneral de ingreso a la cuenta destino
-                tipo_mov_interno, _ = TipoMovimiento.objects.get_or_create(
-                    codigo='TRANSFERENCIA',
-                    defaults={
+                tipo_mov_interno = ReferenciaCaja.tipo_movimiento_sistema(
+                    'TRANSFERENCIA',
+                    {
                         'nombre': 'Transferencia entre Cuentas',
                         'descripcion': 'Movimiento de fondos entre cuentas',
                         'tipo_base': TipoMovimiento.TipoBaseChoices.INTERNO,
@@ -503,41 +403,8 @@ def transferir_fondos(request):
                 except Cuenta.DoesNotExist:
                     return JsonResponse({'error': 'Cuenta origen no válida'}, status=400)
                 
-                # Validar fondos disponibles calculando dinámicamente
-                if cuenta_origen.tipo == 'BANCO':
-                    # Calcular saldo banco dinámicamente: entradas - egresos
-                    entradas_banco = MovimientoCaja.objects.filter(
-                        tipo='INGRESO',
-                        descripcion__icontains='[BANCO]'
-                    ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-                    
-                    egresos_banco = TransaccionGeneral.objects.filter(
-                        cuenta=cuenta_origen,
-                        tipo='EGRESO'
-                    ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-                    
-                    saldo_disponible = entradas_banco - egresos_banco
-                    
-                elif cuenta_origen.tipo == 'RESERVA':
-                    # Usar dinero_guardado de las cajas cerradas
-                    cajas_cerradas = CajaRegistradora.objects.filter(estado='CERRADA')
-                    total_cajas_cerradas = sum(
-                        caja.dinero_guardado or Decimal('0.00') 
-                        for caja in cajas_cerradas
-                    )
-                    
-                    # Sumar/restar transacciones directas en la cuenta RESERVA
-                    transacciones = TransaccionGeneral.objects.filter(cuenta=cuenta_origen)
-                    ingresos = transacciones.filter(tipo='INGRESO').aggregate(
-                        total=Sum('monto')
-                    )['total'] or Decimal('0.00')
-                    egresos = transacciones.filter(tipo='EGRESO').aggregate(
-                        total=Sum('monto')
-                    )['total'] or Decimal('0.00')
-                    
-                    saldo_disponible = total_cajas_cerradas + ingresos - egresos
-                else:
-                    saldo_disponible = cuenta_origen.saldo_actual
+                # Validar fondos disponibles (calculados sin cache)
+                saldo_disponible = SaldosService.saldo_cuenta(cuenta_origen)
                 
                 if monto > saldo_disponible:
                     return JsonResponse({
@@ -545,9 +412,9 @@ def transferir_fondos(request):
                     }, status=400)
                 
                 # Obtener tipo de movimiento para transferencias
-                tipo_mov_interno, _ = TipoMovimiento.objects.get_or_create(
-                    codigo='TRANSFERENCIA',
-                    defaults={
+                tipo_mov_interno = ReferenciaCaja.tipo_movimiento_sistema(
+                    'TRANSFERENCIA',
+                    {
                         'nombre': 'Transferencia entre Cuentas',
                         'descripcion': 'Movimiento de fondos entre cuentas',
                         'tipo_base': TipoMovimiento.TipoBaseChoices.INTERNO,
@@ -618,9 +485,9 @@ def aplicar_balance_cuentas(request):
         cuenta_reserva = Cuenta.objects.filter(tipo='RESERVA', activo=True).first()
         
         # Obtener tipo de movimiento para balance
-        tipo_balance, created = TipoMovimiento.objects.get_or_create(
-            codigo='BALANCE',
-            defaults={
+        tipo_balance = ReferenciaCaja.tipo_movimiento_sistema(
+            'BALANCE',
+            {
                 'nombre': 'Balance de Cuentas',
                 'descripcion': 'Ajuste por diferencias de balance',
                 'tipo_base': TipoMovimiento.TipoBaseChoices.INTERNO,
@@ -662,9 +529,8 @@ def aplicar_balance_cuentas(request):
                         usuario=request.user
                     )
                     
-                    # Actualizar saldo de la cuenta banco
-                    cuenta_banco.saldo_actual = saldo_real
-                    cuenta_banco.save()
+                    # Actualizar saldo de la cuenta banco (UPDATE directo, sin full_clean)
+                    Cuenta.fijar_saldo(cuenta_banco.id, saldo_real)
                     
                     transacciones_creadas += 1
                     resumen_cambios.append(f"Banco Principal: ${diferencia:+,.0f}")
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.humanize',
     'django.contrib.sites',  # Mantenemos para compatibilidad
     
     # Apps de terceros
@@ -121,6 +122,57 @@ DATABASES = {
 }
 
 
+# Cache
+# Por defecto cache en memoria de cada proceso; en producción se puede apuntar
+# a un cache compartido entre workers (ej: CACHE_URL=redis://redis:6379/1)
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+
+# Facturación
+# Números de factura que reserva cada worker de una vez (1 = sin bloques,
+# numeración estrictamente consecutiva). Ver facturacion/secuencias.py
+
+FACTURACION_BLOQUE_NUMEROS = env.int('FACTURACION_BLOQUE_NUMEROS', default=1)
+
+# Fracción de peticiones de facturación que registran tiempo y consultas (0 a 1)
+# y umbral en ms a partir del cual una petición siempre se registra como lenta.
+# Ver facturacion/monitoreo.py
+FACTURACION_LOG_MUESTREO = env.float('FACTURACION_LOG_MUESTREO', default=0.05)
+FACTURACION_LOG_LENTO_MS = env.int('FACTURACION_LOG_LENTO_MS', default=500)
+
+
+# Logging
+# Los mensajes de la aplicación van a la consola (stdout de gunicorn/docker).
+# FACTURACION_LOG_LEVEL=DEBUG muestra el detalle de las peticiones muestreadas.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'facturacion': {
+            'handlers': ['console'],
+            'level': env('FACTURACION_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -24,6 +24,7 @@ urlpatterns = [
     # URLs del dashboard
     path('dashboard/usuarios/', app_views.usuarios_list, name='dashboard_usuarios'),
     path('dashboard/estadisticas/', app_views.estadisticas_caja, name='dashboard_estadisticas'),
+    path('dashboard/estadisticas/csv/', app_views.estadisticas_caja_csv, name='dashboard_estadisticas_csv'),
     path('dashboard/caja/', include('caja.urls')),
     path('dashboard/facturacion/', include('facturacion.urls')),
     
@@ -3,15 +3,18 @@ Vistas del Dashboard Personalizado
 Renzzo Eléctricos - Villavicencio, Meta
 """
 from django.shortcuts import render
+from django.http import StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+import csv
 
 from caja.models import CajaRegistradora, MovimientoCaja
-from facturacion.models import Factura
+from caja.resumen import serie_diaria, inicio_dia, fin_dia
+from facturacion.ventas import resumen_mes
 
 User = get_user_model()
 
@@ -25,7 +28,7 @@ def dashboard_home(request):
     total_usuarios = User.objects.count()
     
     # Caja actual
-    caja_actual = CajaRegistradora.objects.filter(estado='ABIERTA').first()
+    caja_actual = CajaRegistradora.caja_abierta()
     caja_dinero = caja_actual.dinero_en_caja if caja_actual else Decimal('0.00')
     
     # Movimientos de hoy
@@ -34,18 +37,13 @@ def dashboard_home(request):
         fecha_movimiento__date=hoy
     ).count()
     
-    # Facturas del mes
-    inicio_mes = timezone.now().replace(day=1)
-    facturas_mes = Factura.objects.filter(
-        fecha_emision__gte=inicio_mes
-    ).count()
-    
     context = {
         'total_usuarios': total_usuarios,
         'caja_dinero': caja_dinero,
         'caja_abierta': caja_actual is not None,
         'movimientos_hoy': movimientos_hoy,
-        'facturas_mes': facturas_mes,
+        # Facturas, ventas y productos más vendidos del mes (resumen de ventas)
+        **resumen_mes(),
     }
     
     return render(request, 'dashboard_custom/home.html', context)
@@ -89,13 +87,15 @@ def usuarios_list(request):
     return render(request, 'dashboard_custom/usuarios.html', context)
 
 
-@login_required
-def estadisticas_caja(request):
+# Rango máximo que se muestra en pantalla; para rangos más largos usar el CSV
+MAX_DIAS_ESTADISTICAS = 366
+
+
+def _rango_estadisticas(request):
     """
-    Vista de estadísticas de caja con gráficos y métricas
+    Obtiene el rango de fechas de los filtros (últimos 30 días por defecto).
     """
-    # Obtener rango de fechas (últimos 30 días por defecto)
-    fecha_fin = timezone.now().date()
+    fecha_fin = timezone.localdate()
     fecha_inicio = fecha_fin - timedelta(days=30)
     
     # Permitir filtro personalizado
@@ -115,54 +115,88 @@ def estadisticas_caja(request):
         except ValueError:
             pass
     
-    # Obtener movimientos del período
-    movimientos = MovimientoCaja.objects.filter(
-        fecha_movimiento__date__gte=fecha_inicio,
-        fecha_movimiento__date__lte=fecha_fin
-    )
-    
-    # Calcular totales
-    total_ingresos = movimientos.filter(tipo='INGRESO').aggregate(
-        total=Sum('monto')
-    )['total'] or Decimal('0.00')
+    return fecha_inicio, fecha_fin
+
+
+@login_required
+def estadisticas_caja(request):
+    """
+    Vista de estadísticas de caja con gráficos y métricas
+    """
+    fecha_inicio, fecha_fin = _rango_estadisticas(request)
     
-    total_egresos = movimientos.filter(tipo='EGRESO').aggregate(
-        total=Sum('monto')
-    )['total'] or Decimal('0.00')
+    # Limitar el rango mostrado en pantalla
+    rango_recortado = (fecha_fin - fecha_inicio).days + 1 > MAX_DIAS_ESTADISTICAS
+    if rango_recortado:
+        fecha_inicio = fecha_fin - timedelta(days=MAX_DIAS_ESTADISTICAS - 1)
     
-    # Movimientos por día (para gráfico)
+    # Movimientos por día (para gráfico) y totales: una consulta agrupada
+    # sobre el resumen diario; los días sin movimientos quedan en cero
     movimientos_por_dia = {}
-    current_date = fecha_inicio
-    while current_date <= fecha_fin:
-        ingresos_dia = movimientos.filter(
-            fecha_movimiento__date=current_date,
-            tipo='INGRESO'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        egresos_dia = movimientos.filter(
-            fecha_movimiento__date=current_date,
-            tipo='EGRESO'
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        movimientos_por_dia[current_date.strftime('%Y-%m-%d')] = {
+    total_ingresos = Decimal('0.00')
+    total_egresos = Decimal('0.00')
+    total_movimientos = 0
+    
+    for fecha, ingresos_dia, egresos_dia, cantidad in serie_diaria(
+        fecha_inicio, fecha_fin, dias_por_consulta=MAX_DIAS_ESTADISTICAS
+    ):
+        movimientos_por_dia[fecha.strftime('%Y-%m-%d')] = {
             'ingresos': float(ingresos_dia),
             'egresos': float(egresos_dia),
         }
-        
-        current_date += timedelta(days=1)
+        total_ingresos += ingresos_dia
+        total_egresos += egresos_dia
+        total_movimientos += cantidad
     
     # Últimos movimientos
-    ultimos_movimientos = movimientos.order_by('-fecha_movimiento')[:10]
+    ultimos_movimientos = MovimientoCaja.objects.filter(
+        fecha_movimiento__gte=inicio_dia(fecha_inicio),
+        fecha_movimiento__lte=fin_dia(fecha_fin)
+    ).order_by('-fecha_movimiento')[:10]
     
     context = {
         'fecha_inicio': fecha_inicio,
         'fecha_fin': fecha_fin,
+        'rango_recortado': rango_recortado,
+        'max_dias': MAX_DIAS_ESTADISTICAS,
         'total_ingresos': total_ingresos,
         'total_egresos': total_egresos,
         'saldo_neto': total_ingresos - total_egresos,
-        'total_movimientos': movimientos.count(),
+        'total_movimientos': total_movimientos,
         'movimientos_por_dia': movimientos_por_dia,
         'ultimos_movimientos': ultimos_movimientos,
     }
     
     return render(request, 'dashboard_custom/estadisticas.html', context)
+
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito (para csv.writer en streaming)."""
+    def write(self, valor):
+        return valor
+
+
+@login_required
+def estadisticas_caja_csv(request):
+    """
+    Exporta la serie diaria de ingresos/egresos en CSV.
+    Se genera en streaming (por tramos) para soportar rangos largos.
+    """
+    fecha_inicio, fecha_fin = _rango_estadisticas(request)
+    escritor = csv.writer(_Eco())
+    
+    def filas():
+        yield escritor.writerow(['fecha', 'ingresos', 'egresos', 'saldo_neto', 'movimientos'])
+        for fecha, ingresos_dia, egresos_dia, cantidad in serie_diaria(fecha_inicio, fecha_fin):
+            yield escritor.writerow([
+                fecha.strftime('%Y-%m-%d'),
+                ingresos_dia,
+                egresos_dia,
+                ingresos_dia - egresos_dia,
+                cantidad,
+            ])
+    
+    nombre = f"estadisticas_caja_{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}.csv"
+    response = StreamingHttpResponse(filas(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return response
@@ -4,7 +4,8 @@ Renzzo Eléctricos - Villavicencio, Meta
 """
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Factura, DetalleFactura
+from .models import Factura, DetalleFactura, SecuenciaDocumento, Producto, PagoFactura, SaldoCliente
+from .ventas import actualizar_dias
 
 
 class DetalleFacturaInline(admin.TabularInline):
@@ -18,6 +19,20 @@ class DetalleFacturaInline(admin.TabularInline):
     ordering = ('orden',)
 
 
+class PagoFacturaInline(admin.TabularInline):
+    """
+    Pagos recibidos de la factura (solo lectura, se registran desde facturación).
+    """
+    model = PagoFactura
+    extra = 0
+    fields = ('fecha_pago', 'monto', 'usuario', 'movimiento_caja', 'referencia')
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Factura)
 class FacturaAdmin(admin.ModelAdmin):
     """
@@ -64,6 +79,8 @@ class FacturaAdmin(admin.ModelAdmin):
             'subtotal_neto',
             'total_iva',
             'total_pagar',
+            'fecha_vencimiento',
+            'saldo_pendiente',
         )
     
     fieldsets = (
@@ -90,6 +107,8 @@ class FacturaAdmin(admin.ModelAdmin):
             'fields': (
                 'metodo_pago',
                 'condicion_pago',
+                'fecha_vencimiento',
+                'saldo_pendiente',
                 'notas',
             )
         }),
@@ -101,7 +120,14 @@ class FacturaAdmin(admin.ModelAdmin):
         }),
     )
     
-    inlines = [DetalleFacturaInline]
+    inlines = [DetalleFacturaInline, PagoFacturaInline]
+    
+    def save_related(self, request, form, formsets, change):
+        """
+        Los detalles editados en línea cambian el resumen de ventas del día.
+        """
+        super().save_related(request, form, formsets, change)
+        actualizar_dias(form.instance.fecha_emision)
     
     def has_delete_permission(self, request, obj=None):
         """
@@ -146,6 +172,7 @@ class DetalleFacturaAdmin(admin.ModelAdmin):
         'cantidad',
         'precio_unitario',
         'descuento',
+        'tasa_iva',
         'total_formatted',
     )
     
@@ -172,8 +199,134 @@ class DetalleFacturaAdmin(admin.ModelAdmin):
         """
         return request.user.is_superuser
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        actualizar_dias(obj.factura.fecha_emision)
+    
+    def delete_model(self, request, obj):
+        fecha = obj.factura.fecha_emision
+        super().delete_model(request, obj)
+        actualizar_dias(fecha)
+    
+    def delete_queryset(self, request, queryset):
+        fechas = list(queryset.values_list('factura__fecha_emision', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        actualizar_dias(*fechas)
+    
     def total_formatted(self, obj):
         """Formatea el total con símbolo de pesos"""
         return f"${obj.total:,.2f}"
     total_formatted.short_description = 'Total'
     total_formatted.admin_order_field = 'total'
+
+
+@admin.register(SecuenciaDocumento)
+class SecuenciaDocumentoAdmin(admin.ModelAdmin):
+    """
+    Consecutivos de numeración de documentos.
+    """
+    list_display = (
+        'prefijo',
+        'anio',
+        'ultimo_numero',
+        'fecha_modificacion',
+    )
+    
+    def get_readonly_fields(self, request, obj=None):
+        """
+        Solo superusuarios pueden corregir el consecutivo (ej: migrar numeración).
+        """
+        if request.user.is_superuser:
+            return ('fecha_modificacion',)
+        return ('prefijo', 'anio', 'ultimo_numero', 'fecha_modificacion')
+    
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+
+@admin.register(Producto)
+class ProductoAdmin(admin.ModelAdmin):
+    """
+    Catálogo de productos para facturación.
+    Para cargas masivas usar: python manage.py importar_productos archivo.csv
+    """
+    list_display = (
+        'codigo',
+        'nombre',
+        'upc',
+        'precio',
+        'costo',
+        'stock',
+        'activo',
+    )
+    
+    list_filter = (
+        'activo',
+    )
+    
+    search_fields = (
+        'codigo',
+        'upc',
+        'nombre',
+    )
+    
+    readonly_fields = ('fecha_modificacion',)
+
+
+@admin.register(PagoFactura)
+class PagoFacturaAdmin(admin.ModelAdmin):
+    """
+    Pagos de facturas a crédito. Solo lectura: cada pago tiene su
+    movimiento en caja y se registra desde facturación.
+    """
+    list_display = (
+        'factura',
+        'fecha_pago',
+        'monto',
+        'usuario',
+        'movimiento_caja',
+    )
+    
+    search_fields = (
+        'factura__codigo_factura',
+        'referencia',
+    )
+    
+    list_select_related = ('factura', 'usuario', 'movimiento_caja')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SaldoCliente)
+class SaldoClienteAdmin(admin.ModelAdmin):
+    """
+    Saldo pendiente por cliente (calculado).
+    Para reconstruirlo usar: python manage.py recalcular_cartera
+    """
+    list_display = (
+        'cliente',
+        'saldo',
+        'facturas_abiertas',
+        'fecha_modificacion',
+    )
+    
+    search_fields = (
+        'cliente__username',
+        'cliente__first_name',
+        'cliente__last_name',
+    )
+    
+    list_select_related = ('cliente',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,243 @@
+"""
+Búsqueda de clientes y productos para los Select2 de facturación.
+Renzzo Eléctricos - Villavicencio, Meta
+
+Los datos buscables se guardan como términos normalizados en
+TerminoBusquedaCliente / TerminoBusquedaProducto. Cada palabra escrita debe
+ser prefijo de algún término del registro; los resultados se ordenan por
+relevancia (coincidencia exacta antes que prefijo) en una sola consulta
+agrupada sobre el índice (termino, registro).
+"""
+import re
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from .models import Producto, TerminoBusquedaCliente, TerminoBusquedaProducto
+
+User = get_user_model()
+
+LARGO_TERMINO = TerminoBusquedaCliente._meta.get_field('termino').max_length
+
+# Palabras de la búsqueda que se tienen en cuenta
+MAX_PALABRAS = 5
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Peña Ávila' → 'pena avila'."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def palabras(texto):
+    """Palabras alfanuméricas normalizadas de un texto."""
+    return re.findall(r'[a-z0-9]+', normalizar(texto))
+
+
+def _terminos(textos, completos):
+    """
+    Palabras de `textos` más los valores `completos` enteros (y solo con
+    dígitos, para buscar '900123' si se guardó '900.123-4').
+    """
+    terminos = set()
+    for valor in (*textos, *completos):
+        terminos.update(palabras(valor))
+
+    for valor in completos:
+        completo = normalizar(valor).strip()
+        if completo:
+            terminos.add(completo)
+            digitos = re.sub(r'\D', '', completo)
+            if len(digitos) > 3:
+                terminos.add(digitos)
+
+    return {termino[:LARGO_TERMINO] for termino in terminos}
+
+
+def terminos_cliente(first_name, last_name, username, email, telefono):
+    """Términos de búsqueda de un cliente: nombre, NIT, email y teléfono."""
+    return _terminos((first_name, last_name), (username, email, telefono))
+
+
+def terminos_producto(nombre, codigo, upc):
+    """Términos de búsqueda de un producto: nombre, código y código de barras."""
+    return _terminos((nombre,), (codigo, upc))
+
+
+def _ranking(terminos, campo, texto, inicio, cantidad, **filtros):
+    """
+    IDs (campo) de los registros cuyos términos coinciden con todas las
+    palabras de `texto`, por relevancia. Devuelve (ids, hay_mas).
+    `filtros` se aplican en la misma consulta (ej: solo activos).
+    """
+    buscadas = list(dict.fromkeys(palabras(texto)))[:MAX_PALABRAS]
+
+    # Solo filas del índice que empiezan por alguna de las palabras
+    condicion = Q()
+    for palabra in buscadas:
+        condicion |= Q(termino__istartswith=palabra)
+
+    # Por registro: 2 si alguna palabra coincide exacta, 1 si solo como prefijo
+    puntajes = {
+        f'p{i}': Max(Case(
+            When(termino=palabra, then=Value(2)),
+            When(termino__istartswith=palabra, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        for i, palabra in enumerate(buscadas)
+    }
+
+    filas = (
+        terminos.objects
+        .filter(condicion, **filtros)
+        .values(campo)
+        .annotate(**puntajes)
+        # Todas las palabras deben coincidir con algún término del registro
+        .filter(**{f'{nombre}__gt': 0 for nombre in puntajes})
+        .annotate(puntaje=sum((F(nombre) for nombre in puntajes), Value(0)))
+        .order_by('-puntaje', campo)
+    )
+
+    ids = [fila[campo] for fila in filas[inicio:inicio + cantidad + 1]]
+    return ids[:cantidad], len(ids) > cantidad
+
+
+def _sincronizar_terminos(terminos, campo, nuevos_por_id):
+    """
+    Deja en el índice exactamente los términos de `nuevos_por_id`
+    ({id: set(terminos)}), escribiendo solo las diferencias.
+    """
+    actuales = {registro_id: set() for registro_id in nuevos_por_id}
+    for registro_id, termino in terminos.objects.filter(
+        **{f'{campo}__in': list(nuevos_por_id)}
+    ).values_list(campo, 'termino'):
+        actuales[registro_id].add(termino)
+
+    sobrantes = Q()
+    faltantes = []
+    for registro_id, nuevos in nuevos_por_id.items():
+        quitar = actuales[registro_id] - nuevos
+        if quitar:
+            sobrantes |= Q(**{campo: registro_id, 'termino__in': quitar})
+        faltantes.extend(
+            terminos(**{campo: registro_id, 'termino': termino})
+            for termino in nuevos - actuales[registro_id]
+        )
+
+    if sobrantes:
+        terminos.objects.filter(sobrantes).delete()
+    if faltantes:
+        terminos.objects.bulk_create(faltantes, batch_size=2000, ignore_conflicts=True)
+
+
+# ============================================================================
+# CLIENTES
+# ============================================================================
+
+def indexar_cliente(usuario):
+    """
+    Sincroniza los términos de un usuario: los clientes quedan indexados y
+    los demás roles sin términos. Solo escribe las diferencias.
+    """
+    if usuario.rol == User.RoleChoices.CLIENTE:
+        nuevos = terminos_cliente(
+            usuario.first_name, usuario.last_name, usuario.username,
+            usuario.email, usuario.telefono
+        )
+    else:
+        nuevos = set()
+
+    _sincronizar_terminos(TerminoBusquedaCliente, 'cliente_id', {usuario.pk: nuevos})
+
+
+def clientes_activos():
+    return User.objects.filter(rol=User.RoleChoices.CLIENTE, activo=True, is_active=True)
+
+
+def buscar_clientes(texto, pagina=1, por_pagina=20):
+    """
+    Página de clientes activos que coinciden con `texto`.
+    Devuelve (clientes, hay_mas). Sin texto lista todos por nombre.
+    """
+    inicio = (pagina - 1) * por_pagina
+
+    if not palabras(texto):
+        clientes = list(
+            clientes_activos().order_by('first_name', 'last_name', 'id')[inicio:inicio + por_pagina + 1]
+        )
+        return clientes[:por_pagina], len(clientes) > por_pagina
+
+    ids, hay_mas = _ranking(
+        TerminoBusquedaCliente, 'cliente_id', texto, inicio, por_pagina,
+        cliente__rol=User.RoleChoices.CLIENTE,
+        cliente__activo=True,
+        cliente__is_active=True,
+    )
+    por_id = User.objects.in_bulk(ids)
+    return [por_id[cliente_id] for cliente_id in ids if cliente_id in por_id], hay_mas
+
+
+def reconstruir_indice_clientes(lote=2000):
+    """
+    Reconstruye TerminoBusquedaCliente para todos los clientes en una sola
+    transacción, leyendo los clientes por lotes. Devuelve (clientes, terminos).
+    """
+    total_clientes = 0
+    total_terminos = 0
+    ultimo_id = 0
+
+    with transaction.atomic():
+        TerminoBusquedaCliente.objects.all().delete()
+
+        while True:
+            bloque = list(
+                User.objects.filter(rol=User.RoleChoices.CLIENTE, id__gt=ultimo_id)
+                .order_by('id')
+                .values_list('id', 'first_name', 'last_name', 'username', 'email', 'telefono')[:lote]
+            )
+            if not bloque:
+                break
+            ultimo_id = bloque[-1][0]
+
+            nuevos = [
+                TerminoBusquedaCliente(cliente_id=cliente_id, termino=termino)
+                for cliente_id, *datos in bloque
+                for termino in terminos_cliente(*datos)
+            ]
+            TerminoBusquedaCliente.objects.bulk_create(nuevos, batch_size=lote)
+
+            total_clientes += len(bloque)
+            total_terminos += len(nuevos)
+
+    return total_clientes, total_terminos
+
+
+# ============================================================================
+# PRODUCTOS
+# ============================================================================
+
+def indexar_productos(productos):
+    """Sincroniza los términos de búsqueda de una lista de productos."""
+    _sincronizar_terminos(TerminoBusquedaProducto, 'producto_id', {
+        producto.pk: terminos_producto(producto.nombre, producto.codigo, producto.upc)
+        for producto in productos
+    })
+
+
+def buscar_productos(texto, pagina=1, por_pagina=20):
+    """
+    Página de productos activos que coinciden con `texto` (palabras del
+    nombre, código o código de barras). Devuelve (productos, hay_mas).
+    """
+    if not palabras(texto):
+        return [], False
+
+    ids, hay_mas = _ranking(
+        TerminoBusquedaProducto, 'producto_id', texto, (pagina - 1) * por_pagina, por_pagina,
+        producto__activo=True,
+    )
+    por_id = Producto.objects.in_bulk(ids)
+    return [por_id[producto_id] for producto_id in ids if producto_id in por_id], hay_mas
@@ -0,0 +1,236 @@
+"""
+Cuentas por cobrar: saldos de facturas a crédito, pagos y antigüedad.
+Renzzo Eléctricos - Villavicencio, Meta
+
+- Cada factura a crédito nace con saldo_pendiente = total_pagar y su
+  fecha_vencimiento según la condición de pago.
+- registrar_pago() crea el MovimientoCaja (COBRO_CXC) en la caja abierta,
+  el PagoFactura enlazado y descuenta el saldo de la factura y del cliente.
+- SaldoCliente guarda el saldo por cliente; se actualiza con F() en la
+  emisión y en los pagos, y se recalcula al anular o modificar facturas.
+- antiguedad_cartera() agrupa los saldos por cliente y rango de días
+  vencidos en una sola consulta sobre el índice de cartera.
+"""
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from caja.models import CajaRegistradora, MovimientoCaja
+from caja.movimientos import registrar_movimiento
+from caja.referencia import ReferenciaCaja
+
+from .models import Factura, PagoFactura, SaldoCliente
+
+
+CERO = Decimal('0.00')
+
+# Tipo de movimiento de caja de los pagos de facturas a crédito
+CODIGO_COBRO_CXC = 'COBRO_CXC'
+
+# Rangos de antigüedad: (nombre, días vencidos desde, hasta) - hasta None = sin límite
+RANGOS_ANTIGUEDAD = (
+    ('dias_0_15', 0, 15),
+    ('dias_16_30', 16, 30),
+    ('dias_31_60', 31, 60),
+    ('dias_61_90', 61, 90),
+    ('dias_mas_90', 91, None),
+)
+
+
+def facturas_con_saldo():
+    return Factura.objects.filter(activa=True, saldo_pendiente__gt=0)
+
+
+def _sumar_saldo_cliente(cliente_id, saldo, abiertas):
+    """Suma al SaldoCliente con un UPDATE atómico; crea la fila si no existe."""
+    cambios = {
+        'saldo': F('saldo') + saldo,
+        'facturas_abiertas': F('facturas_abiertas') + abiertas,
+        'fecha_modificacion': timezone.now(),
+    }
+    if SaldoCliente.objects.filter(cliente_id=cliente_id).update(**cambios):
+        return
+
+    try:
+        # Savepoint: si otra petición creó la fila al mismo tiempo, sumar sobre ella
+        with transaction.atomic():
+            SaldoCliente.objects.create(cliente_id=cliente_id, saldo=saldo, facturas_abiertas=abiertas)
+    except IntegrityError:
+        SaldoCliente.objects.filter(cliente_id=cliente_id).update(**cambios)
+
+
+def registrar_credito(factura):
+    """Suma una factura recién emitida al saldo de su cliente (si quedó con saldo)."""
+    if factura.activa and factura.saldo_pendiente > 0:
+        _sumar_saldo_cliente(factura.cliente_id, factura.saldo_pendiente, 1)
+
+
+def recalcular_saldo_cliente(cliente_id):
+    """Recalcula el SaldoCliente desde las facturas con saldo del cliente."""
+    totales = facturas_con_saldo().filter(cliente_id=cliente_id).aggregate(
+        saldo=Sum('saldo_pendiente'),
+        abiertas=Count('id'),
+    )
+    SaldoCliente.objects.update_or_create(
+        cliente_id=cliente_id,
+        defaults={'saldo': totales['saldo'] or CERO, 'facturas_abiertas': totales['abiertas']},
+    )
+
+
+def registrar_pago(factura_id, monto, usuario, canal=MovimientoCaja.CanalChoices.EFECTIVO, referencia=''):
+    """
+    Registra un abono a una factura a crédito. Lanza ValueError con el
+    motivo si no se puede registrar. Devuelve el PagoFactura creado.
+    """
+    try:
+        monto = Decimal(str(monto)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        monto = None
+    if monto is None or not monto.is_finite():
+        raise ValueError('Monto no válido')
+    if monto <= 0:
+        raise ValueError('El monto debe ser mayor a cero')
+    if canal not in MovimientoCaja.CanalChoices.values:
+        raise ValueError('Canal de pago no válido')
+
+    with transaction.atomic():
+        # Bloquear la factura: dos pagos simultáneos no pueden pasarse del saldo
+        factura = Factura.objects.select_for_update().filter(id=factura_id).first()
+        if factura is None:
+            raise ValueError('Factura no encontrada')
+        if not factura.activa:
+            raise ValueError('La factura está anulada')
+        if factura.saldo_pendiente <= 0:
+            raise ValueError('La factura no tiene saldo pendiente')
+        if monto > factura.saldo_pendiente:
+            raise ValueError(f'El monto supera el saldo pendiente (${factura.saldo_pendiente:,.2f})')
+
+        caja = CajaRegistradora.caja_abierta()
+        if caja is None:
+            raise ValueError('No hay una caja abierta en el sistema')
+        tipo_movimiento = ReferenciaCaja.tipo_movimiento_sistema(
+            CODIGO_COBRO_CXC,
+            {
+                'nombre': 'Cobro Cuentas por Cobrar',
+                'descripcion': 'Pagos recibidos de facturas a crédito',
+                'tipo_base': 'INGRESO',
+                'activo': True,
+            }
+        )
+
+        movimiento = registrar_movimiento(
+            caja=caja,
+            tipo_movimiento=tipo_movimiento,
+            tipo='INGRESO',
+            monto=monto,
+            usuario=usuario,
+            descripcion=f'Cobro factura {factura.codigo_factura}',
+            referencia=factura.codigo_factura,
+            canal=canal,
+        )
+        pago = PagoFactura.objects.create(
+            factura=factura,
+            movimiento_caja=movimiento,
+            monto=monto,
+            usuario=usuario,
+            referencia=referencia,
+        )
+
+        # update() en vez de save(): no dispara las señales de Factura
+        saldo = factura.saldo_pendiente - monto
+        Factura.objects.filter(id=factura.id).update(saldo_pendiente=saldo, fecha_modificacion=timezone.now())
+        factura.saldo_pendiente = saldo
+        _sumar_saldo_cliente(factura.cliente_id, -monto, -1 if saldo == 0 else 0)
+
+    return pago
+
+
+def antiguedad_cartera(hoy=None, cliente_id=None):
+    """
+    Saldos por cliente repartidos en rangos de días vencidos (una consulta
+    agrupada). Las facturas que aún no vencen van en 'por_vencer'.
+    Devuelve (filas por cliente ordenadas por saldo, totales).
+    """
+    hoy = hoy or timezone.localdate()
+
+    rangos = {'por_vencer': Sum('saldo_pendiente', filter=Q(fecha_vencimiento__gt=hoy))}
+    for nombre, desde, hasta in RANGOS_ANTIGUEDAD:
+        condicion = Q(fecha_vencimiento__lte=hoy - timedelta(days=desde))
+        if hasta is not None:
+            condicion &= Q(fecha_vencimiento__gte=hoy - timedelta(days=hasta))
+        rangos[nombre] = Sum('saldo_pendiente', filter=condicion)
+
+    facturas = facturas_con_saldo()
+    if cliente_id is not None:
+        facturas = facturas.filter(cliente_id=cliente_id)
+
+    filas = list(
+        facturas
+        .values('cliente_id', 'cliente__username', 'cliente__first_name', 'cliente__last_name')
+        .annotate(**rangos, saldo=Sum('saldo_pendiente'), facturas=Count('id'))
+        .order_by('-saldo', 'cliente_id')
+    )
+
+    totales = dict.fromkeys([*rangos, 'saldo'], CERO)
+    totales['facturas'] = 0
+    for fila in filas:
+        for campo in rangos:
+            fila[campo] = fila[campo] or CERO
+            totales[campo] += fila[campo]
+        totales['saldo'] += fila['saldo']
+        totales['facturas'] += fila['facturas']
+
+    return filas, totales
+
+
+def recalcular_cartera(lote=2000):
+    """
+    Recalcula saldo_pendiente de las facturas a crédito (total - pagos, con
+    una consulta agrupada de pagos por lote) y reconstruye SaldoCliente.
+    Devuelve la cantidad de facturas corregidas.
+    """
+    corregidas = 0
+    bloque = []
+
+    def procesar():
+        nonlocal corregidas
+        pagos = dict(
+            PagoFactura.objects.filter(factura_id__in=[f.id for f in bloque])
+            .values('factura_id').annotate(total=Sum('monto')).order_by()
+            .values_list('factura_id', 'total')
+        )
+        cambiadas = []
+        for factura in bloque:
+            saldo = max(factura.total_pagar - pagos.get(factura.id, CERO), CERO)
+            if saldo != factura.saldo_pendiente:
+                factura.saldo_pendiente = saldo
+                cambiadas.append(factura)
+        Factura.objects.bulk_update(cambiadas, ['saldo_pendiente'])
+        corregidas += len(cambiadas)
+
+    creditos = (
+        Factura.objects.exclude(condicion_pago=Factura.CondicionPago.CONTADO)
+        .order_by('id')
+        .only('id', 'total_pagar', 'saldo_pendiente')
+    )
+    with transaction.atomic():
+        for factura in creditos.iterator(chunk_size=lote):
+            bloque.append(factura)
+            if len(bloque) >= lote:
+                procesar()
+                bloque = []
+        if bloque:
+            procesar()
+
+        SaldoCliente.objects.all().delete()
+        SaldoCliente.objects.bulk_create([
+            SaldoCliente(cliente_id=fila['cliente_id'], saldo=fila['saldo'], facturas_abiertas=fila['abiertas'])
+            for fila in facturas_con_saldo().values('cliente_id').annotate(
+                saldo=Sum('saldo_pendiente'), abiertas=Count('id')
+            ).order_by()
+        ], batch_size=lote)
+
+    return corregidas
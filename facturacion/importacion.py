@@ -0,0 +1,212 @@
+"""
+Importación masiva del catálogo de productos desde CSV o XLSX.
+Renzzo Eléctricos - Villavicencio, Meta
+
+Las filas se procesan por lotes: una consulta trae los productos existentes
+del lote por código, los nuevos se insertan con bulk_create, los cambiados
+se actualizan con bulk_update y el índice de búsqueda se sincroniza para
+todo el lote de una vez.
+"""
+import csv
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from .busqueda import indexar_productos, normalizar
+from .models import Producto
+
+# Nombres de columna aceptados (normalizados) → campo de Producto
+COLUMNAS = {
+    'codigo': 'codigo', 'sku': 'codigo', 'referencia': 'codigo', 'ref': 'codigo',
+    'upc': 'upc', 'ean': 'upc', 'codigo de barras': 'upc', 'codigo_barras': 'upc',
+    'nombre': 'nombre', 'titulo': 'nombre', 'title': 'nombre', 'descripcion': 'nombre',
+    'precio': 'precio', 'precio venta': 'precio', 'precio_venta': 'precio', 'price': 'precio',
+    'costo': 'costo', 'cost': 'costo', 'precio compra': 'costo', 'precio_compra': 'costo',
+    'stock': 'stock', 'existencias': 'stock', 'cantidad': 'stock',
+}
+
+CAMPOS_ACTUALIZABLES = ('upc', 'nombre', 'precio', 'costo', 'stock', 'activo')
+
+
+class ErrorImportacion(Exception):
+    """El archivo no se puede importar (formato o columnas)."""
+
+
+@dataclass
+class ResultadoImportacion:
+    creados: int = 0
+    actualizados: int = 0
+    sin_cambios: int = 0
+    errores: list = field(default_factory=list)  # [(fila, mensaje)]
+
+
+def convertir_decimal(valor):
+    """
+    Convierte precios en formato colombiano o internacional:
+    '$ 15.000' → 15000, '1.234,50' → 1234.50, '1,234.50' → 1234.50.
+    """
+    if valor is None or valor == '':
+        return Decimal('0.00')
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor)).quantize(Decimal('0.01'))
+
+    texto = re.sub(r'[^\d,.\-]', '', str(valor))
+    if ',' in texto and '.' in texto:
+        # El separador que aparece de último es el decimal
+        if texto.rfind(',') > texto.rfind('.'):
+            texto = texto.replace('.', '').replace(',', '.')
+        else:
+            texto = texto.replace(',', '')
+    elif ',' in texto:
+        texto = texto.replace(',', '') if re.fullmatch(r'-?\d{1,3}(,\d{3})+', texto) else texto.replace(',', '.')
+    elif re.fullmatch(r'-?\d{1,3}(\.\d{3})+', texto):
+        texto = texto.replace('.', '')
+
+    try:
+        return Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'valor numérico no válido: {valor!r}')
+
+
+def leer_filas(ruta, delimitador=None):
+    """
+    Lee un archivo .csv o .xlsx y genera (numero_fila, {campo: valor})
+    con las columnas ya traducidas a campos de Producto.
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() in ('.xlsx', '.xlsm'):
+        filas = _filas_xlsx(ruta)
+    elif ruta.suffix.lower() in ('.csv', '.txt'):
+        filas = _filas_csv(ruta, delimitador)
+    else:
+        raise ErrorImportacion(f'Formato no soportado: {ruta.suffix} (use .csv o .xlsx)')
+
+    encabezados = next(filas, None)
+    if not encabezados:
+        raise ErrorImportacion('El archivo está vacío')
+
+    campos = [COLUMNAS.get(normalizar(nombre).strip()) for nombre in encabezados]
+    for requerido in ('codigo', 'nombre'):
+        if requerido not in campos:
+            raise ErrorImportacion(f'Falta la columna "{requerido}" en el encabezado')
+
+    for numero, valores in enumerate(filas, start=2):
+        if not any(v not in (None, '') for v in valores):
+            continue
+        yield numero, {
+            campo: valor for campo, valor in zip(campos, valores) if campo
+        }
+
+
+def _filas_csv(ruta, delimitador):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        if not delimitador:
+            muestra = archivo.read(4096)
+            archivo.seek(0)
+            try:
+                delimitador = csv.Sniffer().sniff(muestra, delimiters=',;\t|').delimiter
+            except csv.Error:
+                delimitador = ','
+        yield from csv.reader(archivo, delimiter=delimitador)
+
+
+def _filas_xlsx(ruta):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorImportacion('Para importar .xlsx instale openpyxl (pip install openpyxl)')
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def _limpiar(datos):
+    """Valida y convierte una fila; lanza ValueError con el motivo."""
+    codigo = str(datos.get('codigo') or '').strip()
+    nombre = str(datos.get('nombre') or '').strip()
+    if not codigo:
+        raise ValueError('falta el código')
+    if not nombre:
+        raise ValueError('falta el nombre')
+
+    limpio = {
+        'codigo': codigo[:50],
+        'nombre': nombre[:255],
+        'upc': str(datos.get('upc') or '').strip()[:50],
+        'activo': True,
+    }
+    for campo in ('precio', 'costo', 'stock'):
+        if campo in datos:
+            limpio[campo] = convertir_decimal(datos[campo])
+    return limpio
+
+
+def importar_productos(filas, lote=1000, solo_verificar=False):
+    """
+    Crea o actualiza productos desde `filas` ((numero, datos) de leer_filas).
+    Con solo_verificar no escribe nada. Devuelve ResultadoImportacion.
+    """
+    resultado = ResultadoImportacion()
+    bloque = {}
+
+    def procesar():
+        existentes = Producto.objects.in_bulk(list(bloque), field_name='codigo')
+        nuevos, cambiados = [], []
+        ahora = timezone.now()
+
+        for codigo, datos in bloque.items():
+            producto = existentes.get(codigo)
+            if producto is None:
+                nuevos.append(Producto(**datos))
+                continue
+            cambios = [c for c in CAMPOS_ACTUALIZABLES if c in datos and getattr(producto, c) != datos[c]]
+            if not cambios:
+                resultado.sin_cambios += 1
+                continue
+            for campo in cambios:
+                setattr(producto, campo, datos[campo])
+            producto.fecha_modificacion = ahora
+            cambiados.append(producto)
+
+        resultado.creados += len(nuevos)
+        resultado.actualizados += len(cambiados)
+        if solo_verificar:
+            return
+
+        with transaction.atomic():
+            Producto.objects.bulk_create(nuevos, batch_size=lote)
+            if cambiados:
+                # bulk_update no aplica auto_now: fecha_modificacion va explícita
+                Producto.objects.bulk_update(
+                    cambiados, [*CAMPOS_ACTUALIZABLES, 'fecha_modificacion'], batch_size=lote
+                )
+
+            # bulk_create no devuelve ids en MySQL: recargar por código
+            if nuevos:
+                nuevos = list(Producto.objects.filter(codigo__in=[p.codigo for p in nuevos]))
+            indexar_productos(nuevos + cambiados)
+
+    for numero, datos in filas:
+        try:
+            limpio = _limpiar(datos)
+        except ValueError as e:
+            resultado.errores.append((numero, str(e)))
+            continue
+
+        # Si el código se repite en el archivo, gana la última fila
+        bloque[limpio['codigo']] = limpio
+        if len(bloque) >= lote:
+            procesar()
+            bloque = {}
+
+    if bloque:
+        procesar()
+
+    return resultado
@@ -0,0 +1 @@
+# Management commands para la aplicación facturacion
\ No newline at end of file
@@ -0,0 +1 @@
+# Commands para la aplicación facturacion
\ No newline at end of file
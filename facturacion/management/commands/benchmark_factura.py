@@ -0,0 +1,75 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from facturacion.views import guardar_factura_ajax
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Mide las consultas de guardar_factura_ajax con una factura de muchas líneas (no guarda nada)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lineas',
+            type=int,
+            default=300,
+            help='Cantidad de líneas de la factura (default: 300)'
+        )
+
+    def handle(self, *args, **options):
+        lineas = max(options['lineas'], 1)
+
+        detalles = [
+            {
+                'descripcion': f'Cable THHN #12 rollo {i + 1}',
+                'cantidad': (i % 5) + 1,
+                'precio_unitario': 15000 + i,
+                'descuento': 500 if i % 3 == 0 else 0,
+            }
+            for i in range(lineas)
+        ]
+
+        self.stdout.write(f'⏱️  BENCHMARK: factura de {lineas} líneas')
+        self.stdout.write('=' * 60)
+
+        # Todo se deshace al final: usuarios, factura, detalles y consecutivo
+        with transaction.atomic():
+            emisor = User.objects.create_user(username='benchmark-emisor', password=None)
+            cliente = User.objects.create_user(
+                username='benchmark-cliente', password=None, rol='CLIENTE'
+            )
+
+            request = RequestFactory().post(
+                '/dashboard/facturacion/ajax/guardar-factura/',
+                data=json.dumps({'cliente_id': cliente.id, 'detalles': detalles}),
+                content_type='application/json',
+            )
+            request.user = emisor
+
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                respuesta = guardar_factura_ajax(request)
+                duracion = (time.perf_counter() - inicio) * 1000
+
+            transaction.set_rollback(True)
+
+        datos = json.loads(respuesta.content)
+        if not datos.get('success'):
+            self.stdout.write(self.style.ERROR(f'❌ La factura no se guardó: {datos.get("message")}'))
+            return
+
+        sentencias = [q['sql'].lstrip().split(' ', 1)[0].upper() for q in consultas.captured_queries]
+        self.stdout.write(f'📋 Consultas totales: {len(sentencias)}')
+        for tipo in ('SELECT', 'INSERT', 'UPDATE'):
+            self.stdout.write(f'   {tipo}: {sentencias.count(tipo)}')
+        self.stdout.write(f'⏱️  Tiempo: {duracion:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {lineas} líneas guardadas con {sentencias.count("INSERT")} INSERT (se deshizo todo)'
+        ))
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from facturacion.models import Factura
+from facturacion.pdf import generar_pdfs
+
+
+def _leer_fecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Fecha no válida: {texto} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera por lotes los PDF de las facturas de un mes (o rango de fechas) '
+        'usando varios procesos. Las facturas cuyo PDF ya existe se omiten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mes',
+            type=str,
+            help='Mes a procesar en formato AAAA-MM (default: mes actual)'
+        )
+        parser.add_argument('--desde', type=str, help='Fecha inicial AAAA-MM-DD (en vez de --mes)')
+        parser.add_argument('--hasta', type=str, help='Fecha final AAAA-MM-DD, incluida')
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos en paralelo (default: núcleos del servidor)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=50,
+            help='Facturas por tarea enviada a cada proceso (default: 50)'
+        )
+
+    def _rango(self, options):
+        if options['desde'] or options['hasta']:
+            if not (options['desde'] and options['hasta']):
+                raise CommandError('Use --desde y --hasta juntos')
+            desde = _leer_fecha(options['desde'])
+            hasta = _leer_fecha(options['hasta']) + timedelta(days=1)
+        else:
+            mes = options['mes'] or timezone.localdate().strftime('%Y-%m')
+            try:
+                desde = datetime.strptime(mes, '%Y-%m').date()
+            except ValueError:
+                raise CommandError(f'Mes no válido: {mes} (use AAAA-MM)')
+            hasta = date(desde.year + desde.month // 12, desde.month % 12 + 1, 1)
+
+        return (
+            timezone.make_aware(datetime.combine(desde, time.min)),
+            timezone.make_aware(datetime.combine(hasta, time.min)),
+        )
+
+    def handle(self, *args, **options):
+        desde, hasta = self._rango(options)
+        procesos = max(options['procesos'], 1)
+        lote = max(options['lote'], 1)
+
+        self.stdout.write('📄 GENERACIÓN DE PDF DE FACTURAS')
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'📅 Desde {desde:%Y-%m-%d} hasta {hasta - timedelta(days=1):%Y-%m-%d}')
+
+        ids = list(
+            Factura.objects.filter(fecha_emision__gte=desde, fecha_emision__lt=hasta)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        if not ids:
+            self.stdout.write(self.style.WARNING('⚠️  No hay facturas en el rango'))
+            return
+
+        lotes = [ids[i:i + lote] for i in range(0, len(ids), lote)]
+        self.stdout.write(f'📋 Facturas: {len(ids)} en {len(lotes)} lotes, {procesos} procesos')
+
+        # Los procesos hijos no deben heredar las conexiones abiertas del padre
+        connections.close_all()
+
+        generados = existentes = 0
+        errores = []
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            tareas = [pool.submit(generar_pdfs, bloque) for bloque in lotes]
+            for tarea in as_completed(tareas):
+                nuevos, ya_existian, fallidos = tarea.result()
+                generados += nuevos
+                existentes += ya_existian
+                errores.extend(fallidos)
+
+        self.stdout.write(f'✅ PDF generados: {generados}')
+        self.stdout.write(f'📦 Ya existían: {existentes}')
+        if errores:
+            self.stdout.write(self.style.ERROR(f'❌ Errores: {len(errores)}'))
+            for codigo, mensaje in errores[:20]:
+                self.stdout.write(f'   {codigo}: {mensaje}')
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Todas las facturas tienen su PDF'))
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion.importacion import ErrorImportacion, importar_productos, leer_filas
+
+
+class Command(BaseCommand):
+    help = 'Importa o actualiza el catálogo de productos desde un archivo CSV o XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivo',
+            type=str,
+            help='Ruta del archivo .csv o .xlsx (columnas: codigo, nombre, upc, precio, costo, stock)'
+        )
+        parser.add_argument(
+            '--delimitador',
+            type=str,
+            help='Separador del CSV (por defecto se detecta: , ; tab |)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Cantidad de productos por lote (default: 1000)'
+        )
+        parser.add_argument(
+            '--solo-verificar',
+            action='store_true',
+            help='Solo validar el archivo y contar cambios, sin guardar'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('📦 IMPORTACIÓN DE PRODUCTOS')
+        self.stdout.write('=' * 60)
+
+        inicio = time.perf_counter()
+        try:
+            resultado = importar_productos(
+                leer_filas(options['archivo'], options.get('delimitador')),
+                lote=max(options['lote'], 1),
+                solo_verificar=options['solo_verificar'],
+            )
+        except FileNotFoundError:
+            raise CommandError(f'❌ No existe el archivo {options["archivo"]}')
+        except ErrorImportacion as e:
+            raise CommandError(f'❌ {e}')
+        duracion = time.perf_counter() - inicio
+
+        for fila, mensaje in resultado.errores[:20]:
+            self.stdout.write(self.style.WARNING(f'⚠️  Fila {fila}: {mensaje}'))
+        if len(resultado.errores) > 20:
+            self.stdout.write(self.style.WARNING(f'   ... y {len(resultado.errores) - 20} errores más'))
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'🆕 Creados: {resultado.creados}')
+        self.stdout.write(f'🔧 Actualizados: {resultado.actualizados}')
+        self.stdout.write(f'📋 Sin cambios: {resultado.sin_cambios}')
+        self.stdout.write(f'❌ Filas con error: {len(resultado.errores)}')
+        self.stdout.write(f'⏱️  Tiempo: {duracion:.1f} s')
+
+        if options['solo_verificar']:
+            self.stdout.write(self.style.WARNING('⚠️  Modo --solo-verificar: no se guardó nada'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Importación terminada'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from facturacion.cartera import antiguedad_cartera, recalcular_cartera
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el saldo pendiente de las facturas a crédito desde sus pagos '
+        'y reconstruye el saldo por cliente'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Cantidad de facturas procesadas por consulta (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('💳 RECÁLCULO DE CUENTAS POR COBRAR')
+        self.stdout.write('=' * 60)
+
+        corregidas = recalcular_cartera(lote=max(options['lote'], 1))
+        _, totales = antiguedad_cartera()
+
+        self.stdout.write(f'📋 Facturas con saldo: {totales["facturas"]}')
+        self.stdout.write(f'💰 Saldo total por cobrar: ${totales["saldo"]:,.2f}')
+        self.stdout.write(f'⏰ Vencido a más de 90 días: ${totales["dias_mas_90"]:,.2f}')
+        if corregidas:
+            self.stdout.write(self.style.SUCCESS(f'🔧 {corregidas} factura(s) corregidas'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Los saldos de las facturas coinciden con sus pagos'))
@@ -0,0 +1,124 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from facturacion.models import Factura
+from facturacion.totales import TotalesFactura, agregar_totales_por_factura
+from facturacion.ventas import actualizar_dias
+
+
+def _leer_fecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Fecha no válida: {texto} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Verifica los totales de las facturas contra sus detalles y repara las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=str, help='Fecha de emisión inicial AAAA-MM-DD')
+        parser.add_argument('--hasta', type=str, help='Fecha de emisión final AAAA-MM-DD, incluida')
+        parser.add_argument(
+            '--solo-verificar',
+            action='store_true',
+            help='Solo reportar diferencias, sin corregirlas'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Cantidad de facturas procesadas por consulta (default: 2000)'
+        )
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=20,
+            help='Máximo de facturas con diferencias a detallar (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        facturas = Factura.objects.order_by('id')
+
+        if options['desde']:
+            desde = _leer_fecha(options['desde'])
+            facturas = facturas.filter(
+                fecha_emision__gte=timezone.make_aware(datetime.combine(desde, time.min))
+            )
+        if options['hasta']:
+            hasta = _leer_fecha(options['hasta']) + timedelta(days=1)
+            facturas = facturas.filter(
+                fecha_emision__lt=timezone.make_aware(datetime.combine(hasta, time.min))
+            )
+
+        solo_verificar = options['solo_verificar']
+        lote = max(options['lote'], 1)
+        campos = Factura.CAMPOS_TOTALES
+
+        self.stdout.write('🔎 VERIFICACIÓN DE TOTALES DE FACTURAS')
+        self.stdout.write('=' * 60)
+
+        self.revisadas = 0
+        self.con_diferencias = 0
+        self.mostrar = max(options['mostrar'], 0)
+
+        # iterator() lee las facturas por bloques: memoria acotada con cualquier rango
+        bloque = []
+        campos_leidos = ('id', 'codigo_factura', 'fecha_emision', *campos)
+        for factura in facturas.only(*campos_leidos).iterator(chunk_size=lote):
+            bloque.append(factura)
+            if len(bloque) >= lote:
+                self._procesar(bloque, campos, solo_verificar)
+                bloque = []
+        if bloque:
+            self._procesar(bloque, campos, solo_verificar)
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'📋 Facturas revisadas: {self.revisadas}')
+
+        if not self.con_diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ Todos los totales coinciden con los detalles'))
+        elif solo_verificar:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {self.con_diferencias} factura(s) con diferencias (no se corrigieron, modo --solo-verificar)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'🔧 {self.con_diferencias} factura(s) corregidas'))
+
+    def _procesar(self, bloque, campos, solo_verificar):
+        # Una sola consulta agrupada por lote
+        reales = agregar_totales_por_factura([factura.id for factura in bloque])
+        por_corregir = []
+        ahora = timezone.now()
+
+        for factura in bloque:
+            self.revisadas += 1
+            esperado = reales.get(factura.id, TotalesFactura()).como_campos_factura()
+            actual = TotalesFactura.desde_factura(factura).como_campos_factura()
+
+            if actual == esperado:
+                continue
+
+            self.con_diferencias += 1
+            if self.con_diferencias <= self.mostrar:
+                self.stdout.write(f'⚠️  {factura.codigo_factura}:')
+                for campo in campos:
+                    if actual[campo] != esperado[campo]:
+                        self.stdout.write(
+                            f'   {campo}: guardado {actual[campo]} → real {esperado[campo]}'
+                        )
+
+            for campo, valor in esperado.items():
+                setattr(factura, campo, valor)
+            # bulk_update no aplica auto_now
+            factura.fecha_modificacion = ahora
+            por_corregir.append(factura)
+
+        if por_corregir and not solo_verificar:
+            with transaction.atomic():
+                Factura.objects.bulk_update(por_corregir, [*campos, 'fecha_modificacion'])
+                # bulk_update no dispara señales: actualizar el resumen de ventas
+                actualizar_dias(*(factura.fecha_emision for factura in por_corregir))
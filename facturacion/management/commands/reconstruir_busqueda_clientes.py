@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from facturacion.busqueda import reconstruir_indice_clientes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de clientes de facturación (TerminoBusquedaCliente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Cantidad de clientes leídos por consulta (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔎 RECONSTRUCCIÓN DEL ÍNDICE DE BÚSQUEDA DE CLIENTES')
+        self.stdout.write('=' * 60)
+
+        clientes, terminos = reconstruir_indice_clientes(lote=max(options['lote'], 1))
+
+        self.stdout.write(f'📋 Clientes indexados: {clientes}')
+        self.stdout.write(f'📋 Términos creados: {terminos}')
+        self.stdout.write(self.style.SUCCESS('✅ Índice de búsqueda reconstruido'))
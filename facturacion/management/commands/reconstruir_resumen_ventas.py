@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion.ventas import reconstruir_resumen_ventas
+
+
+def _leer_fecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Fecha no válida: {texto} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen de ventas (ResumenVentasDiario / ResumenVentasProducto) desde las facturas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=str, help='Primer día AAAA-MM-DD (por defecto desde el inicio)')
+        parser.add_argument('--hasta', type=str, help='Último día AAAA-MM-DD, incluido (por defecto hasta hoy)')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Cantidad de filas leídas por consulta (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        desde = _leer_fecha(options['desde']) if options['desde'] else None
+        hasta = _leer_fecha(options['hasta']) if options['hasta'] else None
+
+        self.stdout.write('📊 RECONSTRUCCIÓN DEL RESUMEN DE VENTAS')
+        self.stdout.write('=' * 60)
+
+        diarias, productos = reconstruir_resumen_ventas(desde, hasta, lote=max(options['lote'], 1))
+
+        self.stdout.write(f'📋 Filas por día/cliente/método de pago: {diarias}')
+        self.stdout.write(f'📋 Filas por día/producto: {productos}')
+        self.stdout.write(self.style.SUCCESS('✅ Resumen de ventas reconstruido'))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:39
+
+from django.db import migrations, models
+
+
+def inicializar_secuencia_facturas(apps, schema_editor):
+    """
+    Crea la serie FACT continuando desde el mayor código FACT-NNNNNN existente.
+    """
+    Factura = apps.get_model('facturacion', 'Factura')
+    SecuenciaDocumento = apps.get_model('facturacion', 'SecuenciaDocumento')
+
+    ultimo = 0
+    for codigo in Factura.objects.filter(codigo_factura__startswith='FACT-').values_list('codigo_factura', flat=True).iterator():
+        partes = codigo.split('-')
+        if len(partes) == 2 and partes[1].isdigit():
+            ultimo = max(ultimo, int(partes[1]))
+
+    SecuenciaDocumento.objects.update_or_create(
+        prefijo='FACT', anio=0, defaults={'ultimo_numero': ultimo}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefijo', models.CharField(help_text='Ej: FACT', max_length=20, verbose_name='Prefijo')),
+                ('anio', models.PositiveSmallIntegerField(default=0, help_text='0 = serie sin año (numeración continua)', verbose_name='Año')),
+                ('ultimo_numero', models.PositiveBigIntegerField(default=0, verbose_name='Último Número Asignado')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Modificación')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Documento',
+                'verbose_name_plural': 'Secuencias de Documentos',
+                'ordering': ['prefijo', '-anio'],
+                'constraints': [models.UniqueConstraint(fields=('prefijo', 'anio'), name='facturacion_secuencia_unica')],
+            },
+        ),
+        migrations.RunPython(inicializar_secuencia_facturas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:41
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Copia de las reglas de facturacion/busqueda.py al crear esta migración:
+# la migración no debe cambiar si ese módulo cambia después.
+LARGO_TERMINO = 100
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def terminos_cliente(first_name, last_name, username, email, telefono):
+    completos = (username, email, telefono)
+    terminos = set()
+    for valor in (first_name, last_name, *completos):
+        terminos.update(re.findall(r'[a-z0-9]+', normalizar(valor)))
+
+    for valor in completos:
+        completo = normalizar(valor).strip()
+        if completo:
+            terminos.add(completo)
+            digitos = re.sub(r'\D', '', completo)
+            if len(digitos) > 3:
+                terminos.add(digitos)
+
+    return {termino[:LARGO_TERMINO] for termino in terminos}
+
+
+def indexar_clientes_existentes(apps, schema_editor):
+    """
+    Llena el índice de búsqueda con los clientes existentes.
+    """
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    TerminoBusquedaCliente = apps.get_model('facturacion', 'TerminoBusquedaCliente')
+
+    nuevos = []
+    clientes = User.objects.filter(rol='CLIENTE').values_list(
+        'id', 'first_name', 'last_name', 'username', 'email', 'telefono'
+    )
+    for cliente_id, *datos in clientes.iterator(chunk_size=2000):
+        nuevos.extend(
+            TerminoBusquedaCliente(cliente_id=cliente_id, termino=termino)
+            for termino in terminos_cliente(*datos)
+        )
+        if len(nuevos) >= 5000:
+            TerminoBusquedaCliente.objects.bulk_create(nuevos, ignore_conflicts=True)
+            nuevos = []
+
+    TerminoBusquedaCliente.objects.bulk_create(nuevos, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0002_secuencia_documento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusquedaCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=100, verbose_name='Término')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda de Cliente',
+                'verbose_name_plural': 'Términos de Búsqueda de Clientes',
+                'constraints': [models.UniqueConstraint(fields=('termino', 'cliente'), name='facturacion_termino_cliente_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_clientes_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:44
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0003_indice_busqueda_clientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Producto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=50, unique=True, verbose_name='Código (SKU)')),
+                ('upc', models.CharField(blank=True, db_index=True, default='', max_length=50, verbose_name='Código de Barras (UPC/EAN)')),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('precio', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Precio sin impuestos', max_digits=12, verbose_name='Precio de Venta')),
+                ('costo', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Costo')),
+                ('stock', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Existencias')),
+                ('activo', models.BooleanField(default=True, verbose_name='Activo')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Modificación')),
+            ],
+            options={
+                'verbose_name': 'Producto',
+                'verbose_name_plural': 'Productos',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='detallefactura',
+            name='producto',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='detalles_factura', to='facturacion.producto', verbose_name='Producto'),
+        ),
+        migrations.CreateModel(
+            name='TerminoBusquedaProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=100, verbose_name='Término')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to='facturacion.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda de Producto',
+                'verbose_name_plural': 'Términos de Búsqueda de Productos',
+                'constraints': [models.UniqueConstraint(fields=('termino', 'producto'), name='facturacion_termino_producto_unico')],
+            },
+        ),
+    ]
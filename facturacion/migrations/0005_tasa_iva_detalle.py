@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:50
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0004_catalogo_productos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detallefactura',
+            name='tasa_iva',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.19'), help_text='Fracción sobre el total de la línea (0.19 = 19%, 0 = excluido)', max_digits=5, verbose_name='Tasa IVA'),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:53
+
+import django.db.models.deletion
+import hashlib
+import unicodedata
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _clave_producto(producto_id, descripcion):
+    # Misma clave que facturacion.ventas.clave_producto
+    if producto_id:
+        return f'P{producto_id}'
+    texto = unicodedata.normalize('NFKD', descripcion or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return 'D' + hashlib.sha1(' '.join(texto.split()).encode()).hexdigest()
+
+
+def construir_resumen_historico(apps, schema_editor):
+    """
+    Llena el resumen de ventas con las facturas activas existentes
+    (mismo cálculo que el comando reconstruir_resumen_ventas).
+    """
+    Factura = apps.get_model('facturacion', 'Factura')
+    DetalleFactura = apps.get_model('facturacion', 'DetalleFactura')
+    ResumenVentasDiario = apps.get_model('facturacion', 'ResumenVentasDiario')
+    ResumenVentasProducto = apps.get_model('facturacion', 'ResumenVentasProducto')
+    
+    diario = defaultdict(lambda: [0, Decimal('0.00'), Decimal('0.00'), Decimal('0.00')])
+    filas = Factura.objects.filter(activa=True).order_by().values_list(
+        'fecha_emision', 'cliente_id', 'metodo_pago', 'subtotal_neto', 'total_iva', 'total_pagar'
+    )
+    for fecha_emision, cliente_id, metodo_pago, neto, iva, total in filas.iterator(chunk_size=2000):
+        acumulado = diario[(timezone.localdate(fecha_emision), cliente_id, metodo_pago)]
+        acumulado[0] += 1
+        acumulado[1] += neto
+        acumulado[2] += iva
+        acumulado[3] += total
+    
+    productos = {}
+    filas = DetalleFactura.objects.filter(factura__activa=True).order_by().values_list(
+        'factura__fecha_emision', 'producto_id', 'descripcion', 'cantidad', 'total'
+    )
+    for fecha_emision, producto_id, descripcion, cantidad, total in filas.iterator(chunk_size=2000):
+        clave = (timezone.localdate(fecha_emision), _clave_producto(producto_id, descripcion))
+        if clave not in productos:
+            productos[clave] = [producto_id, (descripcion or '')[:255], Decimal('0.00'), Decimal('0.00'), 0]
+        productos[clave][2] += cantidad
+        productos[clave][3] += total
+        productos[clave][4] += 1
+    
+    ResumenVentasDiario.objects.bulk_create([
+        ResumenVentasDiario(
+            fecha=fecha,
+            cliente_id=cliente_id,
+            metodo_pago=metodo_pago,
+            facturas=facturas,
+            subtotal_neto=neto,
+            total_iva=iva,
+            total_pagar=total,
+        )
+        for (fecha, cliente_id, metodo_pago), (facturas, neto, iva, total) in diario.items()
+    ], batch_size=2000)
+    
+    ResumenVentasProducto.objects.bulk_create([
+        ResumenVentasProducto(
+            fecha=fecha,
+            clave=clave,
+            producto_id=producto_id,
+            descripcion=descripcion,
+            cantidad=cantidad,
+            total=total,
+            lineas=lineas,
+        )
+        for (fecha, clave), (producto_id, descripcion, cantidad, total, lineas) in productos.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0005_tasa_iva_detalle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVentasDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(help_text='Día local (America/Bogota) de emisión', verbose_name='Fecha')),
+                ('metodo_pago', models.CharField(choices=[('EFECTIVO', 'Efectivo'), ('TRANSFERENCIA', 'Transferencia Bancaria'), ('TARJETA', 'Tarjeta de Crédito/Débito'), ('CHEQUE', 'Cheque'), ('OTRO', 'Otro')], max_length=20, verbose_name='Método de Pago')),
+                ('facturas', models.IntegerField(default=0, verbose_name='Cantidad de facturas')),
+                ('subtotal_neto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Subtotal Neto')),
+                ('total_iva', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total IVA')),
+                ('total_pagar', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total Ventas')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_ventas', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Ventas',
+                'verbose_name_plural': 'Resúmenes Diarios de Ventas',
+                'ordering': ['fecha'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'cliente', 'metodo_pago'), name='facturacion_resumen_ventas_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenVentasProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('clave', models.CharField(max_length=41, verbose_name='Clave')),
+                ('descripcion', models.CharField(max_length=255, verbose_name='Descripción')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Unidades')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Valor neto vendido (sin IVA)', max_digits=14, verbose_name='Total')),
+                ('lineas', models.IntegerField(default=0, verbose_name='Líneas de factura')),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resumenes_ventas', to='facturacion.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Ventas por Producto',
+                'verbose_name_plural': 'Resúmenes Diarios de Ventas por Producto',
+                'ordering': ['fecha'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'clave'), name='facturacion_resumen_producto_unico')],
+            },
+        ),
+        migrations.RunPython(construir_resumen_historico, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0006_resumen_ventas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factura',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='Clave de Idempotencia'),
+        ),
+    ]
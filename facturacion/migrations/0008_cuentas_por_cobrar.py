@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+DIAS_CREDITO = {
+    'CONTADO': 0,
+    'CREDITO_15': 15,
+    'CREDITO_30': 30,
+    'CREDITO_60': 60,
+    'CREDITO_90': 90,
+}
+
+
+def cargar_cartera_historica(apps, schema_editor):
+    """
+    Fecha de vencimiento de todas las facturas y saldo inicial de las
+    facturas a crédito activas (no había registro de pagos: se toman como
+    pendientes por el total). Luego el saldo por cliente.
+    """
+    Factura = apps.get_model('facturacion', 'Factura')
+    SaldoCliente = apps.get_model('facturacion', 'SaldoCliente')
+
+    cambiadas = []
+    facturas = Factura.objects.order_by('id').only('id', 'fecha_emision', 'condicion_pago', 'activa', 'total_pagar')
+    for factura in facturas.iterator(chunk_size=2000):
+        dias = DIAS_CREDITO.get(factura.condicion_pago, 0)
+        factura.fecha_vencimiento = timezone.localdate(factura.fecha_emision) + timedelta(days=dias)
+        factura.saldo_pendiente = factura.total_pagar if dias and factura.activa else Decimal('0.00')
+        cambiadas.append(factura)
+        if len(cambiadas) >= 2000:
+            Factura.objects.bulk_update(cambiadas, ['fecha_vencimiento', 'saldo_pendiente'])
+            cambiadas = []
+    if cambiadas:
+        Factura.objects.bulk_update(cambiadas, ['fecha_vencimiento', 'saldo_pendiente'])
+
+    SaldoCliente.objects.bulk_create([
+        SaldoCliente(cliente_id=fila['cliente_id'], saldo=fila['saldo'], facturas_abiertas=fila['abiertas'])
+        for fila in Factura.objects.filter(activa=True, saldo_pendiente__gt=0)
+        .values('cliente_id').annotate(saldo=Sum('saldo_pendiente'), abiertas=Count('id')).order_by()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0014_resumendiariocaja'),
+        ('facturacion', '0007_idempotencia_factura'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagoFactura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Monto')),
+                ('fecha_pago', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Pago')),
+                ('referencia', models.CharField(blank=True, help_text='Recibo, número de transferencia, etc.', max_length=100, verbose_name='Referencia')),
+            ],
+            options={
+                'verbose_name': 'Pago de Factura',
+                'verbose_name_plural': 'Pagos de Facturas',
+                'ordering': ['-fecha_pago'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('saldo', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Saldo Pendiente')),
+                ('facturas_abiertas', models.IntegerField(default=0, verbose_name='Facturas con saldo')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Modificación')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cliente',
+                'verbose_name_plural': 'Saldos de Clientes',
+            },
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, help_text='Día de emisión + días de crédito de la condición de pago', null=True, verbose_name='Fecha de Vencimiento'),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='saldo_pendiente',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total de las facturas a crédito menos los pagos registrados', max_digits=12, verbose_name='Saldo Pendiente'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['saldo_pendiente', 'fecha_vencimiento'], name='facturacion_cartera_idx'),
+        ),
+        migrations.AddField(
+            model_name='pagofactura',
+            name='factura',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pagos', to='facturacion.factura', verbose_name='Factura'),
+        ),
+        migrations.AddField(
+            model_name='pagofactura',
+            name='movimiento_caja',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pago_factura', to='caja.movimientocaja', verbose_name='Movimiento de Caja'),
+        ),
+        migrations.AddField(
+            model_name='pagofactura',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pagos_factura_registrados', to=settings.AUTH_USER_MODEL, verbose_name='Registrado por'),
+        ),
+        migrations.AddField(
+            model_name='saldocliente',
+            name='cliente',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='saldo_cartera', to=settings.AUTH_USER_MODEL, verbose_name='Cliente'),
+        ),
+        migrations.RunPython(cargar_cartera_historica, migrations.RunPython.noop),
+    ]
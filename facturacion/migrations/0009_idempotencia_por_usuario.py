@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0008_cuentas_por_cobrar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='factura',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Clave de Idempotencia'),
+        ),
+        migrations.AddConstraint(
+            model_name='factura',
+            constraint=models.UniqueConstraint(fields=('usuario_emisor', 'clave_idempotencia'), name='facturacion_idempotencia_usuario'),
+        ),
+    ]
@@ -2,13 +2,231 @@
 Modelos para el sistema de facturación.
 Renzzo Eléctricos - Villavicencio, Meta
 """
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
 
 User = get_user_model()
 
+CENTAVO = Decimal('0.01')
+
+
+class SecuenciaDocumento(models.Model):
+    """
+    Consecutivo de numeración de documentos (facturas, etc.).
+    Una fila por serie: prefijo + año (anio=0 para series sin año).
+    
+    El número se asigna con un UPDATE atómico (ultimo_numero = ultimo_numero + n)
+    que bloquea la fila hasta el commit, así dos workers nunca obtienen el
+    mismo número y el costo no depende de cuántos documentos existan.
+    """
+    
+    prefijo = models.CharField(
+        max_length=20,
+        verbose_name='Prefijo',
+        help_text='Ej: FACT'
+    )
+    
+    anio = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Año',
+        help_text='0 = serie sin año (numeración continua)'
+    )
+    
+    ultimo_numero = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Último Número Asignado'
+    )
+    
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de Modificación'
+    )
+    
+    class Meta:
+        verbose_name = 'Secuencia de Documento'
+        verbose_name_plural = 'Secuencias de Documentos'
+        ordering = ['prefijo', '-anio']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['prefijo', 'anio'],
+                name='facturacion_secuencia_unica'
+            ),
+        ]
+    
+    def __str__(self):
+        serie = f"{self.prefijo}-{self.anio}" if self.anio else self.prefijo
+        return f"{serie}: {self.ultimo_numero}"
+    
+    @classmethod
+    def reservar(cls, prefijo, anio=0, cantidad=1):
+        """
+        Reserva `cantidad` números consecutivos de la serie y devuelve
+        (primero, ultimo). Crea la serie si no existe.
+        """
+        with transaction.atomic():
+            actualizadas = cls.objects.filter(prefijo=prefijo, anio=anio).update(
+                ultimo_numero=F('ultimo_numero') + cantidad,
+                fecha_modificacion=timezone.now(),
+            )
+            if not actualizadas:
+                # Serie nueva. Si otro proceso la crea al mismo tiempo, este
+                # INSERT falla y el UPDATE siguiente espera su commit.
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(prefijo=prefijo, anio=anio)
+                except IntegrityError:
+                    pass
+                cls.objects.filter(prefijo=prefijo, anio=anio).update(
+                    ultimo_numero=F('ultimo_numero') + cantidad,
+                    fecha_modificacion=timezone.now(),
+                )
+            
+            # La fila sigue bloqueada por el UPDATE: nadie más la cambió
+            ultimo = cls.objects.filter(
+                prefijo=prefijo, anio=anio
+            ).values_list('ultimo_numero', flat=True).get()
+        
+        return ultimo - cantidad + 1, ultimo
+
+
+class TerminoBusquedaCliente(models.Model):
+    """
+    Índice de búsqueda de clientes para facturación.
+    Una fila por término normalizado (minúsculas, sin tildes) del nombre,
+    NIT, email y teléfono de cada cliente. La búsqueda por prefijo recorre
+    solo el rango del índice (termino, cliente) que coincide.
+    Se mantiene al guardar el usuario (ver señales al final del archivo).
+    """
+    
+    cliente = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='terminos_busqueda',
+        verbose_name='Cliente'
+    )
+    
+    termino = models.CharField(
+        max_length=100,
+        verbose_name='Término'
+    )
+    
+    class Meta:
+        verbose_name = 'Término de Búsqueda de Cliente'
+        verbose_name_plural = 'Términos de Búsqueda de Clientes'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['termino', 'cliente'],
+                name='facturacion_termino_cliente_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.termino} → {self.cliente_id}"
+
+
+class Producto(models.Model):
+    """
+    Catálogo local de productos para facturación.
+    El código (SKU) es único y es la clave para importar listas de proveedores.
+    """
+    
+    codigo = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Código (SKU)'
+    )
+    
+    upc = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name='Código de Barras (UPC/EAN)'
+    )
+    
+    nombre = models.CharField(
+        max_length=255,
+        verbose_name='Nombre'
+    )
+    
+    precio = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Precio de Venta',
+        help_text='Precio sin impuestos'
+    )
+    
+    costo = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Costo'
+    )
+    
+    stock = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Existencias'
+    )
+    
+    activo = models.BooleanField(
+        default=True,
+        verbose_name='Activo'
+    )
+    
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de Modificación'
+    )
+    
+    class Meta:
+        verbose_name = 'Producto'
+        verbose_name_plural = 'Productos'
+        ordering = ['nombre']
+    
+    def __str__(self):
+        return f"{self.codigo} - {self.nombre}"
+
+
+class TerminoBusquedaProducto(models.Model):
+    """
+    Índice de búsqueda de productos (mismo esquema que TerminoBusquedaCliente):
+    palabras normalizadas del nombre más el código y el UPC completos.
+    """
+    
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='terminos_busqueda',
+        verbose_name='Producto'
+    )
+    
+    termino = models.CharField(
+        max_length=100,
+        verbose_name='Término'
+    )
+    
+    class Meta:
+        verbose_name = 'Término de Búsqueda de Producto'
+        verbose_name_plural = 'Términos de Búsqueda de Productos'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['termino', 'producto'],
+                name='facturacion_termino_producto_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.termino} → {self.producto_id}"
+
 
 class Factura(models.Model):
     """
@@ -16,6 +234,16 @@ class Factura(models.Model):
     Almacena la información general de cada factura emitida.
     """
     
+    # IVA por defecto de cada línea (ver DetalleFactura.tasa_iva)
+    TASA_IVA = Decimal('0.19')
+    
+    # Totales calculados desde los detalles (ver asignar_totales y recalcular_facturas)
+    CAMPOS_TOTALES = ('subtotal', 'total_descuentos', 'subtotal_neto', 'total_iva', 'total_pagar')
+    
+    # Serie de numeración (ver SecuenciaDocumento)
+    PREFIJO_CODIGO = 'FACT'
+    SERIE_ANUAL = False  # True: FACT-2025-000001, reinicia cada año
+    
     class MetodoPago(models.TextChoices):
         EFECTIVO = 'EFECTIVO', 'Efectivo'
         TRANSFERENCIA = 'TRANSFERENCIA', 'Transferencia Bancaria'
@@ -30,6 +258,15 @@ class Factura(models.Model):
         CREDITO_60 = 'CREDITO_60', 'Crédito 60 Días'
         CREDITO_90 = 'CREDITO_90', 'Crédito 90 Días'
     
+    # Días para el vencimiento según la condición de pago
+    DIAS_CREDITO = {
+        CondicionPago.CONTADO: 0,
+        CondicionPago.CREDITO_15: 15,
+        CondicionPago.CREDITO_30: 30,
+        CondicionPago.CREDITO_60: 60,
+        CondicionPago.CREDITO_90: 90,
+    }
+    
     # Información básica
     codigo_factura = models.CharField(
         max_length=50,
@@ -111,6 +348,22 @@ class Factura(models.Model):
         verbose_name='Condición de Pago'
     )
     
+    # Cuentas por cobrar (ver cartera.py)
+    fecha_vencimiento = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de Vencimiento',
+        help_text='Día de emisión + días de crédito de la condición de pago'
+    )
+    
+    saldo_pendiente = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Saldo Pendiente',
+        help_text='Total de las facturas a crédito menos los pagos registrados'
+    )
+    
     # Notas
     notas = models.TextField(
         blank=True,
@@ -136,6 +389,16 @@ class Factura(models.Model):
         help_text='Indica si la factura está activa o fue anulada'
     )
     
+    # Clave generada por el navegador para cada envío del formulario:
+    # los reintentos del mismo usuario con la misma clave devuelven esta factura
+    clave_idempotencia = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Clave de Idempotencia'
+    )
+    
     class Meta:
         verbose_name = 'Factura'
         verbose_name_plural = 'Facturas'
@@ -144,30 +407,87 @@ class Factura(models.Model):
             models.Index(fields=['-fecha_emision']),
             models.Index(fields=['codigo_factura']),
             models.Index(fields=['cliente']),
+            # Cartera: solo se recorren las facturas con saldo (saldo_pendiente > 0)
+            models.Index(fields=['saldo_pendiente', 'fecha_vencimiento'], name='facturacion_cartera_idx'),
+        ]
+        constraints = [
+            # La clave es única por usuario: la misma clave de otro usuario no es un reintento
+            models.UniqueConstraint(
+                fields=['usuario_emisor', 'clave_idempotencia'],
+                name='facturacion_idempotencia_usuario'
+            ),
         ]
     
     def __str__(self):
         return f"{self.codigo_factura} - {self.cliente.get_full_name()} - ${self.total_pagar}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordar el día de emisión para actualizar el resumen de ventas si cambia
+        instance._fecha_emision_original = instance.__dict__.get('fecha_emision')
+        # y el cliente, para recalcular el saldo de ambos si se reasigna
+        instance._cliente_original_id = instance.__dict__.get('cliente_id')
+        return instance
+    
     def generar_codigo_factura(self):
         """
         Genera el código único de factura en formato FACT-000001
+        (o FACT-2025-000001 si la serie es anual) desde SecuenciaDocumento.
         """
-        ultima_factura = Factura.objects.all().order_by('-id').first()
-        if ultima_factura:
-            ultimo_numero = int(ultima_factura.codigo_factura.split('-')[1])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
+        from .secuencias import siguiente_numero
+        
+        if self.SERIE_ANUAL:
+            anio = timezone.localtime(self.fecha_emision).year
+            numero = siguiente_numero(self.PREFIJO_CODIGO, anio)
+            return f"{self.PREFIJO_CODIGO}-{anio}-{numero:06d}"
         
-        return f"FACT-{nuevo_numero:06d}"
+        numero = siguiente_numero(self.PREFIJO_CODIGO)
+        return f"{self.PREFIJO_CODIGO}-{numero:06d}"
+    
+    def asignar_totales(self, detalles):
+        """
+        Calcula los totales de la factura desde sus detalles en memoria
+        (ya con calcular_valores() aplicado), sin consultar la base de datos.
+        El IVA se calcula por línea con la tasa de cada detalle.
+        """
+        subtotal = Decimal('0.00')
+        total_descuentos = Decimal('0.00')
+        total_iva = Decimal('0.00')
+        
+        for detalle in detalles:
+            subtotal += detalle.precio_unitario * detalle.cantidad
+            total_descuentos += detalle.descuento * detalle.cantidad
+            total_iva += detalle.total * detalle.tasa_iva
+        
+        # Cada total se redondea desde los valores sin redondear
+        # (mismo resultado que al guardar en la columna DECIMAL(_, 2))
+        subtotal_neto = subtotal - total_descuentos
+        self.subtotal = subtotal.quantize(CENTAVO)
+        self.total_descuentos = total_descuentos.quantize(CENTAVO)
+        self.subtotal_neto = subtotal_neto.quantize(CENTAVO)
+        self.total_iva = total_iva.quantize(CENTAVO)
+        self.total_pagar = (subtotal_neto + total_iva).quantize(CENTAVO)
+    
+    @property
+    def es_credito(self):
+        return self.condicion_pago != self.CondicionPago.CONTADO
     
     def save(self, *args, **kwargs):
         """
-        Genera el código de factura automáticamente si no existe
+        Genera el código de factura automáticamente si no existe.
+        Al crearla calcula el vencimiento y, si es a crédito, deja todo
+        el total como saldo pendiente.
         """
         if not self.codigo_factura:
             self.codigo_factura = self.generar_codigo_factura()
+        if self._state.adding:
+            if self.fecha_vencimiento is None:
+                self.fecha_vencimiento = timezone.localdate(self.fecha_emision) + timedelta(
+                    days=self.DIAS_CREDITO.get(self.condicion_pago, 0)
+                )
+            if self.es_credito and not self.saldo_pendiente:
+                self.saldo_pendiente = self.total_pagar
         super().save(*args, **kwargs)
 
 
@@ -227,6 +547,16 @@ class DetalleFactura(models.Model):
         help_text='Valor unitario × Cantidad'
     )
     
+    # Producto del catálogo local (opcional: también se facturan ítems de texto libre)
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='detalles_factura',
+        verbose_name='Producto'
+    )
+    
     # Referencia opcional al producto de Oscar (si existe)
     producto_oscar_id = models.IntegerField(
         null=True,
@@ -235,6 +565,14 @@ class DetalleFactura(models.Model):
         help_text='ID del producto en el catálogo Oscar'
     )
     
+    tasa_iva = models.DecimalField(
+        max_digits=5,
+        decimal_places=4,
+        default=Factura.TASA_IVA,
+        verbose_name='Tasa IVA',
+        help_text='Fracción sobre el total de la línea (0.19 = 19%, 0 = excluido)'
+    )
+    
     # Orden en la factura
     orden = models.PositiveIntegerField(
         default=0,
@@ -262,3 +600,324 @@ class DetalleFactura(models.Model):
         """
         self.calcular_valores()
         super().save(*args, **kwargs)
+
+
+class ResumenVentasDiario(models.Model):
+    """
+    Ventas por día local, cliente y método de pago (solo facturas activas).
+    Se actualiza al emitir, anular o modificar facturas; los reportes y el
+    dashboard lo leen en lugar de recorrer Factura (ver ventas.py).
+    """
+    
+    fecha = models.DateField(
+        verbose_name='Fecha',
+        help_text='Día local (America/Bogota) de emisión'
+    )
+    
+    cliente = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='resumenes_ventas',
+        verbose_name='Cliente'
+    )
+    
+    metodo_pago = models.CharField(
+        max_length=20,
+        choices=Factura.MetodoPago.choices,
+        verbose_name='Método de Pago'
+    )
+    
+    facturas = models.IntegerField(
+        default=0,
+        verbose_name='Cantidad de facturas'
+    )
+    
+    subtotal_neto = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Subtotal Neto'
+    )
+    
+    total_iva = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Total IVA'
+    )
+    
+    total_pagar = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Total Ventas'
+    )
+    
+    class Meta:
+        verbose_name = 'Resumen Diario de Ventas'
+        verbose_name_plural = 'Resúmenes Diarios de Ventas'
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'cliente', 'metodo_pago'],
+                name='facturacion_resumen_ventas_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.fecha} - {self.cliente_id} - {self.metodo_pago} - ${self.total_pagar:,.2f}"
+
+
+class ResumenVentasProducto(models.Model):
+    """
+    Unidades y valor vendido por día local y producto (solo facturas activas).
+    Los ítems de texto libre (sin producto) se agrupan por descripción.
+    """
+    
+    fecha = models.DateField(
+        verbose_name='Fecha'
+    )
+    
+    # 'P<id>' para productos del catálogo, 'D<hash>' para descripciones libres
+    clave = models.CharField(
+        max_length=41,
+        verbose_name='Clave'
+    )
+    
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resumenes_ventas',
+        verbose_name='Producto'
+    )
+    
+    descripcion = models.CharField(
+        max_length=255,
+        verbose_name='Descripción'
+    )
+    
+    cantidad = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Unidades'
+    )
+    
+    total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Total',
+        help_text='Valor neto vendido (sin IVA)'
+    )
+    
+    lineas = models.IntegerField(
+        default=0,
+        verbose_name='Líneas de factura'
+    )
+    
+    class Meta:
+        verbose_name = 'Resumen Diario de Ventas por Producto'
+        verbose_name_plural = 'Resúmenes Diarios de Ventas por Producto'
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'clave'],
+                name='facturacion_resumen_producto_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.fecha} - {self.descripcion} - ${self.total:,.2f}"
+
+
+class PagoFactura(models.Model):
+    """
+    Abono a una factura a crédito. Cada pago entra a la caja abierta como
+    un MovimientoCaja de tipo COBRO_CXC (ver cartera.registrar_pago).
+    """
+    
+    factura = models.ForeignKey(
+        Factura,
+        on_delete=models.PROTECT,
+        related_name='pagos',
+        verbose_name='Factura'
+    )
+    
+    movimiento_caja = models.OneToOneField(
+        'caja.MovimientoCaja',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='pago_factura',
+        verbose_name='Movimiento de Caja'
+    )
+    
+    monto = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='Monto'
+    )
+    
+    fecha_pago = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de Pago'
+    )
+    
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='pagos_factura_registrados',
+        verbose_name='Registrado por'
+    )
+    
+    referencia = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Referencia',
+        help_text='Recibo, número de transferencia, etc.'
+    )
+    
+    class Meta:
+        verbose_name = 'Pago de Factura'
+        verbose_name_plural = 'Pagos de Facturas'
+        ordering = ['-fecha_pago']
+    
+    def __str__(self):
+        return f"{self.factura_id} - ${self.monto:,.2f} - {self.fecha_pago:%d/%m/%Y}"
+
+
+class SaldoCliente(models.Model):
+    """
+    Saldo pendiente por cliente (suma de saldo_pendiente de sus facturas
+    activas). Se actualiza con F() al emitir facturas a crédito y al
+    registrar pagos, para consultarlo sin recorrer las facturas.
+    """
+    
+    cliente = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='saldo_cartera',
+        verbose_name='Cliente'
+    )
+    
+    saldo = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Saldo Pendiente'
+    )
+    
+    facturas_abiertas = models.IntegerField(
+        default=0,
+        verbose_name='Facturas con saldo'
+    )
+    
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de Modificación'
+    )
+    
+    class Meta:
+        verbose_name = 'Saldo de Cliente'
+        verbose_name_plural = 'Saldos de Clientes'
+    
+    def __str__(self):
+        return f"{self.cliente_id} - ${self.saldo:,.2f}"
+
+
+# ============================================================================
+# SEÑALES
+# ============================================================================
+
+# Campos del usuario que forman parte del índice de búsqueda de clientes
+CAMPOS_BUSQUEDA_CLIENTE = {'first_name', 'last_name', 'username', 'email', 'telefono', 'rol'}
+
+
+@receiver(post_save, sender=User)
+def actualizar_indice_busqueda_cliente(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Mantiene TerminoBusquedaCliente al crear o modificar un usuario.
+    Los guardados parciales que no tocan campos buscables (ej: last_login)
+    no consultan el índice.
+    """
+    if raw:
+        return
+    if update_fields is not None and not CAMPOS_BUSQUEDA_CLIENTE.intersection(update_fields):
+        return
+    
+    from .busqueda import indexar_cliente
+    indexar_cliente(instance)
+
+
+@receiver(post_save, sender=Producto)
+def actualizar_indice_busqueda_producto(sender, instance, raw=False, **kwargs):
+    """
+    Mantiene TerminoBusquedaProducto al guardar un producto (admin).
+    El importador masivo actualiza el índice por lotes (ver importacion.py).
+    """
+    if raw:
+        return
+    
+    from .busqueda import indexar_productos
+    indexar_productos([instance])
+
+
+# Campos de la factura que afectan el resumen de ventas
+CAMPOS_RESUMEN_VENTAS = {'fecha_emision', 'cliente', 'metodo_pago', 'activa', *Factura.CAMPOS_TOTALES}
+
+
+@receiver(post_save, sender=Factura)
+def actualizar_resumen_ventas_al_guardar(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Al anular o modificar una factura, reconstruye el resumen de ventas de
+    su día (y del día anterior si cambió la fecha). Las facturas nuevas las
+    suma guardar_factura_ajax cuando ya tienen sus líneas (registrar_factura).
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not CAMPOS_RESUMEN_VENTAS.intersection(update_fields):
+        return
+    
+    from .ventas import actualizar_dias
+    actualizar_dias(instance.fecha_emision, getattr(instance, '_fecha_emision_original', None))
+    instance._fecha_emision_original = instance.fecha_emision
+
+
+@receiver(post_delete, sender=Factura)
+def actualizar_resumen_ventas_al_eliminar(sender, instance, **kwargs):
+    """Quita la factura eliminada (y sus líneas) del resumen de ventas."""
+    from .ventas import actualizar_dias
+    actualizar_dias(instance.fecha_emision)
+
+
+# Campos de la factura que afectan el saldo del cliente
+CAMPOS_SALDO_CLIENTE = {'cliente', 'activa', 'saldo_pendiente'}
+
+
+@receiver(post_save, sender=Factura)
+def actualizar_saldo_cliente_al_guardar(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Al anular o modificar una factura, recalcula el saldo de su cliente.
+    Las facturas nuevas y los pagos lo actualizan con F() (ver cartera.py).
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not CAMPOS_SALDO_CLIENTE.intersection(update_fields):
+        return
+    
+    from .cartera import recalcular_saldo_cliente
+    recalcular_saldo_cliente(instance.cliente_id)
+    
+    original = getattr(instance, '_cliente_original_id', None)
+    if original and original != instance.cliente_id:
+        recalcular_saldo_cliente(original)
+    instance._cliente_original_id = instance.cliente_id
+
+
+@receiver(post_delete, sender=Factura)
+def actualizar_saldo_cliente_al_eliminar(sender, instance, **kwargs):
+    from .cartera import recalcular_saldo_cliente
+    recalcular_saldo_cliente(instance.cliente_id)
@@ -0,0 +1,60 @@
+"""
+Registro de tiempos y consultas de las vistas de facturación.
+Renzzo Eléctricos - Villavicencio, Meta
+
+Cada petición decorada con @medir_peticion deja una línea con la vista, el
+tiempo y la cantidad de consultas SQL. Para no llenar el log en cada tecla
+del buscador, solo una fracción de las peticiones (FACTURACION_LOG_MUESTREO)
+se registra en nivel INFO y marca request.log_detallado para que la vista
+agregue sus mensajes DEBUG; las peticiones lentas siempre se registran.
+"""
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class _ContadorConsultas:
+    """execute_wrapper que cuenta las consultas de la petición (también con DEBUG=False)."""
+    
+    def __init__(self):
+        self.cantidad = 0
+    
+    def __call__(self, execute, sql, params, many, context):
+        self.cantidad += 1
+        return execute(sql, params, many, context)
+
+
+def medir_peticion(vista):
+    """Decorador: registra duración y consultas SQL de la vista."""
+    
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        muestreo = getattr(settings, 'FACTURACION_LOG_MUESTREO', 1.0)
+        request.log_detallado = random.random() < muestreo
+        
+        contador = _ContadorConsultas()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contador):
+            respuesta = vista(request, *args, **kwargs)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        
+        if duracion_ms >= getattr(settings, 'FACTURACION_LOG_LENTO_MS', 500):
+            nivel = logging.WARNING
+        elif request.log_detallado:
+            nivel = logging.INFO
+        else:
+            return respuesta
+        
+        logger.log(
+            nivel, '%s %s status=%s tiempo=%.1fms consultas=%d',
+            request.method, vista.__name__, respuesta.status_code, duracion_ms, contador.cantidad
+        )
+        return respuesta
+    
+    return envoltura
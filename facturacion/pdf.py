@@ -0,0 +1,121 @@
+"""
+PDF de facturas con WeasyPrint.
+Renzzo Eléctricos - Villavicencio, Meta
+
+- La plantilla, la hoja de estilos y la configuración de fuentes se cargan
+  una sola vez por proceso (worker de gunicorn o proceso del comando batch).
+- Cada PDF se guarda en el storage con el hash del HTML renderizado como
+  nombre: si la factura no cambió, volver a descargarla solo renderiza el
+  HTML (barato) y sirve el archivo ya generado. Si la factura cambia (ej:
+  anulación), el hash cambia y se genera un PDF nuevo.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from django.template.loader import get_template
+
+from .models import Factura, DetalleFactura
+
+PLANTILLA = 'facturacion/factura_pdf.html'
+HOJA_ESTILOS = 'facturacion/css/factura_pdf.css'
+CARPETA_PDF = 'facturas/pdf'
+
+# Subir al cambiar la lógica de render para no reutilizar PDFs anteriores
+VERSION_PDF = '1'
+
+
+@lru_cache(maxsize=None)
+def _plantilla():
+    """
+    (plantilla, texto_css, huella) cargados una vez por proceso.
+    La huella del CSS entra en el hash para regenerar los PDF si cambia.
+    """
+    with open(finders.find(HOJA_ESTILOS), encoding='utf-8') as archivo:
+        texto_css = archivo.read()
+
+    huella = hashlib.sha256(f'{VERSION_PDF}:{texto_css}'.encode()).hexdigest()
+    return get_template(PLANTILLA), texto_css, huella
+
+
+@lru_cache(maxsize=None)
+def _estilos():
+    """Hoja de estilos y fuentes de WeasyPrint, compiladas una vez por proceso."""
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    fuentes = FontConfiguration()
+    return CSS(string=_plantilla()[1], font_config=fuentes), fuentes
+
+
+def facturas_para_pdf():
+    """Queryset con todo lo que usa la plantilla (3 consultas por lote)."""
+    return Factura.objects.select_related('cliente', 'usuario_emisor').prefetch_related(
+        Prefetch('detalles', queryset=DetalleFactura.objects.order_by('orden', 'id'))
+    )
+
+
+def html_factura(factura):
+    """HTML de la factura y su hash (nombre del PDF en el storage)."""
+    plantilla, _texto_css, huella = _plantilla()
+    html = plantilla.render({'factura': factura, 'detalles': factura.detalles.all()})
+    contenido = hashlib.sha256(f'{huella}:{html}'.encode()).hexdigest()
+    return html, contenido
+
+
+def ruta_pdf(contenido):
+    return f'{CARPETA_PDF}/{contenido[:2]}/{contenido}.pdf'
+
+
+def obtener_pdf_factura(factura):
+    """
+    Devuelve (ruta en el storage, hash) del PDF de la factura,
+    generándolo solo si no existe uno con el mismo contenido.
+    """
+    html, contenido = html_factura(factura)
+    ruta = ruta_pdf(contenido)
+
+    if not default_storage.exists(ruta):
+        from weasyprint import HTML
+
+        css, fuentes = _estilos()
+        pdf = HTML(string=html).write_pdf(stylesheets=[css], font_config=fuentes)
+
+        # Si otro proceso lo guardó al mismo tiempo el contenido es idéntico
+        if not default_storage.exists(ruta):
+            ruta = default_storage.save(ruta, ContentFile(pdf))
+
+    return ruta, contenido
+
+
+def generar_pdfs(ids_facturas):
+    """
+    Genera los PDF de un lote de facturas (usado por el pool de procesos
+    de generar_pdfs_facturas). Devuelve (generados, existentes, errores).
+    """
+    import django
+    from django.apps import apps
+    from django.db import connection
+
+    if not apps.ready:
+        django.setup()
+
+    generados = existentes = 0
+    errores = []
+
+    for factura in facturas_para_pdf().filter(id__in=ids_facturas):
+        try:
+            _html, contenido = html_factura(factura)
+            if default_storage.exists(ruta_pdf(contenido)):
+                existentes += 1
+            else:
+                obtener_pdf_factura(factura)
+                generados += 1
+        except Exception as e:
+            errores.append((factura.codigo_factura, str(e)))
+
+    connection.close()
+    return generados, existentes, errores
@@ -0,0 +1,68 @@
+"""
+Asignación de números de documento desde SecuenciaDocumento.
+Renzzo Eléctricos - Villavicencio, Meta
+
+Con FACTURACION_BLOQUE_NUMEROS = 1 (por defecto) cada número sale de un
+UPDATE atómico sobre la serie. Con un valor mayor, cada worker reserva un
+bloque de números de una vez y los entrega desde memoria, así bajo ráfagas
+de facturación los workers casi no compiten por la fila de la serie.
+A cambio, la numeración puede tener huecos (bloques sin usar al reiniciar
+un worker) y no sigue el orden cronológico entre workers.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import SecuenciaDocumento
+
+
+class _Bloque:
+    """Rango de números reservados por este proceso para una serie."""
+    
+    def __init__(self, primero, ultimo):
+        self.siguiente = primero
+        self.ultimo = ultimo
+        # Solo se reutiliza cuando la transacción que lo reservó hizo commit;
+        # si hizo rollback la reserva se deshizo y esos números no son nuestros
+        self.confirmado = False
+    
+    def disponibles(self):
+        return self.ultimo - self.siguiente + 1
+
+
+_bloques = {}
+_candado = threading.Lock()
+
+
+def tamano_bloque():
+    return max(int(getattr(settings, 'FACTURACION_BLOQUE_NUMEROS', 1)), 1)
+
+
+def siguiente_numero(prefijo, anio=0):
+    """Siguiente número de la serie prefijo/anio (O(1), sin recorrer documentos)."""
+    cantidad = tamano_bloque()
+    if cantidad == 1:
+        primero, _ = SecuenciaDocumento.reservar(prefijo, anio)
+        return primero
+    
+    clave = (prefijo, anio)
+    with _candado:
+        bloque = _bloques.get(clave)
+        if bloque and bloque.confirmado and bloque.disponibles() > 0:
+            numero = bloque.siguiente
+            bloque.siguiente += 1
+            return numero
+    
+    # Reservar un bloque nuevo; el primer número se usa de inmediato
+    primero, ultimo = SecuenciaDocumento.reservar(prefijo, anio, cantidad)
+    bloque = _Bloque(primero + 1, ultimo)
+    with _candado:
+        _bloques[clave] = bloque
+    
+    def confirmar():
+        with _candado:
+            bloque.confirmado = True
+    
+    transaction.on_commit(confirmar)
+    return primero
@@ -10,9 +10,15 @@
     let clienteSeleccionado = null;
     let productosEnTabla = [];
     let productoIdCounter = 1;
+    let claveEnvioFactura = null;  // Idempotency-Key del envío en curso
     
     // URLs para AJAX
-    const buscarProductosUrl = '/facturacion/ajax/buscar-productos/';
+    const buscarProductosUrl = '/dashboard/facturacion/ajax/buscar-productos/';
+    const listarClientesUrl = '/dashboard/facturacion/ajax/listar-clientes/';
+    const guardarFacturaUrl = '/dashboard/facturacion/ajax/guardar-factura/';
+    
+    // Intentos de envío de la factura ante fallas de conexión
+    const MAX_INTENTOS_GUARDAR = 5;
 
     // Inicialización cuando el DOM esté listo
     document.addEventListener('DOMContentLoaded', function() {
@@ -28,102 +34,52 @@
     function inicializarSelect2Cliente() {
         const selectCliente = $('#cliente_id');
         
-        // Primero cargar todos los clientes disponibles
-        fetch('/facturacion/ajax/listar-clientes/?q=')
-            .then(response => response.json())
-            .then(data => {
-                console.log('Clientes cargados:', data);
-                
-                // Limpiar opciones actuales (excepto placeholder y nuevo)
-                selectCliente.find('option').not('[value=""], [value="nuevo"]').remove();
-                
-                // Agregar clientes al select
-                if (data.results && data.results.length > 0) {
-                    data.results.forEach(cliente => {
-                        const option = new Option(
-                            cliente.text,
-                            cliente.id,
-                            false,
-                            false
-                        );
-                        // Guardar datos adicionales del cliente
-                        $(option).data('cliente', cliente);
-                        selectCliente.append(option);
-                    });
+        // Búsqueda en el servidor, paginada (scroll infinito de Select2)
+        selectCliente.select2({
+            theme: 'bootstrap-5',
+            placeholder: '-- Seleccionar Cliente --',
+            allowClear: true,
+            language: {
+                noResults: function() {
+                    return 'No se encontraron clientes';
+                },
+                searching: function() {
+                    return 'Buscando...';
+                },
+                loadingMore: function() {
+                    return 'Cargando más clientes...';
+                },
+                errorLoading: function() {
+                    return 'Error al cargar clientes. Intente nuevamente.';
                 }
-                
-                // Ahora inicializar Select2
-                selectCliente.select2({
-                    theme: 'bootstrap-5',
-                    placeholder: '-- Seleccionar Cliente --',
-                    allowClear: true,
-                    language: {
-                        noResults: function() {
-                            return 'No se encontraron clientes';
-                        },
-                        searching: function() {
-                            return 'Buscando...';
-                        }
-                    },
-                    // Función personalizada para buscar en nombre, NIT y correo
-                    matcher: function(params, data) {
-                        // Si no hay término de búsqueda, mostrar todo
-                        if ($.trim(params.term) === '') {
-                            return data;
-                        }
-                        
-                        // No filtrar la opción "nuevo"
-                        if (data.id === 'nuevo') {
-                            return data;
-                        }
-                        
-                        // Obtener datos completos del cliente
-                        const clienteData = $(data.element).data('cliente');
-                        if (!clienteData) {
-                            return null;
-                        }
-                        
-                        // Convertir término de búsqueda a minúsculas
-                        const termino = params.term.toLowerCase();
-                        
-                        // Buscar en nombre, NIT y email
-                        const nombre = (clienteData.nombre || '').toLowerCase();
-                        const nit = (clienteData.nit || '').toLowerCase();
-                        const email = (clienteData.email || '').toLowerCase();
-                        const texto = (data.text || '').toLowerCase();
-                        
-                        // Si coincide con alguno de los campos, mostrar
-                        if (nombre.indexOf(termino) > -1 || 
-                            nit.indexOf(termino) > -1 || 
-                            email.indexOf(termino) > -1 ||
-                            texto.indexOf(termino) > -1) {
-                            return data;
-                        }
-                        
-                        // No hay coincidencia
-                        return null;
-                    },
-                    templateResult: formatearOpcionCliente,
-                    templateSelection: formatearSeleccionCliente
-                });
-                
-                console.log('Select2 inicializado con', selectCliente.find('option').length - 1, 'clientes');
-            })
-            .catch(error => {
-                console.error('Error al cargar clientes:', error);
-                
-                // Inicializar Select2 sin clientes
-                selectCliente.select2({
-                    theme: 'bootstrap-5',
-                    placeholder: '-- Seleccionar Cliente --',
-                    allowClear: true,
-                    language: {
-                        noResults: function() {
-                            return 'Error al cargar clientes. Recargue la página.';
-                        }
+            },
+            ajax: {
+                url: listarClientesUrl,
+                dataType: 'json',
+                delay: 250,
+                data: function(params) {
+                    return {
+                        q: params.term || '',
+                        page: params.page || 1
+                    };
+                },
+                processResults: function(data, params) {
+                    const results = data.results || [];
+                    
+                    // La opción "Crear Nuevo Cliente" siempre al inicio de la primera página
+                    if ((params.page || 1) === 1) {
+                        results.unshift({ id: 'nuevo', text: '+ Crear Nuevo Cliente' });
                     }
-                });
-            });
+                    
+                    return {
+                        results: results,
+                        pagination: data.pagination
+                    };
+                }
+            },
+            templateResult: formatearOpcionCliente,
+            templateSelection: formatearSeleccionCliente
+        });
 
         // Evento cuando se selecciona un cliente
         selectCliente.on('select2:select', function(e) {
@@ -212,6 +168,7 @@
         document.getElementById('infoEmail').textContent = cliente.email || '-';
         document.getElementById('infoTelefono').textContent = cliente.telefono || '-';
         document.getElementById('infoDireccion').textContent = cliente.direccion || '-';
+        document.getElementById('infoSaldo').textContent = `$${parseFloat(cliente.saldo_pendiente || 0).toFixed(2)}`;
         
         // Mostrar el contenedor de información
         document.getElementById('clienteInfo').style.display = 'block';
@@ -641,8 +598,9 @@
                     <div class="select2-producto-result">
                         <div class="fw-bold">${producto.text}</div>
                         <div class="small text-muted">
-                            ${producto.upc ? `Código: ${producto.upc} | ` : ''}
+                            ${producto.codigo ? `Código: ${producto.codigo} | ` : ''}
                             Precio: $${precio.toFixed(2)}
+                            ${producto.stock !== undefined ? ` | Stock: ${parseFloat(producto.stock)}` : ''}
                         </div>
                     </div>
                 `);
@@ -658,14 +616,14 @@
             console.log('Producto seleccionado:', data);
             
             if (data.producto) {
-                // Agregar producto de Oscar a la tabla
+                // Agregar producto del catálogo a la tabla
                 const producto = {
-                    id: `oscar_${data.producto.id}`,
+                    id: `producto_${data.producto.id}_${productoIdCounter++}`,
                     descripcion: data.producto.text,
                     cantidad: 1,
                     precio_unitario: parseFloat(data.producto.precio || 0),
                     descuento: 0,
-                    producto_oscar_id: data.producto.id
+                    producto_id: data.producto.id
                 };
                 
                 console.log('Agregando producto a tabla:', producto);
@@ -691,7 +649,7 @@
             cantidad: 1,
             precio_unitario: 0,
             descuento: 0,
-            producto_oscar_id: null
+            producto_id: null
         };
         
         agregarProductoATabla(producto);
@@ -934,7 +892,7 @@
             cantidad: parseFloat(p.cantidad),
             precio_unitario: parseFloat(p.precio_unitario),
             descuento: parseFloat(p.descuento),
-            producto_id: p.producto_oscar_id
+            producto_id: p.producto_id
         }));
         
         // Datos a enviar
@@ -946,6 +904,12 @@
             notas: notas
         };
         
+        // La misma clave se reutiliza en los reintentos de este envío: si el
+        // servidor ya guardó la factura, devuelve la original en vez de duplicarla
+        if (!claveEnvioFactura) {
+            claveEnvioFactura = generarClaveEnvio();
+        }
+        
         // Mostrar loading
         Swal.fire({
             title: 'Generando factura...',
@@ -956,18 +920,7 @@
             }
         });
         
-        // Enviar al servidor
-        const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
-        
-        fetch('/facturacion/ajax/guardar-factura/', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': csrftoken
-            },
-            body: JSON.stringify(datosFactura)
-        })
-        .then(response => response.json())
+        enviarFactura(datosFactura, claveEnvioFactura, 1)
         .then(data => {
             if (data.success) {
                 // Mostrar éxito con información de la factura
@@ -979,6 +932,11 @@
                             <p><strong>Código:</strong> ${data.factura.codigo_factura}</p>
                             <p><strong>Total:</strong> $${parseFloat(data.factura.total_pagar).toFixed(2)}</p>
                             <p><strong>Fecha:</strong> ${data.factura.fecha_emision}</p>
+                            <p>
+                                <a href="${data.factura.pdf_url}" target="_blank" rel="noopener">
+                                    <i class="fas fa-file-pdf"></i> Ver PDF
+                                </a>
+                            </p>
                         </div>
                     `,
                     confirmButtonText: 'Aceptar'
@@ -1004,10 +962,62 @@
         });
     }
 
+    /**
+     * Envía la factura con su clave de idempotencia.
+     * Reintenta ante fallas de red o errores 5xx con espera exponencial;
+     * los reintentos son seguros porque el servidor reconoce la clave.
+     */
+    function enviarFactura(datosFactura, clave, intento) {
+        const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+        
+        return fetch(guardarFacturaUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrftoken,
+                'Idempotency-Key': clave
+            },
+            body: JSON.stringify(datosFactura)
+        })
+        .then(response => {
+            if (response.status >= 500) {
+                const error = new Error(`HTTP ${response.status}`);
+                error.reintentable = true;
+                throw error;
+            }
+            return response.json();
+        })
+        .catch(error => {
+            // fetch lanza TypeError cuando falla la red
+            const reintentable = error instanceof TypeError || error.reintentable;
+            if (!reintentable || intento >= MAX_INTENTOS_GUARDAR) {
+                throw error;
+            }
+            const espera = 1000 * Math.pow(2, intento - 1);
+            console.warn(`Reintentando guardar factura (${intento + 1}/${MAX_INTENTOS_GUARDAR}):`, error);
+            Swal.update({ text: `Reintentando conexión (${intento + 1}/${MAX_INTENTOS_GUARDAR})...` });
+            return new Promise(resolve => setTimeout(resolve, espera))
+                .then(() => enviarFactura(datosFactura, clave, intento + 1));
+        });
+    }
+
+    /**
+     * Clave aleatoria para identificar un envío de factura
+     */
+    function generarClaveEnvio() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+    }
+
     /**
      * Limpia el formulario para crear una nueva factura
      */
     function limpiarFormulario() {
+        // La próxima factura usa una clave de envío nueva
+        claveEnvioFactura = null;
+        
         // Limpiar cliente
         $('#cliente_id').val(null).trigger('change');
         clienteSeleccionado = null;
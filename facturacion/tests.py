@@ -1,3 +1,224 @@
-from django.test import TestCase
+"""
+Pruebas de la app facturación.
+Renzzo Eléctricos - Villavicencio, Meta
+"""
+import json
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from caja.models import CajaRegistradora, MovimientoCaja
+
+from .cartera import recalcular_cartera, registrar_pago
+from .models import (
+    Factura, PagoFactura, ResumenVentasDiario, ResumenVentasProducto, SaldoCliente, SecuenciaDocumento
+)
+from .ventas import reconstruir_resumen_ventas
+
+
+User = get_user_model()
+
+
+class FacturacionTestCase(TestCase):
+    """Usuario emisor (staff) y un cliente; facturas creadas por la vista."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.emisor = User.objects.create_superuser(
+            'vendedor', 'vendedor@renzzo.test', 'clave', rol='ADMINISTRADOR'
+        )
+        cls.cliente = User.objects.create_user(
+            '900123456', 'cliente@renzzo.test', 'clave', rol='CLIENTE', first_name='Cliente'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.emisor)
+
+    def guardar_factura(self, precio='100000', condicion='CONTADO', clave=None, cliente=None, detalles=None):
+        """POST a guardar_factura_ajax; devuelve el JSON de la respuesta."""
+        datos = {
+            'cliente_id': (cliente or self.cliente).id,
+            'condicion_pago': condicion,
+            'detalles': detalles or [
+                {'descripcion': 'Cable 12 AWG', 'cantidad': 1, 'precio_unitario': precio},
+            ],
+        }
+        encabezados = {'HTTP_IDEMPOTENCY_KEY': clave} if clave else {}
+        respuesta = self.client.post(
+            reverse('facturacion:guardar_factura_ajax'),
+            json.dumps(datos),
+            content_type='application/json',
+            **encabezados
+        )
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json()
+
+
+class SecuenciaDocumentoTests(FacturacionTestCase):
+    """Numeración de facturas desde SecuenciaDocumento."""
+
+    def test_reservar_numeros_consecutivos(self):
+        self.assertEqual(SecuenciaDocumento.reservar('PRUEBA'), (1, 1))
+        self.assertEqual(SecuenciaDocumento.reservar('PRUEBA', cantidad=5), (2, 6))
+        self.assertEqual(SecuenciaDocumento.reservar('PRUEBA'), (7, 7))
+        # Cada año es una serie distinta
+        self.assertEqual(SecuenciaDocumento.reservar('PRUEBA', 2025), (1, 1))
+
+    @override_settings(FACTURACION_BLOQUE_NUMEROS=1)
+    def test_codigos_de_factura_consecutivos(self):
+        primera = self.guardar_factura()['factura']['codigo_factura']
+        segunda = self.guardar_factura()['factura']['codigo_factura']
+
+        prefijo, numero = primera.rsplit('-', 1)
+        self.assertEqual(segunda, f'{prefijo}-{int(numero) + 1:06d}')
+        self.assertEqual(Factura.objects.filter(codigo_factura__in=[primera, segunda]).count(), 2)
+
+
+class ResumenVentasTests(FacturacionTestCase):
+    """El resumen de ventas incremental es igual al reconstruido desde las facturas."""
+
+    def filas_resumen(self):
+        diario = ResumenVentasDiario.objects.values_list(
+            'fecha', 'cliente_id', 'metodo_pago', 'facturas', 'subtotal_neto', 'total_iva', 'total_pagar'
+        )
+        productos = ResumenVentasProducto.objects.values_list(
+            'fecha', 'clave', 'producto_id', 'descripcion', 'cantidad', 'total', 'lineas'
+        )
+        return sorted(diario), sorted(productos)
+
+    def assertResumenCuadra(self):
+        incremental = self.filas_resumen()
+        reconstruir_resumen_ventas()
+        self.assertEqual(incremental, self.filas_resumen())
+
+    def test_facturas_emitidas(self):
+        otro_cliente = User.objects.create_user('800555111', 'otro@renzzo.test', 'clave', rol='CLIENTE')
+        self.guardar_factura('100000')
+        self.guardar_factura(detalles=[
+            {'descripcion': 'Cable 12 AWG', 'cantidad': 3, 'precio_unitario': '2500', 'descuento': '100'},
+            {'descripcion': 'Breaker 20A', 'cantidad': 1, 'precio_unitario': '18000', 'tasa_iva': 0},
+        ])
+        self.guardar_factura('50000', cliente=otro_cliente)
+        self.assertResumenCuadra()
+
+        diario = ResumenVentasDiario.objects.get(cliente=self.cliente)
+        self.assertEqual(diario.facturas, 2)
+
+    def test_factura_anulada(self):
+        factura_id = self.guardar_factura('100000')['factura']['id']
+        self.guardar_factura('40000')
+
+        factura = Factura.objects.get(id=factura_id)
+        factura.activa = False
+        factura.save()
+        self.assertResumenCuadra()
+        self.assertEqual(ResumenVentasDiario.objects.get(cliente=self.cliente).facturas, 1)
+
+
+class IdempotenciaFacturaTests(FacturacionTestCase):
+    """Reintentos de guardar_factura_ajax con Idempotency-Key."""
+
+    def setUp(self):
+        super().setUp()
+        # Las respuestas guardadas se indexan por id de usuario: no arrastrarlas entre pruebas
+        cache.clear()
+
+    def test_reintento_devuelve_la_misma_factura(self):
+        original = self.guardar_factura(clave='reintento-0001')
+        repetida = self.guardar_factura(clave='reintento-0001')
+
+        self.assertTrue(repetida['repetida'])
+        self.assertEqual(repetida['factura'], original['factura'])
+        self.assertEqual(Factura.objects.count(), 1)
+
+        # Sin la respuesta en cache se busca la factura guardada
+        cache.clear()
+        self.assertEqual(self.guardar_factura(clave='reintento-0001')['factura']['id'], original['factura']['id'])
+        self.assertEqual(Factura.objects.count(), 1)
+
+    def test_otra_clave_crea_otra_factura(self):
+        original = self.guardar_factura(clave='reintento-0001')
+        otra = self.guardar_factura(clave='reintento-0002')
+
+        self.assertNotIn('repetida', otra)
+        self.assertNotEqual(otra['factura']['id'], original['factura']['id'])
+
+    def test_la_clave_es_de_cada_usuario(self):
+        original = self.guardar_factura(clave='reintento-0001')
+
+        otro_emisor = User.objects.create_superuser(
+            'vendedor2', 'vendedor2@renzzo.test', 'clave', rol='ADMINISTRADOR'
+        )
+        self.client.force_login(otro_emisor)
+        otra = self.guardar_factura(clave='reintento-0001')
+
+        self.assertNotIn('repetida', otra)
+        self.assertNotEqual(otra['factura']['id'], original['factura']['id'])
+        self.assertEqual(Factura.objects.count(), 2)
+
+
+class SaldoClienteTests(FacturacionTestCase):
+    """Saldo por cliente de las facturas a crédito (emisión, pagos y anulación)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Los pagos entran a la caja abierta
+        CajaRegistradora.objects.create(cajero=cls.emisor, monto_inicial=Decimal('0'))
+
+    def saldo(self):
+        saldo = SaldoCliente.objects.get(cliente=self.cliente)
+        return saldo.saldo, saldo.facturas_abiertas
+
+    def assertSaldoCuadra(self):
+        """El saldo incremental es igual al reconstruido desde las facturas y pagos."""
+        incremental = self.saldo()
+        self.assertEqual(recalcular_cartera(), 0)
+        self.assertEqual(incremental, self.saldo())
+
+    def emitir_credito(self, precio):
+        # Sin IVA para que el total sea el precio
+        datos = self.guardar_factura(condicion=Factura.CondicionPago.CREDITO_30, detalles=[
+            {'descripcion': 'Tablero 12 circuitos', 'cantidad': 1, 'precio_unitario': precio, 'tasa_iva': 0},
+        ])
+        return Factura.objects.get(id=datos['factura']['id'])
+
+    def test_emision(self):
+        self.emitir_credito('100000')
+        self.emitir_credito('50000')
+        self.guardar_factura('30000')  # de contado: no suma al saldo
+
+        self.assertEqual(self.saldo(), (Decimal('150000'), 2))
+        self.assertSaldoCuadra()
+
+    def test_pagos(self):
+        factura = self.emitir_credito('100000')
+        otra = self.emitir_credito('50000')
+
+        registrar_pago(factura.id, '40000', self.emisor)
+        self.assertEqual(self.saldo(), (Decimal('110000'), 2))
+
+        pago = registrar_pago(factura.id, '60000', self.emisor)
+        self.assertEqual(self.saldo(), (Decimal('50000'), 1))
+        self.assertEqual(pago.factura.saldo_pendiente, Decimal('0'))
+        self.assertEqual(pago.movimiento_caja.tipo, 'INGRESO')
+        self.assertEqual(MovimientoCaja.objects.filter(tipo_movimiento__codigo='COBRO_CXC').count(), 2)
+        self.assertSaldoCuadra()
+
+        with self.assertRaises(ValueError):
+            registrar_pago(otra.id, '50000.01', self.emisor)
+        with self.assertRaises(ValueError):
+            registrar_pago(otra.id, 'abc', self.emisor)
+        self.assertEqual(PagoFactura.objects.count(), 2)
+
+    def test_anulacion(self):
+        factura = self.emitir_credito('100000')
+        self.emitir_credito('50000')
+
+        factura.activa = False
+        factura.save()
+        self.assertEqual(self.saldo(), (Decimal('50000'), 1))
+        self.assertSaldoCuadra()
@@ -0,0 +1,85 @@
+"""
+Recálculo de totales de facturas desde sus detalles.
+Renzzo Eléctricos - Villavicencio, Meta
+
+Las facturas guardan sus totales al emitirse (Factura.asignar_totales).
+agregar_totales_por_factura los recalcula para un lote de facturas con una
+sola consulta agrupada sobre DetalleFactura, con la misma fórmula y el mismo
+redondeo, y se usa para verificar/reparar totales (comando recalcular_facturas).
+"""
+from dataclasses import dataclass, asdict
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from .models import CENTAVO, DetalleFactura
+
+
+CERO = Decimal('0.00')
+
+
+def _decimal(expresion):
+    return ExpressionWrapper(expresion, output_field=DecimalField(max_digits=30, decimal_places=6))
+
+
+@dataclass(frozen=True)
+class TotalesFactura:
+    """Totales de una factura con los nombres de Factura.CAMPOS_TOTALES."""
+    subtotal: Decimal = CERO
+    total_descuentos: Decimal = CERO
+    subtotal_neto: Decimal = CERO
+    total_iva: Decimal = CERO
+    total_pagar: Decimal = CERO
+
+    @classmethod
+    def desde_factura(cls, factura):
+        return cls(
+            subtotal=factura.subtotal,
+            total_descuentos=factura.total_descuentos,
+            subtotal_neto=factura.subtotal_neto,
+            total_iva=factura.total_iva,
+            total_pagar=factura.total_pagar,
+        )
+
+    @classmethod
+    def desde_sumas(cls, subtotal, descuentos, iva):
+        """Totales redondeados a partir de las sumas sin redondear."""
+        subtotal = subtotal or CERO
+        descuentos = descuentos or CERO
+        iva = iva or CERO
+        neto = subtotal - descuentos
+        return cls(
+            subtotal=subtotal.quantize(CENTAVO),
+            total_descuentos=descuentos.quantize(CENTAVO),
+            subtotal_neto=neto.quantize(CENTAVO),
+            total_iva=iva.quantize(CENTAVO),
+            total_pagar=(neto + iva).quantize(CENTAVO),
+        )
+
+    def como_campos_factura(self):
+        return asdict(self)
+
+
+def agregar_totales_por_factura(ids_facturas):
+    """
+    Totales reales de varias facturas en una sola consulta agrupada.
+    Devuelve {factura_id: TotalesFactura}; las facturas sin detalles no aparecen.
+    """
+    neto_linea = (F('precio_unitario') - F('descuento')) * F('cantidad')
+    filas = (
+        DetalleFactura.objects
+        .filter(factura_id__in=ids_facturas)
+        .values('factura_id')
+        .annotate(
+            suma_subtotal=Sum(_decimal(F('precio_unitario') * F('cantidad'))),
+            suma_descuentos=Sum(_decimal(F('descuento') * F('cantidad'))),
+            suma_iva=Sum(_decimal(neto_linea * F('tasa_iva'))),
+        )
+        .order_by()
+    )
+    return {
+        fila['factura_id']: TotalesFactura.desde_sumas(
+            fila['suma_subtotal'], fila['suma_descuentos'], fila['suma_iva']
+        )
+        for fila in filas
+    }
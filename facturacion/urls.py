@@ -16,4 +16,12 @@ urlpatterns = [
     path('ajax/crear-cliente/', views.crear_cliente_ajax, name='crear_cliente_ajax'),
     path('ajax/buscar-productos/', views.buscar_productos_ajax, name='buscar_productos_ajax'),
     path('ajax/guardar-factura/', views.guardar_factura_ajax, name='guardar_factura_ajax'),
+    path('ajax/reporte-ventas/', views.reporte_ventas_ajax, name='reporte_ventas_ajax'),
+    
+    # Cuentas por cobrar
+    path('ajax/registrar-pago/', views.registrar_pago_ajax, name='registrar_pago_ajax'),
+    path('ajax/cartera/', views.cartera_ajax, name='cartera_ajax'),
+    
+    # PDF de factura
+    path('factura/<int:factura_id>/pdf/', views.factura_pdf, name='factura_pdf'),
 ]
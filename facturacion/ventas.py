@@ -0,0 +1,280 @@
+"""
+Resumen de ventas (ResumenVentasDiario / ResumenVentasProducto) y reportes.
+Renzzo Eléctricos - Villavicencio, Meta
+
+- Al emitir una factura, guardar_factura_ajax suma su aporte al resumen con
+  unas pocas consultas (registrar_factura).
+- Al anular o modificar una factura (admin o código) se reconstruyen los
+  días afectados desde las facturas activas de ese día (actualizar_dias).
+- Los reportes y el dashboard leen solo el resumen, agrupado por día,
+  cliente, método de pago o producto.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from .busqueda import normalizar
+from .models import DetalleFactura, Factura, ResumenVentasDiario, ResumenVentasProducto
+
+
+CERO = Decimal('0.00')
+
+CAMPOS_DIARIO = ('facturas', 'subtotal_neto', 'total_iva', 'total_pagar')
+CAMPOS_PRODUCTO = ('cantidad', 'total', 'lineas')
+
+# Agrupaciones disponibles en resumen_ventas()
+AGRUPACIONES = ('dia', 'cliente', 'metodo_pago', 'producto')
+
+
+def _inicio_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def clave_producto(producto_id, descripcion):
+    """Clave del resumen por producto: el id del catálogo o la descripción normalizada."""
+    if producto_id:
+        return f'P{producto_id}'
+    texto = ' '.join(normalizar(descripcion).split())
+    return 'D' + hashlib.sha1(texto.encode()).hexdigest()
+
+
+def _acumular_linea(aportes, producto_id, descripcion, cantidad, total):
+    """Suma una línea de factura a `aportes` ({clave: valores de ResumenVentasProducto})."""
+    clave = clave_producto(producto_id, descripcion)
+    aporte = aportes.get(clave)
+    if aporte is None:
+        aporte = aportes[clave] = {
+            'producto_id': producto_id,
+            'descripcion': (descripcion or '')[:255],
+            'cantidad': CERO,
+            'total': CERO,
+            'lineas': 0,
+        }
+    aporte['cantidad'] += cantidad
+    aporte['total'] += total
+    aporte['lineas'] += 1
+
+
+def _sumar(modelo, clave, valores, extra=None):
+    """
+    Suma `valores` a la fila `clave` con un UPDATE atómico (F()).
+    Crea la fila si todavía no existe.
+    """
+    cambios = {campo: F(campo) + valor for campo, valor in valores.items()}
+    if modelo.objects.filter(**clave).update(**cambios):
+        return
+
+    try:
+        # Savepoint: si otra petición creó la fila al mismo tiempo, sumar sobre ella
+        with transaction.atomic():
+            modelo.objects.create(**clave, **valores, **(extra or {}))
+    except IntegrityError:
+        modelo.objects.filter(**clave).update(**cambios)
+
+
+def registrar_factura(factura, detalles):
+    """
+    Suma una factura recién emitida (y sus líneas en memoria) al resumen.
+    Hace una consulta para el resumen diario y tres para los productos,
+    sin importar cuántas líneas tenga la factura.
+    """
+    if not factura.activa:
+        return
+
+    fecha = timezone.localdate(factura.fecha_emision)
+    _sumar(
+        ResumenVentasDiario,
+        {'fecha': fecha, 'cliente_id': factura.cliente_id, 'metodo_pago': factura.metodo_pago},
+        {
+            'facturas': 1,
+            'subtotal_neto': factura.subtotal_neto,
+            'total_iva': factura.total_iva,
+            'total_pagar': factura.total_pagar,
+        },
+    )
+
+    aportes = {}
+    for detalle in detalles:
+        _acumular_linea(aportes, detalle.producto_id, detalle.descripcion, detalle.cantidad, detalle.total)
+    if not aportes:
+        return
+
+    existentes = dict(
+        ResumenVentasProducto.objects.filter(fecha=fecha, clave__in=list(aportes))
+        .values_list('clave', 'id')
+    )
+
+    # Filas existentes: un solo UPDATE con F() por lote
+    actualizar = []
+    for clave, resumen_id in existentes.items():
+        aporte = aportes[clave]
+        resumen = ResumenVentasProducto(id=resumen_id)
+        for campo in CAMPOS_PRODUCTO:
+            setattr(resumen, campo, F(campo) + aporte[campo])
+        actualizar.append(resumen)
+    if actualizar:
+        ResumenVentasProducto.objects.bulk_update(actualizar, CAMPOS_PRODUCTO, batch_size=500)
+
+    nuevas = [
+        ResumenVentasProducto(fecha=fecha, clave=clave, **aporte)
+        for clave, aporte in aportes.items() if clave not in existentes
+    ]
+    if not nuevas:
+        return
+    try:
+        with transaction.atomic():
+            ResumenVentasProducto.objects.bulk_create(nuevas, batch_size=500)
+    except IntegrityError:
+        # Otra factura del mismo día creó alguna fila al mismo tiempo
+        for resumen in nuevas:
+            _sumar(
+                ResumenVentasProducto,
+                {'fecha': fecha, 'clave': resumen.clave},
+                {campo: getattr(resumen, campo) for campo in CAMPOS_PRODUCTO},
+                {'producto_id': resumen.producto_id, 'descripcion': resumen.descripcion},
+            )
+
+
+def reconstruir_resumen_ventas(desde=None, hasta=None, lote=2000):
+    """
+    Reconstruye el resumen de ventas de los días [desde, hasta] (dates,
+    inclusive; None = sin límite) desde las facturas activas.
+    Devuelve (filas_diarias, filas_producto).
+
+    El día local se calcula en Python para no depender de las tablas de
+    zonas horarias de MySQL.
+    """
+    facturas = Factura.objects.filter(activa=True).order_by()
+    detalles = DetalleFactura.objects.filter(factura__activa=True).order_by()
+    resumen_diario = ResumenVentasDiario.objects.all()
+    resumen_producto = ResumenVentasProducto.objects.all()
+
+    if desde is not None:
+        facturas = facturas.filter(fecha_emision__gte=_inicio_dia(desde))
+        detalles = detalles.filter(factura__fecha_emision__gte=_inicio_dia(desde))
+        resumen_diario = resumen_diario.filter(fecha__gte=desde)
+        resumen_producto = resumen_producto.filter(fecha__gte=desde)
+    if hasta is not None:
+        fin = _inicio_dia(hasta + timedelta(days=1))
+        facturas = facturas.filter(fecha_emision__lt=fin)
+        detalles = detalles.filter(factura__fecha_emision__lt=fin)
+        resumen_diario = resumen_diario.filter(fecha__lte=hasta)
+        resumen_producto = resumen_producto.filter(fecha__lte=hasta)
+
+    diario = defaultdict(lambda: [0, CERO, CERO, CERO])
+    filas = facturas.values_list(
+        'fecha_emision', 'cliente_id', 'metodo_pago', 'subtotal_neto', 'total_iva', 'total_pagar'
+    )
+    for fecha_emision, cliente_id, metodo_pago, neto, iva, total in filas.iterator(chunk_size=lote):
+        acumulado = diario[(timezone.localdate(fecha_emision), cliente_id, metodo_pago)]
+        acumulado[0] += 1
+        acumulado[1] += neto
+        acumulado[2] += iva
+        acumulado[3] += total
+
+    productos = defaultdict(dict)
+    filas = detalles.values_list(
+        'factura__fecha_emision', 'producto_id', 'descripcion', 'cantidad', 'total'
+    )
+    for fecha_emision, *linea in filas.iterator(chunk_size=lote):
+        _acumular_linea(productos[timezone.localdate(fecha_emision)], *linea)
+
+    nuevas_diario = [
+        ResumenVentasDiario(
+            fecha=fecha,
+            cliente_id=cliente_id,
+            metodo_pago=metodo_pago,
+            **dict(zip(CAMPOS_DIARIO, valores)),
+        )
+        for (fecha, cliente_id, metodo_pago), valores in diario.items()
+    ]
+    nuevas_producto = [
+        ResumenVentasProducto(fecha=fecha, clave=clave, **aporte)
+        for fecha, aportes in productos.items()
+        for clave, aporte in aportes.items()
+    ]
+
+    with transaction.atomic():
+        resumen_diario.delete()
+        resumen_producto.delete()
+        ResumenVentasDiario.objects.bulk_create(nuevas_diario, batch_size=lote)
+        ResumenVentasProducto.objects.bulk_create(nuevas_producto, batch_size=lote)
+
+    return len(nuevas_diario), len(nuevas_producto)
+
+
+def actualizar_dias(*momentos):
+    """Reconstruye el resumen de los días locales de los datetimes dados."""
+    for dia in sorted({timezone.localdate(m) for m in momentos if m}):
+        reconstruir_resumen_ventas(dia, dia)
+
+
+# ============================================================================
+# REPORTES
+# ============================================================================
+
+def resumen_ventas(desde, hasta, agrupar='dia', limite=None):
+    """
+    Ventas de los días [desde, hasta] (dates, inclusive) agrupadas por
+    'dia', 'cliente', 'metodo_pago' o 'producto'. Una consulta sobre el
+    resumen; 'cliente' y 'producto' se ordenan de mayor a menor venta
+    (limite = top N). Devuelve una lista de diccionarios.
+    """
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f'Agrupación no válida: {agrupar}')
+
+    rango = {'fecha__gte': desde, 'fecha__lte': hasta}
+
+    # Las sumas llevan prefijo porque no pueden llamarse como los campos del modelo
+    if agrupar == 'producto':
+        filas = (
+            ResumenVentasProducto.objects.filter(**rango)
+            .values('clave')
+            .annotate(
+                suma_producto_id=Max('producto_id'),
+                suma_descripcion=Max('descripcion'),
+                **{f'suma_{campo}': Sum(campo) for campo in CAMPOS_PRODUCTO},
+            )
+            .order_by('-suma_total', 'clave')
+        )
+    else:
+        campos = {
+            'dia': ('fecha',),
+            'cliente': ('cliente_id', 'cliente__username', 'cliente__first_name', 'cliente__last_name'),
+            'metodo_pago': ('metodo_pago',),
+        }[agrupar]
+        filas = (
+            ResumenVentasDiario.objects.filter(**rango)
+            .values(*campos)
+            .annotate(**{f'suma_{campo}': Sum(campo) for campo in CAMPOS_DIARIO})
+            .order_by(*(campos if agrupar == 'dia' else ('-suma_total_pagar', campos[0])))
+        )
+
+    if limite:
+        filas = filas[:limite]
+
+    return [
+        {campo.removeprefix('suma_'): valor for campo, valor in fila.items()}
+        for fila in filas
+    ]
+
+
+def resumen_mes(hoy=None, top=5):
+    """Totales del mes en curso y productos más vendidos (para el dashboard)."""
+    hoy = hoy or timezone.localdate()
+    inicio = hoy.replace(day=1)
+
+    totales = ResumenVentasDiario.objects.filter(
+        fecha__gte=inicio, fecha__lte=hoy
+    ).aggregate(facturas=Sum('facturas'), ventas=Sum('total_pagar'))
+
+    return {
+        'facturas_mes': totales['facturas'] or 0,
+        'ventas_mes': totales['ventas'] or CERO,
+        'top_productos_mes': resumen_ventas(inicio, hoy, 'producto', limite=top),
+    }
@@ -2,28 +2,38 @@
 Vistas para el sistema de facturación.
 Renzzo Eléctricos - Villavicencio, Meta
 """
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.files.storage import default_storage
+from django.http import JsonResponse, FileResponse, HttpResponseNotModified
 from django.views.decorators.http import require_POST, require_GET
-from django.db import transaction
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
+from django.urls import reverse
 from django.utils import timezone
+from datetime import date
 from decimal import Decimal
 import json
+import logging
+import re
 
-# Importar modelos de Oscar - TEMPORALMENTE COMENTADO (Oscar removido)
-# from catalogue.models import Product
-Product = None  # Placeholder temporal
+from caja.decorators import staff_or_permission_required
 
 # Importar modelos propios
-from .models import Factura, DetalleFactura
+from .models import Factura, DetalleFactura, Producto, SaldoCliente
+from .busqueda import buscar_clientes, buscar_productos
+from .monitoreo import medir_peticion
+from .pdf import facturas_para_pdf, obtener_pdf_factura
+from .ventas import AGRUPACIONES, registrar_factura, resumen_ventas
+from .cartera import antiguedad_cartera, registrar_credito, registrar_pago
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 @login_required
 def facturacion_index(request):
@@ -34,38 +44,39 @@ def facturacion_index(request):
     return render(request, 'facturacion/index.html')
 
 
+# Clientes por página en el Select2
+CLIENTES_POR_PAGINA = 20
+
+
 @login_required
 @require_GET
+@medir_peticion
 def listar_clientes_ajax(request):
     """
-    Lista todos los usuarios con rol CLIENTE para el Select2.
-    Soporta búsqueda por nombre, email o NIT.
+    Lista los usuarios con rol CLIENTE para el Select2 (paginado).
+    Soporta búsqueda por nombre, NIT, email o teléfono usando el índice
+    TerminoBusquedaCliente (ver busqueda.py); los resultados van por relevancia.
     """
     try:
-        # Obtener parámetro de búsqueda de Select2
+        # Parámetros de búsqueda y página de Select2
         search = request.GET.get('q', '').strip()
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
         
-        # Filtrar solo usuarios con rol CLIENTE (usar string directamente)
-        clientes = User.objects.filter(rol='CLIENTE', activo=True, is_active=True)
-        
-        # Log para debugging
-        print(f"[DEBUG] Búsqueda: '{search}'")
-        print(f"[DEBUG] Total clientes activos: {clientes.count()}")
+        clientes, hay_mas = buscar_clientes(search, page, CLIENTES_POR_PAGINA)
         
-        # Aplicar búsqueda si existe
-        if search:
-            clientes = clientes.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(username__icontains=search)  # username será el NIT
-            )
-            print(f"[DEBUG] Clientes después de filtro búsqueda: {clientes.count()}")
+        # Saldo pendiente de la página de clientes (una consulta a SaldoCliente)
+        saldos = dict(
+            SaldoCliente.objects.filter(cliente_id__in=[c.id for c in clientes])
+            .values_list('cliente_id', 'saldo')
+        )
         
         # Preparar resultados para Select2
         results = []
-        for cliente in clientes[:20]:  # Limitar a 20 resultados
-            result_item = {
+        for cliente in clientes:
+            results.append({
                 'id': cliente.id,
                 'text': f"{cliente.get_full_name() or cliente.username} - {cliente.email}",
                 'nombre': cliente.get_full_name(),
@@ -73,27 +84,25 @@ def listar_clientes_ajax(request):
                 'email': cliente.email,
                 'telefono': cliente.telefono or '',
                 'direccion': cliente.direccion or '',
-            }
-            results.append(result_item)
-            print(f"[DEBUG] Cliente agregado: {result_item}")
+                'saldo_pendiente': str(saldos.get(cliente.id, Decimal('0.00'))),
+            })
         
-        print(f"[DEBUG] Total resultados a enviar: {len(results)}")
+        if request.log_detallado:
+            logger.debug("Búsqueda de clientes: q=%r página=%s resultados=%d", search, page, len(results))
         
-        response_data = {
+        return JsonResponse({
             'results': results,
-            'pagination': {'more': False}
-        }
-        
-        print(f"[DEBUG] Response JSON: {response_data}")
-        
-        return JsonResponse(response_data)
+            'pagination': {'more': hay_mas}
+        })
         
     except Exception as e:
+        logger.error("Error en listar_clientes_ajax: %s", e, exc_info=True)
         return JsonResponse({'error': str(e)}, status=500)
 
 
 @login_required
 @require_POST
+@medir_peticion
 def crear_cliente_ajax(request):
     """
     Crea un nuevo cliente (User con rol CLIENTE) mediante AJAX.
@@ -172,6 +181,7 @@ def crear_cliente_ajax(request):
         }, status=400)
         
     except Exception as e:
+        logger.error("Error en crear_cliente_ajax: %s", e, exc_info=True)
         return JsonResponse({
             'success': False,
             'message': f'Error al crear cliente: {str(e)}'
@@ -180,68 +190,53 @@ def crear_cliente_ajax(request):
 
 @login_required
 @require_GET
+@medir_peticion
 def buscar_productos_ajax(request):
     """
-    Busca productos del catálogo de Django Oscar por título o UPC.
-    Retorna un JSON compatible con Select2.
+    Busca productos del catálogo local (Producto) por palabras del nombre,
+    código o código de barras. Retorna un JSON compatible con Select2, paginado.
     """
     query = request.GET.get('q', '').strip()
-    page = int(request.GET.get('page', 1))
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
     page_size = 20
     
-    print(f"[DEBUG PRODUCTOS] Query recibida: '{query}'")
-    print(f"[DEBUG PRODUCTOS] Modelo Product: {Product}")
+    if request.log_detallado:
+        logger.debug("Búsqueda de productos: q=%r página=%s", query, page)
     
     if not query or len(query) < 1:
-        print(f"[DEBUG PRODUCTOS] Query muy corta o vacía")
         return JsonResponse({
             'results': [],
             'pagination': {'more': False}
         })
     
     try:
-        # Buscar en productos de Oscar
-        productos = Product.objects.filter(
-            Q(title__icontains=query) | Q(upc__icontains=query)
-        ).distinct()[:page_size]
-        
-        print(f"[DEBUG PRODUCTOS] Productos encontrados: {productos.count()}")
+        productos, hay_mas = buscar_productos(query, page, page_size)
         
         results = []
         for producto in productos:
-            print(f"[DEBUG PRODUCTOS] Procesando: {producto.title}")
-            
-            # Obtener precio del producto
-            precio = Decimal('0.00')
-            if hasattr(producto, 'stockrecords') and producto.stockrecords.exists():
-                stockrecord = producto.stockrecords.first()
-                if stockrecord.price:
-                    precio = stockrecord.price
-            
-            result_item = {
+            results.append({
                 'id': producto.id,
-                'text': producto.title,
-                'upc': producto.upc or '',
-                'precio': str(precio),
-                'descripcion': producto.description or producto.title,
-            }
-            results.append(result_item)
-            print(f"[DEBUG PRODUCTOS] Agregado: {result_item}")
+                'text': producto.nombre,
+                'codigo': producto.codigo,
+                'upc': producto.upc,
+                'precio': str(producto.precio),
+                'stock': str(producto.stock),
+                'descripcion': producto.nombre,
+            })
         
-        print(f"[DEBUG PRODUCTOS] Total resultados: {len(results)}")
+        if request.log_detallado:
+            logger.debug("Búsqueda de productos: q=%r resultados=%d", query, len(results))
         
-        response_data = {
+        return JsonResponse({
             'results': results,
-            'pagination': {'more': False}
-        }
-        print(f"[DEBUG PRODUCTOS] Response: {response_data}")
-        
-        return JsonResponse(response_data)
+            'pagination': {'more': hay_mas}
+        })
             
     except Exception as e:
-        print(f"[DEBUG PRODUCTOS] ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Error en buscar_productos_ajax (q=%r): %s", query, e, exc_info=True)
         return JsonResponse({
             'results': [],
             'pagination': {'more': False},
@@ -249,18 +244,77 @@ def buscar_productos_ajax(request):
         }, status=500)
 
 
+# Reintentos de guardar_factura_ajax (ver clave_idempotencia en Factura)
+CLAVE_IDEMPOTENCIA = re.compile(r'[A-Za-z0-9_-]{8,64}')
+PREFIJO_CACHE_IDEMPOTENCIA = 'facturacion:idempotencia:'
+SEGUNDOS_CACHE_IDEMPOTENCIA = 60 * 60 * 24
+
+
+def _respuesta_factura_guardada(factura):
+    """Cuerpo de la respuesta exitosa de guardar_factura_ajax."""
+    return {
+        'success': True,
+        'message': 'Factura generada exitosamente',
+        'factura': {
+            'id': factura.id,
+            'codigo_factura': factura.codigo_factura,
+            'total_pagar': str(factura.total_pagar),
+            'fecha_emision': timezone.localtime(factura.fecha_emision).strftime('%d/%m/%Y %H:%M'),
+            'pdf_url': reverse('facturacion:factura_pdf', args=[factura.id]),
+        }
+    }
+
+
+def _clave_cache_idempotencia(usuario_id, clave):
+    return f'{PREFIJO_CACHE_IDEMPOTENCIA}{usuario_id}:{clave}'
+
+
+def _respuesta_repetida(usuario_id, clave):
+    """
+    Respuesta original de un envío ya procesado por este usuario con esta
+    clave, o None. Primero el cache (sin consultas); si expiró, la factura guardada.
+    """
+    clave_cache = _clave_cache_idempotencia(usuario_id, clave)
+    respuesta = cache.get(clave_cache)
+    if respuesta is None:
+        factura = Factura.objects.filter(usuario_emisor_id=usuario_id, clave_idempotencia=clave).first()
+        if factura is None:
+            return None
+        respuesta = _respuesta_factura_guardada(factura)
+        cache.set(clave_cache, respuesta, SEGUNDOS_CACHE_IDEMPOTENCIA)
+    return JsonResponse({**respuesta, 'repetida': True})
+
+
 @login_required
 @require_POST
+@medir_peticion
 def guardar_factura_ajax(request):
     """
     Guarda una factura completa con todos sus detalles.
     Recibe un JSON con:
     - cliente_id
-    - detalles: [{ descripcion, cantidad, precio_unitario, descuento }]
+    - detalles: [{ descripcion, cantidad, precio_unitario, descuento, tasa_iva? }]
+      (tasa_iva opcional, fracción: 0.19 por defecto, 0 para ítems excluidos)
     - metodo_pago
     - condicion_pago
     - notas
+    
+    Header opcional Idempotency-Key: si el mismo usuario ya guardó una
+    factura con esa clave, se devuelve la misma respuesta sin volver a procesar nada
+    (reintentos del navegador ante cortes de conexión).
     """
+    clave = request.headers.get('Idempotency-Key', '').strip() or None
+    if clave is not None:
+        if not CLAVE_IDEMPOTENCIA.fullmatch(clave):
+            return JsonResponse({
+                'success': False,
+                'message': 'Idempotency-Key inválida (8 a 64 caracteres: letras, números, - o _)'
+            }, status=400)
+        
+        repetida = _respuesta_repetida(request.user.id, clave)
+        if repetida is not None:
+            return repetida
+    
     try:
         data = json.loads(request.body)
         
@@ -287,67 +341,72 @@ def guardar_factura_ajax(request):
         condicion_pago = data.get('condicion_pago', 'CONTADO')
         notas = data.get('notas', '')
         
-        # Crear factura con transacción atómica
-        with transaction.atomic():
-            # Crear la factura (el código se genera automáticamente)
-            factura = Factura.objects.create(
-                cliente=cliente,
-                usuario_emisor=request.user,
-                metodo_pago=metodo_pago,
-                condicion_pago=condicion_pago,
-                notas=notas,
-                fecha_emision=timezone.now(),
+        # Productos del catálogo referenciados (una sola consulta; se ignoran ids inexistentes)
+        ids_productos = {
+            d.get('producto_id') for d in detalles
+            if isinstance(d.get('producto_id'), int)
+        }
+        productos_validos = set(
+            Producto.objects.filter(id__in=ids_productos).values_list('id', flat=True)
+        ) if ids_productos else set()
+        
+        # Calcular las líneas en memoria (mismas reglas que DetalleFactura.calcular_valores)
+        lineas = []
+        for i, detalle_data in enumerate(detalles):
+            producto_id = detalle_data.get('producto_id')
+            detalle = DetalleFactura(
+                descripcion=detalle_data.get('descripcion', ''),
+                cantidad=Decimal(str(detalle_data.get('cantidad', 1))),
+                precio_unitario=Decimal(str(detalle_data.get('precio_unitario', 0))),
+                descuento=Decimal(str(detalle_data.get('descuento', 0))),
+                producto_id=producto_id if producto_id in productos_validos else None,
+                tasa_iva=Decimal(str(detalle_data.get('tasa_iva', Factura.TASA_IVA))),
+                orden=i + 1
             )
-            
-            # Crear los detalles
-            subtotal = Decimal('0.00')
-            total_descuentos = Decimal('0.00')
-            
-            for i, detalle_data in enumerate(detalles):
-                cantidad = Decimal(str(detalle_data.get('cantidad', 1)))
-                precio_unitario = Decimal(str(detalle_data.get('precio_unitario', 0)))
-                descuento = Decimal(str(detalle_data.get('descuento', 0)))
-                descripcion = detalle_data.get('descripcion', '')
-                producto_oscar_id = detalle_data.get('producto_id', None)
-                
-                # Crear detalle (los cálculos se hacen automáticamente en el modelo)
-                detalle = DetalleFactura.objects.create(
-                    factura=factura,
-                    descripcion=descripcion,
-                    cantidad=cantidad,
-                    precio_unitario=precio_unitario,
-                    descuento=descuento,
-                    producto_oscar_id=producto_oscar_id,
-                    orden=i + 1
+            if not Decimal('0') <= detalle.tasa_iva < Decimal('1'):
+                return JsonResponse({
+                    'success': False,
+                    'message': f'Tasa de IVA no válida en la línea {i + 1}'
+                }, status=400)
+            detalle.calcular_valores()
+            lineas.append(detalle)
+        
+        # Crear factura con transacción atómica
+        try:
+            with transaction.atomic():
+                # La factura se inserta una sola vez, ya con sus totales finales
+                # (el código se genera automáticamente)
+                factura = Factura(
+                    cliente=cliente,
+                    usuario_emisor=request.user,
+                    metodo_pago=metodo_pago,
+                    condicion_pago=condicion_pago,
+                    notas=notas,
+                    fecha_emision=timezone.now(),
+                    clave_idempotencia=clave,
                 )
+                factura.asignar_totales(lineas)
+                factura.save()
                 
-                # Acumular totales
-                subtotal += detalle.precio_unitario * cantidad
-                total_descuentos += descuento * cantidad
-            
-            # Calcular subtotal neto e IVA
-            subtotal_neto = subtotal - total_descuentos
-            total_iva = subtotal_neto * Decimal('0.19')  # IVA 19%
-            total_pagar = subtotal_neto + total_iva
-            
-            # Actualizar factura con totales
-            factura.subtotal = subtotal
-            factura.total_descuentos = total_descuentos
-            factura.subtotal_neto = subtotal_neto
-            factura.total_iva = total_iva
-            factura.total_pagar = total_pagar
-            factura.save()
-            
-            return JsonResponse({
-                'success': True,
-                'message': 'Factura generada exitosamente',
-                'factura': {
-                    'id': factura.id,
-                    'codigo_factura': factura.codigo_factura,
-                    'total_pagar': str(factura.total_pagar),
-                    'fecha_emision': factura.fecha_emision.strftime('%d/%m/%Y %H:%M'),
-                }
-            })
+                # Todos los detalles en un solo INSERT (por lotes)
+                for detalle in lineas:
+                    detalle.factura = factura
+                DetalleFactura.objects.bulk_create(lineas, batch_size=500)
+                
+                # Resumen de ventas (reportes y dashboard) y saldo del cliente
+                registrar_factura(factura, lineas)
+                registrar_credito(factura)
+        except IntegrityError:
+            # Un reintento concurrente con la misma clave ganó la carrera
+            repetida = _respuesta_repetida(request.user.id, clave) if clave else None
+            if repetida is None:
+                raise
+            return repetida
+        
+        respuesta = _respuesta_factura_guardada(factura)
+        if clave:
+            cache.set(_clave_cache_idempotencia(request.user.id, clave), respuesta, SEGUNDOS_CACHE_IDEMPOTENCIA)
+        return JsonResponse(respuesta)
             
     except User.DoesNotExist:
         return JsonResponse({
@@ -362,7 +421,184 @@ def guardar_factura_ajax(request):
         }, status=400)
         
     except Exception as e:
+        logger.error("Error en guardar_factura_ajax: %s", e, exc_info=True)
         return JsonResponse({
             'success': False,
             'message': f'Error al guardar la factura: {str(e)}'
         }, status=500)
+
+
+@staff_or_permission_required('users.can_manage_caja')
+@require_POST
+@medir_peticion
+def registrar_pago_ajax(request):
+    """
+    Registra un abono a una factura a crédito.
+    Recibe un JSON con: factura_id, monto, canal (EFECTIVO | BANCO), referencia.
+    El pago entra a la caja abierta como movimiento COBRO_CXC.
+    """
+    try:
+        data = json.loads(request.body)
+        pago = registrar_pago(
+            data.get('factura_id'),
+            data.get('monto', 0),
+            request.user,
+            canal=data.get('canal', 'EFECTIVO'),
+            referencia=str(data.get('referencia', ''))[:100],
+        )
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Datos JSON inválidos'
+        }, status=400)
+    except (ValueError, ArithmeticError) as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error("Error en registrar_pago_ajax: %s", e, exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'message': f'Error al registrar el pago: {str(e)}'
+        }, status=500)
+    
+    return JsonResponse({
+        'success': True,
+        'message': 'Pago registrado exitosamente',
+        'pago': {
+            'id': pago.id,
+            'monto': str(pago.monto),
+            'movimiento_caja_id': pago.movimiento_caja_id,
+            'saldo_pendiente': str(pago.factura.saldo_pendiente),
+        }
+    })
+
+
+@staff_or_permission_required('users.can_view_caja')
+@require_GET
+@medir_peticion
+def cartera_ajax(request):
+    """
+    Antigüedad de la cartera por cliente: saldos por vencer y vencidos
+    0-15, 16-30, 31-60, 61-90 y más de 90 días. ?cliente_id= filtra un cliente.
+    """
+    try:
+        cliente_id = int(request.GET['cliente_id']) if request.GET.get('cliente_id') else None
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'cliente_id inválido'
+        }, status=400)
+    
+    filas, totales = antiguedad_cartera(cliente_id=cliente_id)
+    
+    return JsonResponse({
+        'success': True,
+        'fecha_corte': timezone.localdate().isoformat(),
+        'clientes': [
+            {campo: _valor_json(valor) for campo, valor in fila.items()}
+            for fila in filas
+        ],
+        'totales': {campo: _valor_json(valor) for campo, valor in totales.items()},
+    })
+
+
+# Filas máximas del reporte de ventas por cliente o producto
+MAX_LIMITE_REPORTE = 100
+
+
+@staff_or_permission_required('users.can_view_reports')
+@require_GET
+@medir_peticion
+def reporte_ventas_ajax(request):
+    """
+    Reporte de ventas desde el resumen pre-agregado.
+    Parámetros GET:
+    - agrupar: dia | cliente | metodo_pago | producto (default: dia)
+    - desde, hasta: AAAA-MM-DD (default: mes actual)
+    - limite: top N para cliente/producto (default: 10, máx. 100)
+    """
+    agrupar = request.GET.get('agrupar', 'dia')
+    if agrupar not in AGRUPACIONES:
+        return JsonResponse({
+            'success': False,
+            'message': f'Agrupación no válida. Use: {", ".join(AGRUPACIONES)}'
+        }, status=400)
+    
+    hoy = timezone.localdate()
+    try:
+        desde = date.fromisoformat(request.GET.get('desde') or hoy.replace(day=1).isoformat())
+        hasta = date.fromisoformat(request.GET.get('hasta') or hoy.isoformat())
+        limite = min(max(int(request.GET.get('limite', 10)), 1), MAX_LIMITE_REPORTE)
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Parámetros inválidos (fechas AAAA-MM-DD, limite entero)'
+        }, status=400)
+    
+    filas = resumen_ventas(
+        desde, hasta, agrupar,
+        limite=limite if agrupar in ('cliente', 'producto') else None
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'agrupar': agrupar,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'resultados': [
+            {campo: _valor_json(valor) for campo, valor in fila.items()}
+            for fila in filas
+        ],
+    })
+
+
+def _valor_json(valor):
+    """Decimales como float y fechas en formato ISO."""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+@login_required
+@require_GET
+@medir_peticion
+def factura_pdf(request, factura_id):
+    """
+    PDF de una factura. Se genera la primera vez y queda guardado por hash
+    de contenido: las siguientes descargas sirven el archivo existente y el
+    navegador recibe 304 si ya tiene la misma versión (ETag).
+    ?descargar=1 lo envía como adjunto en vez de abrirlo en el navegador.
+    Los clientes solo pueden ver sus propias facturas.
+    """
+    facturas = facturas_para_pdf()
+    usuario = request.user
+    if not (usuario.is_staff or usuario.is_superuser or usuario.has_perm('users.can_manage_sales')):
+        facturas = facturas.filter(cliente=usuario)
+    factura = get_object_or_404(facturas, id=factura_id)
+
+    try:
+        ruta, contenido = obtener_pdf_factura(factura)
+    except Exception as e:
+        logger.error("Error generando PDF de %s: %s", factura.codigo_factura, e, exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'message': f'Error al generar el PDF: {str(e)}'
+        }, status=500)
+
+    etag = f'"{contenido}"'
+    if request.headers.get('If-None-Match') == etag:
+        respuesta = HttpResponseNotModified()
+    else:
+        respuesta = FileResponse(
+            default_storage.open(ruta, 'rb'),
+            content_type='application/pdf',
+            as_attachment=request.GET.get('descargar') == '1',
+            filename=f'{factura.codigo_factura}.pdf',
+        )
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta